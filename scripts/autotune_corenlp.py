@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+""" This script probes a CoreNLP server with a sample of message bodies from an EAXS file at
+increasing concurrency and chunk sizes and writes a recommended config that
+tomes_tagger.tagger.Tagger can load via its @nlp_config option. """
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import os
+import plac
+import random
+from tomes_tagger.lib.eaxs_to_tagged import EAXSToTagged
+from tomes_tagger.lib.html_to_text import LXMLToText
+from tomes_tagger.lib.nlp_autotuner import NLPAutotuner
+
+
+# enable logging.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def get_sample_texts(eaxs_file, sample_size=200, seed=0):
+    """ Returns a random sample of plain text message bodies from @eaxs_file. HTML bodies
+    are converted to plain text in-process.
+
+    Args:
+        - eaxs_file (str): The EAXS file to sample.
+        - sample_size (int): The maximum number of message bodies to return.
+        - seed (int): The random seed.
+
+    Returns:
+        list: The return value.
+    """
+
+    rng = random.Random(seed)
+    e2t = EAXSToTagged(None, None)
+    l2t = LXMLToText()
+
+    # keep a reservoir sample of raw message data.
+    sample = []
+    for i, (event, message_el) in enumerate(e2t._get_messages(eaxs_file)):
+        message_data = e2t._get_message_data(message_el)
+        if i < sample_size:
+            sample.append(message_data)
+        else:
+            j = rng.randint(0, i)
+            if j < sample_size:
+                sample[j] = message_data
+        message_el.clear()
+
+    # decode @sample; convert HTML to plain text.
+    texts = []
+    for content_text, transfer_encoding_text, content_type_text in sample:
+        text, is_decoded = e2t._decode_content(content_text, transfer_encoding_text)
+        if content_type_text == "text/html":
+            text = l2t.get_text(text, is_raw=True)
+        texts.append(text)
+
+    return texts
+
+
+def main(eaxs_file: "EAXS file from which to sample message bodies",
+        config_file: "JSON config file to write",
+        host: ("NLP server URL", "option")="http://localhost:9003",
+        sample_size: ("number of message bodies to sample", "option", None, int)=200,
+        chunk_sizes: ("comma-delimited chunk sizes", "option")="5000,10000,25000,50000",
+        concurrency: ("comma-delimited concurrency levels", "option")="1,2,4,8,16",
+        min_gain: ("minimum throughput gain to keep raising concurrency", "option", None,
+            float)=0.1,
+        max_error_rate: ("maximum share of failed requests", "option", None, float)=0.01):
+
+    "Writes a recommended CoreNLP chunk size and worker count for @host.\
+    \nexample: `python3 autotune_corenlp.py sampleEAXS.xml nlp_config.json -sample-size 100`"
+
+    # test if @config_file exists.
+    if os.path.isfile(config_file):
+        sys.exit("File '{}' already exists.".format(config_file))
+
+    # sample message bodies.
+    texts = get_sample_texts(eaxs_file, sample_size)
+    logger.info("Sampled {} message bodies with {} characters.".format(len(texts),
+        sum([len(text) for text in texts])))
+
+    # probe @host; write the recommended config.
+    tuner = NLPAutotuner(host, [int(c) for c in chunk_sizes.split(",")],
+            [int(c) for c in concurrency.split(",")], min_gain, max_error_rate)
+    try:
+        results = tuner.tune(texts)
+        for probe in results["probes"]:
+            logger.info(json.dumps(probe))
+        tuner.write_config(config_file, results)
+        logger.info("Recommended: {}".format(results["recommended"]))
+        logger.info("Wrote config: {}".format(config_file))
+    except Exception as err:
+        logger.critical(err)
+        sys.exit(err.__repr__())
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+""" This script benchmarks HTML to plain text conversion per document. """
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import os
+import plac
+import statistics
+import time
+from glob import glob
+from tomes_tagger.lib.html_to_text import HTMLToText
+
+
+# enable logging.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def get_latencies(h2t, html_docs, repeat=1):
+    """ Converts each HTML string in @html_docs to plain text via @h2t and times each
+    conversion.
+
+    Args:
+        - h2t (tomes_tagger.lib.html_to_text.HTMLToText): The converter to benchmark.
+        - html_docs (list): The HTML strings to convert.
+        - repeat (int): The number of times to convert @html_docs.
+
+    Returns:
+        list: The return value.
+        The seconds per conversion (float).
+    """
+
+    latencies = []
+    for i in range(repeat):
+        for html in html_docs:
+            start_time = time.perf_counter()
+            h2t.get_text(html, is_raw=True)
+            latencies.append(time.perf_counter() - start_time)
+
+    return latencies
+
+
+def summarize(latencies):
+    """ Summarizes @latencies in milliseconds.
+
+    Args:
+        - latencies (list): The seconds per conversion (float).
+
+    Returns:
+        dict: The return value.
+    """
+
+    latencies = sorted(latencies)
+    summary = {"documents": len(latencies),
+            "mean_ms": statistics.mean(latencies) * 1000,
+            "median_ms": statistics.median(latencies) * 1000,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "total_s": sum(latencies)}
+    summary = {key: round(val, 3) for key, val in summary.items()}
+
+    return summary
+
+
+def main(html_folder: "folder with HTML files",
+        lynx_command: ("path to the Lynx executable", "option")="lynx",
+        repeat: ("number of passes over the HTML files", "option", None, int)=3,
+        workers: ("number of concurrent Lynx processes", "option", None, int)=None):
+
+    "Compares per-document Lynx conversion latency via temporary files and via stdin and\
+    \nreports the throughput of concurrent conversion.\
+    \nexample: `python3 benchmark_html_to_text.py ../tests/sample_files`"
+
+    # read HTML files.
+    html_docs = []
+    for html_file in glob(os.path.join(html_folder, "*.htm*")):
+        with open(html_file, encoding="utf-8", errors="backslashreplace") as hf:
+            html_docs.append(hf.read())
+    logger.info("Found {} HTML files.".format(len(html_docs)))
+    if len(html_docs) == 0:
+        sys.exit("No HTML files found.")
+
+    # benchmark each method.
+    for use_stdin in [False, True]:
+        h2t = HTMLToText(lynx_command, use_stdin=use_stdin)
+        latencies = get_latencies(h2t, html_docs, repeat)
+        method = "stdin" if use_stdin else "temporary file"
+        logger.info("{}: {}".format(method, summarize(latencies)))
+
+    # benchmark concurrent conversion.
+    h2t = HTMLToText(lynx_command)
+    start_time = time.perf_counter()
+    total = len(list(h2t.get_texts(html_docs * repeat, workers=workers)))
+    seconds = time.perf_counter() - start_time
+    logger.info("concurrent: {}".format({"documents": total, 
+        "documents_per_second": round(total/seconds, 3), "total_s": round(seconds, 3)}))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+""" This script benchmarks the HTML modifications made before HTML is converted to text. """
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import os
+import plac
+import statistics
+import time
+import tracemalloc
+from glob import glob
+from tomes_tagger.lib.html_to_text import LXMLToText, ModifyHTML, StripHTML
+
+
+# enable logging.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def get_newsletter(sections, payloads=False):
+    """ Creates a newsletter-like HTML document with links and images.
+
+    Args:
+        - sections (int): The number of sections in the newsletter.
+        - payloads (bool): Use True to add inline CSS, conditional comments, and Base64 
+        "data:" images to each section, as marketing emails do. Otherwise, use False.
+
+    Returns:
+        str: The return value.
+    """
+
+    section = ("<table><tr><td><img src='cid:banner_{0}.png' alt='Banner {0}'></td>"
+            "<td><h2>Story {0}</h2><p>The Department of Natural and Cultural Resources "
+            "announced <b>new hours</b> for the State Archives in Raleigh. "
+            "<a href='https://archives.ncdcr.gov/{0}'>Read more</a></p></td></tr></table>")
+    html = "<html><head><style>td {{padding: 0}}</style></head><body>{}</body></html>"
+    if payloads:
+        section = ("<style>.s{0} td {{font-family: Arial; padding: 6px 13px}}</style>"
+                "<!--[if mso]><table><tr><td width='600'><![endif]-->" + section.replace(
+                "cid:banner_{0}.png", "data:image/png;base64," + "iVBORw0KGgo=" * 200) +
+                "<!--[if mso]></td></tr></table><![endif]-->")
+    html = html.format("".join([section.format(i) for i in range(sections)]))
+
+    return html
+
+
+def time_modes(html, repeat=1):
+    """ Times modifying @html with BeautifulSoup (two traversals and serialization), with
+    lxml (one traversal and serialization), and with lxml followed by in-process conversion
+    of the tree. Each mode is also timed after first stripping payloads via StripHTML.
+
+    Args:
+        - html (str): The HTML to modify.
+        - repeat (int): The number of times to modify @html.
+
+    Returns:
+        dict: The return value.
+        Each key is a mode and each value is a tuple with the median milliseconds per 
+        document and the peak memory allocated in KB.
+    """
+
+    l2t = LXMLToText()
+    strip = StripHTML()
+
+    # create functions for each mode.
+    def html5lib_mode():
+        modified = ModifyHTML(html, "html5lib")
+        modified.shift_links()
+        modified.remove_images()
+        return modified.raw()
+
+    def lxml_mode():
+        modified = ModifyHTML(html, "lxml.html")
+        modified.modify()
+        return modified.raw()
+
+    def lxml_tree_mode():
+        modified = ModifyHTML(html, "lxml.html")
+        modified.modify()
+        if modified.root is None:
+            return l2t.get_text(modified.raw())
+        return l2t.get_tree_text(modified.root)
+
+    # time each mode with and without stripping; measure peak memory once.
+    results = {}
+    original_html = html
+    for name, mode in [("html5lib", html5lib_mode), ("lxml.html", lxml_mode),
+            ("lxml.html+tree_text", lxml_tree_mode)]:
+        for is_stripped in [False, True]:
+            latencies = []
+            for i in range(repeat):
+                start_time = time.perf_counter()
+                html = strip.strip(original_html) if is_stripped else original_html
+                mode()
+                latencies.append(time.perf_counter() - start_time)
+            tracemalloc.start()
+            html = strip.strip(original_html) if is_stripped else original_html
+            mode()
+            peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+            key = "strip+" + name if is_stripped else name
+            results[key] = (round(statistics.median(latencies) * 1000, 3), peak_kb)
+        html = original_html
+
+    return results
+
+
+def main(html_folder: ("folder with HTML files", "option")=None,
+        sections: ("number of sections in a synthetic newsletter", "option", None, int)=500,
+        repeat: ("number of times to modify each document", "option", None, int)=3,
+        payloads: ("add styles, comments, and data URIs to the newsletter", "flag", "p")=False):
+
+    "Reports the median milliseconds and peak KB per document for each way of modifying HTML.\
+    \nexample: `python3 benchmark_modify_html.py -sections 1000`"
+
+    # get HTML documents; if no folder is given, use a synthetic newsletter.
+    html_docs = {}
+    if html_folder is not None:
+        for html_file in glob(os.path.join(html_folder, "*.htm*")):
+            with open(html_file, encoding="utf-8", errors="backslashreplace") as hf:
+                html_docs[html_file] = hf.read()
+    else:
+        html_docs["newsletter_{}".format(sections)] = get_newsletter(sections, payloads)
+
+    # time each document.
+    for name, html in html_docs.items():
+        logger.info("{} ({} characters): {}".format(name, len(html), time_modes(html,
+            repeat)))
+
+
+if __name__ == "__main__":
+    plac.call(main)
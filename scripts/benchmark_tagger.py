@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+""" This script benchmarks tomes_tagger.tagger.Tagger.write_tagged() end to end on
+synthetic EAXS files of increasing size and reports messages per second, peak memory, and the
+time spent per stage. Logging can be enabled with one of the tagger's logging profiles to
+measure its overhead. """
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import logging.config
+import os
+import plac
+import resource
+import tempfile
+import time
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from make_synthetic_eaxs import write_eaxs
+from tomes_tagger.lib.corenlp_standin import CoreNLPStandIn
+from tomes_tagger.lib.queue_logging import QueueLogging
+from tomes_tagger.tagger import Tagger
+
+
+# enable logging.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def set_logging(log_profile, log_dir):
+    """ Configures logging with one of the tagger's logging profiles as "tagger.py" does,
+    except that log files, including console output, are written to @log_dir.
+
+    Args:
+        - log_profile (str): The logging profile: "default" or "production".
+        - log_dir (str): The folder to write log files to.
+
+    Returns:
+        tomes_tagger.lib.queue_logging.QueueLogging: The return value.
+        If @log_profile is "default", None is returned.
+    """
+
+    # load the profile's config file.
+    config_file = {"default": "logger.yaml", "production": "logger_production.yaml"}[
+            log_profile]
+    config_file = os.path.join(os.path.dirname(__file__), "..", "tomes_tagger", config_file)
+    with open(config_file) as cf:
+        config = yaml.safe_load(cf.read())
+
+    # write log files and console output to @log_dir.
+    for name, handler in config["handlers"].items():
+        if name == "console":
+            handler["class"] = "logging.FileHandler"
+            handler["filename"] = "console.log"
+            handler.pop("stream")
+        handler["filename"] = os.path.join(log_dir, os.path.basename(handler["filename"]))
+    logging.config.dictConfig(config)
+
+    # if needed, handle log records on background threads.
+    queue_logging = None
+    if log_profile == "production":
+        queue_logging = QueueLogging(["", "event_logger"])
+        queue_logging.start()
+
+    return queue_logging
+
+
+def run_tagger(eaxs_file, tagger_kwargs, log_profile=None):
+    """ Tags @eaxs_file with a new Tagger and times it. This is meant to run in its own
+    process so that peak memory is measured per run.
+
+    Args:
+        - eaxs_file (str): The EAXS file to tag.
+        - tagger_kwargs (dict): The keyword arguments for Tagger.
+        - log_profile (str): The logging profile to tag with: "default" or "production".
+        If None, only warnings are logged, to the console.
+
+    Returns:
+        dict: The return value.
+    """
+
+    # tag @eaxs_file into a temporary folder.
+    tagger = Tagger(stage_timing=True, **tagger_kwargs)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        queue_logging = None
+        if log_profile is not None:
+            queue_logging = set_logging(log_profile, temp_dir)
+        start_time = time.perf_counter()
+        results = tagger.write_tagged(eaxs_file, os.path.join(temp_dir, "tagged.xml"))
+        if queue_logging is not None:
+            queue_logging.stop()
+        seconds = time.perf_counter() - start_time
+        log_bytes = sum([os.path.getsize(os.path.join(temp_dir, f)) for f in 
+            os.listdir(temp_dir) if f.endswith(".log")])
+
+    # summarize results; ru_maxrss is in KB on Linux.
+    total = results["total_messages"]
+    stages = results["stage_timing"]["stages"]
+    summary = {"messages": total, "untagged_messages": len(results["untagged_messages"]),
+            "log_profile": log_profile, "log_bytes": log_bytes,
+            "seconds": round(seconds, 3),
+            "messages_per_second": round(total/seconds, 3) if seconds > 0 else 0.0,
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,
+                1),
+            "stage_seconds": {stage: values["total_s"] for stage, values in
+                stages.items()},
+            "stage_p99_ms": {stage: values["p99_ms"] for stage, values in
+                stages.items()}}
+
+    return summary
+
+
+def main(corpus_folder: "folder in which to write or reuse synthetic EAXS files",
+        report_file: "JSON report file to write",
+        sizes: ("comma-delimited message counts", "option")="1000,100000,1000000",
+        host: ("NLP server URL", "option")="http://localhost:9003",
+        html_backend: ("HTML to text converter", "option", None, str,
+            ["lynx", "lxml"])="lynx",
+        html_parser: ("HTML parser for modifying HTML", "option", None, str,
+            ["html5lib", "lxml.html"])="html5lib",
+        body_size: ("median characters of text per body", "option", None, int)=2000,
+        html_ratio: ("share of HTML bodies", "option", None, float)=0.5,
+        duplicate_rate: ("share of duplicate bodies", "option", None, float)=0.1,
+        standin_latency: ("median seconds per request for a local CoreNLP stand-in\
+ used instead of @host", "option", None, float)=None,
+        log_profile: ("logging profile to tag with", "option", None, str, ["default",
+            "production"])=None):
+
+    "Benchmarks end-to-end tagging of synthetic EAXS files at each size in @sizes.\
+    \nexample: `python3 benchmark_tagger.py corpus report.json -sizes 1000,100000`"
+
+    # test if @report_file exists.
+    if os.path.isfile(report_file):
+        sys.exit("File '{}' already exists.".format(report_file))
+
+    # if requested, replace @host with a local CoreNLP stand-in.
+    standin = None
+    if standin_latency is not None:
+        standin = CoreNLPStandIn(latency=standin_latency, latency_sigma=0.5)
+        standin.start()
+        host = standin.url
+
+    tagger_kwargs = {"host": host, "html_backend": html_backend,
+            "html_parser": html_parser}
+    report = {"tagger": tagger_kwargs, "runs": []}
+
+    for size in [int(s) for s in sizes.split(",")]:
+
+        # if needed, write the corpus for @size.
+        eaxs_file = os.path.join(corpus_folder, "synthetic_{}_{}_{}_{}.xml".format(size,
+            body_size, html_ratio, duplicate_rate))
+        if not os.path.isfile(eaxs_file):
+            logger.info("Writing synthetic EAXS: {}".format(eaxs_file))
+            write_eaxs(eaxs_file, size, folders=max(1, size//1000), body_size=body_size,
+                    html_ratio=html_ratio, duplicate_rate=duplicate_rate)
+
+        # tag the corpus in a fresh process.
+        logger.info("Tagging {} messages.".format(size))
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            summary = executor.submit(run_tagger, eaxs_file, tagger_kwargs, 
+                    log_profile).result()
+        summary["eaxs_file"] = eaxs_file
+        logger.info("{} messages: {} messages/sec; peak RSS: {} MB".format(size,
+            summary["messages_per_second"], summary["peak_rss_mb"]))
+        report["runs"].append(summary)
+
+        # write the report after each run in case a later one is stopped.
+        with open(report_file, "w", encoding="utf-8") as rf:
+            json.dump(report, rf, indent=2)
+
+    if standin is not None:
+        standin.stop()
+    logger.info("Wrote report: {}".format(report_file))
+
+
+if __name__ == "__main__":
+    plac.call(main)
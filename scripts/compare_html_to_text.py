@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+""" This script compares the Lynx and lxml HTML to plain text converters on a folder of HTML
+files and writes a report with timings, text similarity, and line differences. """
+
+# import modules.
+import sys; sys.path.append("..")
+import difflib
+import logging
+import os
+import plac
+import time
+from glob import glob
+from tomes_tagger.lib.html_to_text import HTMLToText, LXMLToText, ModifyHTML
+
+
+# enable logging.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def compare(html, converters):
+    """ Converts @html with each converter in @converters and times each conversion. As in
+    tomes_tagger.tagger.Tagger, links are shifted and images are removed first.
+
+    Args:
+        - html (str): The HTML to convert.
+        - converters (dict): The converters to compare, keyed by name.
+
+    Returns:
+        dict: The return value.
+        Each key is a converter name and each value is a tuple with the plain text (str) and
+        the seconds spent converting it (float).
+    """
+
+    # alter DOM as tomes_tagger.tagger.Tagger does.
+    html = ModifyHTML(html)
+    html.shift_links()
+    html.remove_images()
+    html = html.raw()
+
+    # convert and time @html with each converter.
+    results = {}
+    for name, converter in converters.items():
+        start_time = time.perf_counter()
+        text = converter.get_text(html, is_raw=True)
+        results[name] = (text, time.perf_counter() - start_time)
+
+    return results
+
+
+def main(html_folder: "folder with HTML files",
+        report_file: "report file to write",
+        lynx_command: ("path to the Lynx executable", "option")="lynx"):
+
+    "Writes a timing, similarity, and text-diff report for Lynx and lxml conversions.\
+    \nexample: `python3 compare_html_to_text.py ../tests/sample_files report.txt`"
+
+    # test if @report_file exists.
+    if os.path.isfile(report_file):
+        sys.exit("File '{}' already exists.".format(report_file))
+
+    converters = {"lynx": HTMLToText(lynx_command), "lxml": LXMLToText()}
+    totals = {name: 0.0 for name in converters}
+    ratios = []
+
+    # compare converters per HTML file.
+    html_files = sorted(glob(os.path.join(html_folder, "*.htm*")))
+    logger.info("Found {} HTML files.".format(len(html_files)))
+    with open(report_file, "w", encoding="utf-8") as report:
+        for html_file in html_files:
+
+            with open(html_file, encoding="utf-8", errors="backslashreplace") as hf:
+                results = compare(hf.read(), converters)
+            for name in converters:
+                totals[name] += results[name][1]
+
+            # score word-level similarity; diff lines.
+            lynx_text, lxml_text = results["lynx"][0], results["lxml"][0]
+            ratio = difflib.SequenceMatcher(None, lynx_text.split(),
+                    lxml_text.split()).ratio()
+            ratios.append(ratio)
+            diff = difflib.unified_diff(lynx_text.splitlines(), lxml_text.splitlines(),
+                    "lynx", "lxml", lineterm="")
+
+            # write results.
+            report.write("# {}\n".format(html_file))
+            report.write("word similarity: {:.3f}; lynx: {:.1f} ms; lxml: {:.1f} ms\n".format(
+                ratio, results["lynx"][1] * 1000, results["lxml"][1] * 1000))
+            report.write("\n".join(diff) + "\n\n")
+
+        # write summary.
+        if len(html_files) != 0:
+            summary = "# summary\nfiles: {}; mean word similarity: {:.3f}; ".format(
+                    len(html_files), sum(ratios)/len(ratios))
+            summary += "; ".join(["{} total: {:.3f} s".format(name, seconds) for name,
+                seconds in totals.items()])
+            report.write(summary + "\n")
+            logger.info(summary.replace("\n", " "))
+
+    logger.info("Wrote report: {}".format(report_file))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+""" This script writes synthetic EAXS files that match the tomes-eaxs namespace so that
+tagging can be benchmarked at scale. Message counts, folder nesting, body sizes, the
+HTML/plain ratio, the Base64/quoted-printable mix, and the rate of duplicate bodies are
+configurable. Output is deterministic for a given seed. """
+
+# import modules.
+import base64
+import logging
+import os
+import plac
+import quopri
+import random
+import sys
+from lxml import etree
+
+
+# enable logging.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+# set namespace attributes.
+NCDCR_URI = "https://github.com/StateArchivesOfNorthCarolina/tomes-eaxs"
+XSI_URI = "http://www.w3.org/2001/XMLSchema-instance"
+SCHEMA_LOCATION = NCDCR_URI + " https://raw.githubusercontent.com/StateArchivesOfNorthCarolina/tomes-eaxs/master/versions/1/eaxs_schema_v1.xsd"
+
+# set vocabulary for message bodies; names, places, and patterns give NER something to do.
+PEOPLE = ["Jane Doe", "John Doe", "Jack Hill", "Jill Hill", "Roy Cooper", "Susan Kluttz",
+        "Ann Smith", "Carlos Ruiz", "Mei Chen", "Priya Patel"]
+PLACES = ["Raleigh", "Durham", "Asheville", "Wilmington", "Greensboro", "Charlotte",
+        "Boone", "Wake County", "North Carolina", "Outer Banks"]
+ORGS = ["State Archives", "Department of Natural and Cultural Resources", "Wake Tech",
+        "General Assembly", "Division of Motor Vehicles", "NC State University"]
+TEMPLATES = ["Did you contact {person} about the meeting in {place}?",
+        "{person} from the {org} will call you on Tuesday.",
+        "Please send the report to {person} before we leave for {place}.",
+        "The {org} approved the budget for {place} last week.",
+        "My number is 919-555-{digits} if {person} needs to reach me.",
+        "Per G.S. 132-1.10, the {org} can't release that record.",
+        "I'll be in {place} with {person} until Friday."]
+
+
+def get_text(rng, size):
+    """ Returns plain text of about @size characters made of paragraphs of sentences.
+
+    Args:
+        - rng (random.Random): The random number generator.
+        - size (int): The approximate number of characters.
+
+    Returns:
+        str: The return value.
+    """
+
+    paragraphs, sentences, length = [], [], 0
+    while length < size:
+        sentence = rng.choice(TEMPLATES).format(person=rng.choice(PEOPLE),
+                place=rng.choice(PLACES), org=rng.choice(ORGS),
+                digits=rng.randint(1000, 9999))
+        sentences.append(sentence)
+        length += len(sentence) + 1
+        if len(sentences) == 4:
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    if len(sentences) != 0:
+        paragraphs.append(" ".join(sentences))
+
+    return "\n\n".join(paragraphs)
+
+
+def get_html(text):
+    """ Wraps each paragraph in @text in HTML with a link, an image, and a style.
+
+    Args:
+        - text (str): The plain text.
+
+    Returns:
+        str: The return value.
+    """
+
+    paragraphs = ["<p>{}</p>".format(p) for p in text.split("\n\n")]
+    html = ("<!DOCTYPE html><html><head><style>p {{margin: 0}}</style></head><body>{}"
+            "<p><a href='https://archives.ncdcr.gov'>State Archives</a>"
+            "<img src='cid:logo.png' alt='Logo'></p></body></html>").format("".join(
+            paragraphs))
+
+    return html
+
+
+def get_body(rng, body_size, html_ratio, base64_ratio, qp_ratio):
+    """ Creates a message body.
+
+    Args:
+        - rng (random.Random): The random number generator.
+        - body_size (int): The median number of characters of plain text. Sizes are
+        log-normally distributed around it.
+        - html_ratio (float): The share of HTML bodies.
+        - base64_ratio (float): The share of Base64-encoded bodies.
+        - qp_ratio (float): The share of quoted-printable bodies.
+
+    Returns:
+        tuple: The return value.
+        The first item is the content type (str). The second item is the transfer encoding
+        (str). The third item is the encoded content (str).
+    """
+
+    # create text or HTML.
+    size = max(20, int(rng.lognormvariate(0, 1) * body_size))
+    content = get_text(rng, size)
+    content_type = "text/plain"
+    if rng.random() < html_ratio:
+        content, content_type = get_html(content), "text/html"
+
+    # if needed, encode @content.
+    encoding = rng.random()
+    if encoding < base64_ratio:
+        content = base64.encodebytes(content.encode("utf-8")).decode("ascii")
+        transfer_encoding = "base64"
+    elif encoding < base64_ratio + qp_ratio:
+        content = quopri.encodestring(content.encode("utf-8")).decode("ascii")
+        transfer_encoding = "quoted-printable"
+    else:
+        transfer_encoding = "7bit"
+
+    return (content_type, transfer_encoding, content)
+
+
+def write_message(xfile, index, body):
+    """ Writes a <Message> element to @xfile.
+
+    Args:
+        - xfile (lxml.etree.xmlfile): The open EAXS file.
+        - index (int): The position of the message; used for identifiers.
+        - body (tuple): The content type, transfer encoding, and content.
+
+    Returns:
+        None
+    """
+
+    content_type, transfer_encoding, content = body
+    ns = lambda tag: "{" + NCDCR_URI + "}" + tag
+
+    # create <Message> element with the sub-elements the tagger reads.
+    message_el = etree.Element(ns("Message"), nsmap={None: NCDCR_URI})
+    for tag, text in [("RelPath", "."), ("LocalId", str(index)),
+            ("MessageId", "<{}@synthetic.nc.gov>".format(index)), ("MimeVersion", "1.0"),
+            ("OrigDate", "2017-01-10T12:00:00-05:00"),
+            ("From", '"Jane Doe" <jane_doe@synthetic.nc.gov>'),
+            ("To", '"John Doe" <john_doe@synthetic.nc.gov>'),
+            ("Subject", "Message {}".format(index))]:
+        etree.SubElement(message_el, ns(tag)).text = text
+    multi_body_el = etree.SubElement(message_el, ns("MultiBody"))
+    etree.SubElement(multi_body_el, ns("ContentType")).text = "multipart/mixed"
+    single_body_el = etree.SubElement(multi_body_el, ns("SingleBody"))
+    etree.SubElement(single_body_el, ns("ContentType")).text = content_type
+    etree.SubElement(single_body_el, ns("Charset")).text = "utf-8"
+    etree.SubElement(single_body_el, ns("TransferEncoding")).text = transfer_encoding
+    body_content_el = etree.SubElement(single_body_el, ns("BodyContent"))
+    etree.SubElement(body_content_el, ns("Content")).text = etree.CDATA(content)
+    etree.SubElement(body_content_el, ns("TransferEncoding")).text = transfer_encoding
+    etree.SubElement(message_el, ns("Eol")).text = "LF"
+
+    xfile.write(message_el)
+    return
+
+
+def write_eaxs(eaxs_file, messages=1000, folders=10, depth=2, body_size=2000,
+        html_ratio=0.5, base64_ratio=0.2, qp_ratio=0.2, duplicate_rate=0.1, seed=0):
+    """ Writes a synthetic EAXS file. Messages are spread evenly across @folders folders,
+    which are nested in chains of @depth folders.
+
+    Args:
+        - eaxs_file (str): The filepath to write to.
+        - messages (int): The number of <Message> elements.
+        - folders (int): The number of <Folder> elements.
+        - depth (int): The number of levels per chain of nested folders.
+        - body_size (int): The median number of characters of plain text per body.
+        - html_ratio (float): The share of HTML bodies.
+        - base64_ratio (float): The share of Base64-encoded bodies.
+        - qp_ratio (float): The share of quoted-printable bodies.
+        - duplicate_rate (float): The share of bodies that repeat an earlier body, as with
+        newsletters sent to many recipients.
+        - seed (int): The random seed.
+
+    Returns:
+        int: The return value.
+        The number of messages written.
+
+    Raises:
+        - FileExistsError: If @eaxs_file already exists.
+    """
+
+    # test if @eaxs_file exists.
+    if os.path.isfile(eaxs_file):
+        msg = "File '{}' already exists.".format(eaxs_file)
+        raise FileExistsError(msg)
+
+    rng = random.Random(seed)
+    folders = max(1, folders)
+    duplicates = []
+    index = 0
+
+    # create function to get a new or a duplicate body.
+    def get_next_body():
+        if len(duplicates) != 0 and rng.random() < duplicate_rate:
+            return rng.choice(duplicates)
+        body = get_body(rng, body_size, html_ratio, base64_ratio, qp_ratio)
+        if len(duplicates) < 100:
+            duplicates.append(body)
+        return body
+
+    # stream messages into nested folders.
+    with etree.xmlfile(eaxs_file, encoding="utf-8") as xfile:
+        xfile.write_declaration()
+        with xfile.element("{" + NCDCR_URI + "}Account", nsmap={None: NCDCR_URI,
+            "xsi": XSI_URI}, attrib={"{" + XSI_URI + "}schemaLocation": SCHEMA_LOCATION}):
+            with xfile.element("{" + NCDCR_URI + "}GlobalId"):
+                xfile.write("synthetic_{}".format(seed))
+
+            # create function to write a folder, its messages, and its nested folders.
+            def write_folder(folder_index, level):
+                nonlocal index
+                with xfile.element("{" + NCDCR_URI + "}Folder"):
+                    with xfile.element("{" + NCDCR_URI + "}Name"):
+                        xfile.write("folder_{}".format(folder_index))
+                    count = messages // folders + (1 if folder_index < messages % folders
+                            else 0)
+                    for i in range(count):
+                        index += 1
+                        write_message(xfile, index, get_next_body())
+                    if level < depth and folder_index + 1 < folders:
+                        return write_folder(folder_index + 1, level + 1)
+                return folder_index + 1
+
+            # write chains of nested folders.
+            folder_index = 0
+            while folder_index < folders:
+                folder_index = write_folder(folder_index, 1)
+
+    return index
+
+
+def main(eaxs_file: "EAXS file to write",
+        messages: ("number of messages", "option", None, int)=1000,
+        folders: ("number of folders", "option", None, int)=10,
+        depth: ("folder nesting depth", "option", None, int)=2,
+        body_size: ("median characters of text per body", "option", None, int)=2000,
+        html_ratio: ("share of HTML bodies", "option", None, float)=0.5,
+        base64_ratio: ("share of Base64 bodies", "option", None, float)=0.2,
+        qp_ratio: ("share of quoted-printable bodies", "option", None, float)=0.2,
+        duplicate_rate: ("share of duplicate bodies", "option", None, float)=0.1,
+        seed: ("random seed", "option", None, int)=0):
+
+    "Writes a synthetic EAXS file for benchmarking.\
+    \nexample: `python3 make_synthetic_eaxs.py synthetic.xml -messages 100000`"
+
+    try:
+        total = write_eaxs(eaxs_file, messages, folders, depth, body_size, html_ratio,
+                base64_ratio, qp_ratio, duplicate_rate, seed)
+        logger.info("Wrote {} messages to: {}".format(total, eaxs_file))
+    except Exception as err:
+        logger.critical(err)
+        sys.exit(err.__repr__())
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import os
+import plac
+import shutil
+import tempfile
+import unittest
+from tomes_tagger.batch_tagger import *
+from tomes_tagger.lib.corenlp_standin import CoreNLPStandIn
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_BatchTagger(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.standin = CoreNLPStandIn(latency=0.01)
+        self.standin.start()
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+        self.eaxs_dir = os.path.join(self.temp_dir.name, "eaxs")
+        self.output_dir = os.path.join(self.temp_dir.name, "tagged")
+        self.manifest_file = os.path.join(self.temp_dir.name, "manifest.json")
+
+        # copy sample files into 2 accounts; add a file that isn't EAXS.
+        for account in ["a", "b"]:
+            os.makedirs(os.path.join(self.eaxs_dir, account))
+            for name in ["sampleEAXS.xml", "sampleEAXS_thread.xml"]:
+                shutil.copy(os.path.join("sample_files", name), os.path.join(self.eaxs_dir,
+                    account, name))
+        with open(os.path.join(self.eaxs_dir, "b", "broken.xml"), "w") as bf:
+            bf.write("<Account>")
+
+
+    def tearDown(self):
+
+        self.standin.stop()
+        self.temp_dir.cleanup()
+
+
+    def test__batch(self):
+        """ Are all files tagged with one request in flight and is a broken file reported? """
+
+        # tag all files with 3 workers that share one request slot.
+        batch = BatchTagger(self.standin.url, workers=3, corenlp_capacity=1,
+                html_backend="lxml")
+        eaxs_files = batch.get_eaxs_files(self.eaxs_dir)
+        manifest = batch.write_tagged(eaxs_files, self.output_dir, self.manifest_file)
+        with open(self.manifest_file, encoding="utf-8") as mf:
+            written = json.load(mf)
+
+        # check if result is as expected.
+        statuses = {os.path.relpath(a["tagged_eaxs_file"], self.output_dir): a["status"]
+                for a in manifest["accounts"]}
+        self.assertEqual(statuses, {os.path.join("a", "sampleEAXS.xml"): "tagged",
+            os.path.join("a", "sampleEAXS_thread.xml"): "tagged",
+            os.path.join("b", "broken.xml"): "failed",
+            os.path.join("b", "sampleEAXS.xml"): "tagged",
+            os.path.join("b", "sampleEAXS_thread.xml"): "tagged"})
+        self.assertTrue(all([os.path.isfile(a["tagged_eaxs_file"]) for a in
+            manifest["accounts"] if a["status"] == "tagged"]))
+        self.assertEqual(self.standin.get_stats()["peak_active"], 1)
+        self.assertEqual(written["accounts"], json.loads(json.dumps(manifest["accounts"])))
+
+
+    def test__manifest(self):
+        """ Are listed files read relative to the manifest and are overwrites refused? """
+
+        # list 2 files.
+        source_file = os.path.join(self.eaxs_dir, "accounts.txt")
+        with open(source_file, "w", encoding="utf-8") as sf:
+            sf.write("# accounts\na/sampleEAXS.xml\n\nb/sampleEAXS.xml\n")
+        eaxs_files = BatchTagger.get_eaxs_files(source_file)
+
+        # check if result is as expected.
+        self.assertEqual(eaxs_files, [os.path.abspath(os.path.join(self.eaxs_dir, account,
+            "sampleEAXS.xml")) for account in ["a", "b"]])
+        with self.assertRaises(ValueError):
+            BatchTagger.get_tagged_paths(eaxs_files, self.eaxs_dir)
+
+
+# CLI.
+def main(manifest_file: "results manifest written by batch_tagger.py"):
+
+    "Prints the status and time of each EAXS file in a results manifest.\
+    \nexample: `python3 test__batch_tagger.py manifest.json`"
+
+    # print accounts.
+    with open(manifest_file, encoding="utf-8") as mf:
+        manifest = json.load(mf)
+    for account in manifest["accounts"]:
+        print(account["eaxs_file"], account["status"], account.get("seconds"))
+
+
+if __name__ == "__main__":
+    plac.call(main)
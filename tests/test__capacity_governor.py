@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import plac
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from tomes_tagger.lib.capacity_governor import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_CapacityGovernor(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.host = "http://localhost:-1"
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+
+    def test__threads(self):
+        """ Do no more than @capacity threads hold a slot at once and are waits counted? """
+
+        # hold a slot for 0.02 seconds in each of 6 threads.
+        governor = CapacityGovernor(self.host, 2, lock_dir=self.temp_dir.name)
+        lock = threading.Lock()
+        active = [0, 0]
+        def request():
+            with governor:
+                with lock:
+                    active[0] += 1
+                    active[1] = max(active)
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+        threads = [threading.Thread(target=request) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = governor.get_stats()
+
+        # check if result is as expected.
+        self.assertEqual(active[1], 2)
+        self.assertEqual([stats["requests"], stats["timeouts"]], [6, 0])
+        self.assertTrue(stats["waited"] >= 4)
+        self.assertTrue(stats["wait_seconds"] > 0)
+
+        # check that the running total outlasts a reset.
+        governor.reset_stats()
+        self.assertEqual(governor.get_stats()["wait_seconds"], 0)
+        self.assertAlmostEqual(governor.wait_seconds_total, stats["wait_seconds"], places=5)
+
+
+    def test__processes(self):
+        """ Does a slot held by another process time out requests until that process ends? """
+
+        # hold the only slot in another process until it reads a line.
+        code = ("import sys; sys.path.append('..')\n"
+                "from tomes_tagger.lib.capacity_governor import CapacityGovernor\n"
+                "governor = CapacityGovernor({!r}, 1, lock_dir={!r})\n"
+                "governor.acquire(); print('held', flush=True); sys.stdin.readline()\n"
+                ).format(self.host, self.temp_dir.name)
+        process = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE, universal_newlines=True)
+        process.stdout.readline()
+
+        # wait for the slot before and after the other process ends.
+        governor = CapacityGovernor(self.host, 1, lock_dir=self.temp_dir.name)
+        is_held = governor.acquire(timeout=0.1)
+        process.communicate("\n")
+        is_freed = governor.acquire(timeout=5)
+        governor.release()
+        stats = governor.get_stats()
+
+        # check if result is as expected.
+        self.assertEqual([is_held, is_freed], [False, True])
+        self.assertEqual([stats["requests"], stats["timeouts"]], [1, 1])
+        self.assertTrue(stats["max_wait_seconds"] >= 0.1)
+
+
+    def test__release(self):
+        """ Is releasing a slot that isn't held refused? """
+
+        governor = CapacityGovernor(self.host, 1, lock_dir=self.temp_dir.name)
+        with self.assertRaises(ValueError):
+            governor.release()
+
+
+# CLI.
+def main(host: ("CoreNLP server URL", "option")="http://localhost:9003",
+        capacity: ("maximum requests in flight", "option", None, int)=1,
+        seconds: ("seconds to hold a slot", "option", None, float)=10):
+
+    "Holds a CoreNLP request slot so other taggers on this host wait for it.\
+    \nexample: `python3 test__capacity_governor.py -seconds 30`"
+
+    # hold a slot.
+    governor = CapacityGovernor(host, capacity)
+    with governor:
+        print("Holding a slot in: {}".format(governor.lock_dir))
+        time.sleep(seconds)
+    print(governor.get_stats())
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import os
+import plac
+import tempfile
+import unittest
+from tomes_tagger.lib.content_cache import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_ContentCache(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+        self.cache_file = os.path.join(self.temp_dir.name, "cache.sqlite")
+
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+
+    def test__memory_lru(self):
+        """ Does the in-memory cache evict the least recently used item? """
+
+        # add three items to a two item cache after touching the first one.
+        cache = ContentCache(max_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        # check if result is as expected.
+        self.assertEqual([cache.get("a"), cache.get("b"), cache.get("c")], [1, None, 3])
+
+
+    def test__disk_persistence(self):
+        """ Can a second cache instance read what the first one wrote to disk? """
+
+        # write with one instance; read with another.
+        cache = ContentCache(self.cache_file)
+        key = cache.get_key("North Carolina", "options")
+        cache.set(key, [["North", "", " "], ["Carolina", "", ""]])
+        cache.close()
+        cache = ContentCache(self.cache_file)
+        value = cache.get(key)
+        stats = cache.get_stats()
+        cache.close()
+
+        # check if result is as expected.
+        self.assertEqual([value, stats["disk_hits"]],
+                [[["North", "", " "], ["Carolina", "", ""]], 1])
+
+
+    def test__disk_eviction(self):
+        """ Does the on-disk cache stay within its size limit? """
+
+        # write more than @max_bytes of data.
+        cache = ContentCache(self.cache_file, max_items=1, max_bytes=1000)
+        for i in range(20):
+            cache.set(str(i), "x" * 100)
+        disk_bytes = cache.db.execute("SELECT TOTAL(size) FROM cache").fetchone()[0]
+        cache.close()
+
+        # check if result is as expected.
+        self.assertTrue(disk_bytes <= 1000)
+
+
+# CLI.
+def main(cache_file: "SQLite cache file"):
+
+    "Prints the number of items and bytes in an on-disk cache.\
+    \nexample: `python3 test__content_cache.py cache/ner_cache.sqlite`"
+
+    # print cache size.
+    cache = ContentCache(cache_file)
+    print(cache.db.execute("SELECT COUNT(*), TOTAL(size) FROM cache").fetchone())
+    cache.close()
+
+
+if __name__ == "__main__":
+    plac.call(main)
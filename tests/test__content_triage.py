@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import base64
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.content_triage import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_ContentTriage(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.triage = ContentTriage()
+        self.sample_file = "../scripts/experiments/signatures/sample_email.txt"
+
+
+    def test__email_gets_ner(self):
+        """ Is a regular email routed to full NER tagging? """
+
+        # route sample email.
+        with open(self.sample_file, encoding="utf-8") as sf:
+            route, reason = self.triage.get_route(sf.read())
+
+        # check if result is as expected.
+        self.assertEqual(route, "ner")
+
+
+    def test__machine_text_gets_regex(self):
+        """ Are log dumps and CSV pastes routed to pattern-only tagging? """
+
+        # create log and CSV text.
+        log = "\n".join(["2017-01-10 12:00:{:02d} INFO worker[{}] request done".format(
+            i % 60, i) for i in range(100)])
+        csv = "\n".join(["{},Jane Doe,919-555-{:04d},Raleigh,NC".format(i, i) for i in
+            range(100)])
+
+        # check if result is as expected.
+        self.assertEqual([self.triage.get_route(log), self.triage.get_route(csv)],
+                [("regex", "log"), ("regex", "delimited")])
+
+
+    def test__encoded_gets_skipped(self):
+        """ Is Base64 that was mislabeled as text skipped? """
+
+        # route Base64 text.
+        blob = base64.encodebytes(bytes(range(256)) * 20).decode()
+        route, reason = self.triage.get_route(blob)
+
+        # check if result is as expected.
+        self.assertEqual(route, "skip")
+
+
+# CLI.
+def main(text_file: "plain text file"):
+
+    "Prints the route and features for a plain text message body.\
+    \nexample: `python3 test__content_triage.py \
+../scripts/experiments/signatures/sample_email.txt`"
+
+    # print route and features.
+    triage = ContentTriage()
+    with open(text_file, encoding="utf-8") as tf:
+        text = tf.read()
+    print(triage.get_route(text))
+    print(triage.get_features(text))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import plac
+import threading
+import time
+import unittest
+from tomes_tagger.lib.corenlp_standin import *
+from tomes_tagger.lib.deadline import Deadline
+from tomes_tagger.lib.text_to_nlp import TextToNLP
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_CoreNLPStandIn(unittest.TestCase):
+
+
+    def tearDown(self):
+
+        self.standin.stop()
+
+
+    def test__get_NER(self):
+        """ Does TextToNLP get the stand-in's NER and regexNER tags with the whitespace
+        intact? """
+
+        # tag text with NER and with regexNER only.
+        self.standin = CoreNLPStandIn()
+        self.standin.start()
+        text = "Jane Doe lives in Raleigh.\nEmail jane@nc.gov today!"
+        ner = TextToNLP(host=self.standin.url).get_NER(text)
+        regex = TextToNLP(host=self.standin.url, regex_only=True).get_NER(text)
+
+        # check if result is as expected.
+        self.assertEqual("".join([n[0] + n[2] for n in ner]), text)
+        self.assertEqual([n[1] for n in ner[:5]], ["::stanford.edu::PERSON"] * 2 +
+                ["", "", "::stanford.edu::LOCATION"])
+        self.assertEqual([n for n in regex if n[1] != ""], [("jane@nc.gov",
+            "2aa1a6#0002::nc.gov::TOMES.email_address", " ")])
+
+
+    def test__faults(self):
+        """ Do injected errors fail each retry and are hung requests cut off by a
+        deadline? """
+
+        # tag text with errors on every request.
+        self.standin = CoreNLPStandIn(error_rate=1)
+        self.standin.start()
+        errors = TextToNLP(host=self.standin.url).get_NER("Jane Doe")
+        error_stats = self.standin.get_stats()
+        self.standin.stop()
+
+        # tag text with a hang on every request.
+        self.standin = CoreNLPStandIn(hang_rate=1, hang_seconds=30)
+        self.standin.start()
+        deadline = Deadline(0.2)
+        deadline.start()
+        start_time = time.monotonic()
+        hangs = TextToNLP(host=self.standin.url, deadline=deadline).get_NER("Jane Doe")
+        seconds = time.monotonic() - start_time
+
+        # check if result is as expected.
+        self.assertEqual([errors, hangs], [[], []])
+        self.assertEqual(error_stats["errors"], error_stats["requests"])
+        self.assertTrue(seconds < 5)
+
+
+    def test__max_concurrency(self):
+        """ Are requests over the concurrency limit queued instead of run at once? """
+
+        # send 6 requests at once to a server that annotates 2 at a time.
+        self.standin = CoreNLPStandIn(latency=0.1, max_concurrency=2)
+        self.standin.start()
+        t2n = TextToNLP(host=self.standin.url)
+        threads = [threading.Thread(target=t2n.get_NER, args=("Jane Doe",)) for i in
+                range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = self.standin.get_stats()
+
+        # check if result is as expected.
+        self.assertEqual([stats["requests"], stats["peak_active"]], [6, 2])
+        self.assertTrue(stats["peak_waiting"] > 0)
+
+
+# CLI.
+def main(port: ("port to listen on", "option", None, int)=9003,
+        latency: ("median seconds per request", "option", None, float)=0.0,
+        latency_sigma: ("log-normal latency sigma", "option", None, float)=0.0,
+        error_rate: ("share of requests that fail", "option", None, float)=0.0,
+        hang_rate: ("share of requests that hang", "option", None, float)=0.0,
+        max_concurrency: ("requests annotated at once", "option", None, int)=None):
+
+    "Runs a CoreNLP stand-in server until stopped with Ctrl+C.\
+    \nexample: `python3 test__corenlp_standin.py -port 9003 -latency 0.2`"
+
+    # run the stand-in.
+    standin = CoreNLPStandIn(port=port, latency=latency, latency_sigma=latency_sigma,
+            error_rate=error_rate, hang_rate=hang_rate, max_concurrency=max_concurrency)
+    standin.start()
+    print("Serving at: {}".format(standin.url))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(standin.get_stats())
+        standin.stop()
+
+
+if __name__ == "__main__":
+    plac.call(main)
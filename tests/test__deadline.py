@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import plac
+import time
+import unittest
+from tomes_tagger.lib.deadline import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_Deadline(unittest.TestCase):
+
+
+    def test__stage(self):
+        """ Does an expired deadline report the stage that was running when it ran out? """
+
+        # run out of time during the second stage.
+        deadline = Deadline(0.05)
+        deadline.start()
+        deadline.check("decode")
+        deadline.check("html")
+        time.sleep(0.1)
+        try:
+            deadline.check("ner")
+            stage = None
+        except DeadlineExceeded as err:
+            stage = err.stage
+
+        # check if result is as expected.
+        self.assertEqual(stage, "html")
+
+
+    def test__stopped(self):
+        """ Does a stopped deadline never run out? """
+
+        # stop the deadline before it runs out.
+        deadline = Deadline(0)
+        deadline.start()
+        deadline.stop()
+        deadline.check("decode")
+
+        # check if result is as expected.
+        self.assertEqual([deadline.get_remaining(), deadline.is_expired()], [None, False])
+
+
+# CLI.
+def main(seconds: ("time budget in seconds", "positional", None, float)):
+
+    "Prints the seconds left in a time budget after starting it.\
+    \nexample: `python3 test__deadline.py 0.5`"
+
+    # start and check time budget.
+    deadline = Deadline(seconds)
+    deadline.start()
+    print(deadline.get_remaining())
+
+
+if __name__ == "__main__":
+    plac.call(main)
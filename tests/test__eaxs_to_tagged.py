@@ -2,14 +2,23 @@
 
 # import modules.
 import sys; sys.path.append("..")
+import base64
 import logging
 import os
 import plac
+import re
 import tempfile
+import time
 import unittest
 import warnings
 from lxml import etree
+from tomes_tagger.lib.content_triage import ContentTriage
+from tomes_tagger.lib.deadline import Deadline
 from tomes_tagger.lib.eaxs_to_tagged import *
+from tomes_tagger.lib.live_reporter import LiveReporter
+from tomes_tagger.lib.memory_probe import MemoryProbe
+from tomes_tagger.lib.nlp_to_xml import NLPToXML
+from tomes_tagger.lib.stage_timer import StageTimer
 
 # enable logging.
 logging.basicConfig(level=logging.DEBUG)
@@ -60,6 +69,368 @@ class Test_EAXSToTagged(unittest.TestCase):
         self.assertTrue(message_count == tagged_count) 
 
 
+    def test__reuse_quoted(self):
+        """ Are quoted replies already tagged in the same thread reused? """
+
+        # dry run functions; keep track of text sent to the NLP function.
+        def_html = lambda x: "HTML"
+        tagged_texts = []
+        def def_nlp(text):
+            tagged_texts.append(text)
+            return etree.Element("NLP")
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, reuse_quoted=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged("sample_files/sampleEAXS_thread.xml", tagged_path)
+        os.remove(tagged_path)
+
+        # check if each reply and quoted header was only tagged once.
+        quoted = [t for t in tagged_texts if "Are you free for lunch" in t]
+        self.assertEqual(len(quoted), 1)
+        self.assertEqual(len(tagged_texts), len(set(tagged_texts)))
+        self.assertEqual(results["quoted_replies"]["reused_segments"], 4)
+
+
+    def test__signatures(self):
+        """ Are signature blocks written as <BlockText> and not passed to the NLP function? """
+
+        # dry run functions; keep track of text sent to the NLP function.
+        def_html = lambda x: "HTML"
+        tagged_texts = []
+        def def_nlp(text):
+            tagged_texts.append(text)
+            return etree.Element("NLP")
+        def def_signature(text, sender):
+            if text.endswith("\nJohn\n"):
+                return (text[:-5], text[-5:])
+            return (text, "")
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, signature_finder=def_signature)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged("sample_files/sampleEAXS_thread.xml", tagged_path)
+        
+        # count <BlockText> elements in @tagged_path.
+        block_count = 0
+        for event, element in etree.iterparse(tagged_path, events=("end",)):
+            if element.tag == "{" + self.ncdcr_uri + "}TaggedContent":
+                block_count += element.text.count(">John\n</BlockText>")
+            element.clear()
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual(results["signatures"]["signatures"], 3)
+        self.assertEqual(block_count, 3)
+        self.assertFalse(any([t.endswith("\nJohn\n") for t in tagged_texts]))
+
+
+    def test__triage(self):
+        """ Are routed messages kept from the NLP function and reported? """
+
+        # dry run functions; route messages by their first word.
+        def_html = lambda x: "HTML"
+        def_nlp = lambda x: etree.Element("NLP")
+        def_regex = lambda x: etree.Element("REGEX")
+        def def_triage(text):
+            routes = {"Jane,": ("ner", "text"), "Yes,": ("regex", "log"), 
+                    "Noon": ("skip", "encoded")}
+            return routes[text.split()[0]]
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, content_triage=def_triage, 
+                regex_tagger=def_regex)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged("sample_files/sampleEAXS_thread.xml", tagged_path)
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual(results["triage"]["routes"], {"ner": 1, "regex": 1, "skip": 1})
+        self.assertEqual([(m["index"], m["route"]) for m in 
+            results["triage"]["diverted_messages"]], [(2, "regex"), (3, "skip")])
+
+
+    def test__triage_keeps_pii(self):
+        """ Is a numeric CSV body routed to pattern-only tagging with its PII tagged? """
+
+        # dry run functions; tag SSNs and phone numbers in comma-delimited text.
+        def_html = lambda x: "HTML"
+        def_nlp = lambda x: etree.Element("NLP")
+        patterns = {r"^\d{3}-\d{2}-\d{4}$": "2aa1a6#0245::nc.gov::PII.social_security_number",
+                r"^\d{3}-\d{3}-\d{4}$": "test::nc.gov::PII.phone_number"}
+        def def_regex(text):
+            ner = []
+            for match in re.finditer(r"([^,\s]+)([,\s]*)", text):
+                tags = [t for p, t in patterns.items() if re.match(p, match.group(1))]
+                ner.append((match.group(1), (tags + [""])[0], match.group(2)))
+            return NLPToXML().get_xml(ner)
+
+        # replace the first message's body with a numeric CSV paste.
+        csv = "\n".join(["Smith{0},123-45-{0:04d},919-555-{0:04d},27601".format(i) for i in 
+            range(1, 51)])
+        with open("sample_files/sampleEAXS_thread.xml", encoding="utf-8") as sf:
+            eaxs = sf.read().replace("Jane,\n\nAre you free for lunch on Friday?", csv, 1)
+        eaxs_handle, eaxs_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        with os.fdopen(eaxs_handle, "w", encoding="utf-8") as ef:
+            ef.write(eaxs)
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, content_triage=ContentTriage().get_route,
+                regex_tagger=def_regex)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged(eaxs_path, tagged_path)
+        message_el = next(etree.parse(tagged_path).iter("{" + self.ncdcr_uri + "}Message"))
+        tagged_el = etree.fromstring(next(message_el.iter("{" + self.ncdcr_uri + 
+            "}TaggedContent")).text)
+        entities = set([t.get("entity") for t in tagged_el.iter("{" + self.ncdcr_uri + 
+            "}Token")])
+        os.remove(eaxs_path)
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual(ContentTriage().get_route(csv)[0], "regex")
+        self.assertEqual(results["triage"]["diverted_messages"][0]["route"], "regex")
+        self.assertTrue(set(["PII.social_security_number", "PII.phone_number"]) <= entities)
+        self.assertEqual(message_el.get("Restricted"), "true")
+
+
+    def test__size_policy_defer(self):
+        """ Are oversized messages deferred, written last, and reported? """
+
+        # dry run functions.
+        def_html = lambda x: "HTML"
+        def_nlp = lambda x: etree.Element("NLP")
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, max_body_size=200, size_policy="defer")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged(self.sample_file, tagged_path)
+
+        # get the @SizePolicy attribute of each written <Message>.
+        size_policies = []
+        for event, element in etree.iterparse(tagged_path, events=("end",),
+                tag="{" + self.ncdcr_uri + "}Message"):
+            size_policies.append(element.get("SizePolicy"))
+            element.clear()
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual(size_policies, [None, None, "deferred"])
+        self.assertEqual([m["index"] for m in results["size_policies"]["deferred"]], [1])
+
+
+    def test__size_policy_head_tail(self):
+        """ Are only the head and tail of an oversized Base64 message decoded? """
+
+        # encode a long message.
+        text = "".join(["Line {} of a long message.\n".format(i) for i in range(1000)])
+        content = base64.encodebytes(text.encode("utf-8")).decode("utf-8")
+
+        # get the decoded head and tail.
+        e2t = EAXSToTagged(None, None, max_body_size=1000, head_tail_size=301)
+        head, tail = e2t._get_head_tail(content, "base64")
+        head, tail = [e2t._decode_content(x, "base64")[0] for x in (head, tail)]
+
+        # check if result is as expected.
+        self.assertTrue(text.startswith(head) and text.endswith(tail))
+        self.assertTrue(len(head + tail) < 600)
+
+
+    def test__deadline(self):
+        """ Is a message that runs out of time left untagged and reported? """
+
+        # dry run functions; make tagging the first message too slow.
+        calls = []
+        def_html = lambda x: "HTML"
+        def def_nlp(text):
+            calls.append(text)
+            if len(calls) == 1:
+                time.sleep(0.2)
+            return etree.Element("NLP")
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, deadline=Deadline(0.1))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged(self.sample_file, tagged_path)
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual(results["untagged_messages"], [1])
+        self.assertEqual([(m["index"], m["stage"]) for m in results["deadline_hits"]], 
+                [(1, "ner")])
+
+
+    def test__deadline_after_xml(self):
+        """ Is a message whose time budget runs out after the last check still tagged? """
+
+        # create a time budget that runs out once the "xml" stage starts.
+        class XMLDeadline(Deadline):
+            def check(self, stage):
+                super().check(stage)
+                if stage == "xml":
+                    self.expires = time.monotonic()
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(lambda x: "HTML", lambda x: etree.Element("NLP"), 
+                deadline=XMLDeadline(60))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged(self.sample_file, tagged_path)
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual([results["untagged_messages"], results["deadline_hits"]], [[], []])
+
+
+    def test__stage_timing(self):
+        """ Are stages and messages timed and reported? """
+
+        # dry run functions.
+        def_html = lambda x: "HTML"
+        def_nlp = lambda x: etree.Element("NLP")
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, stage_timer=StageTimer())
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged(self.sample_file, tagged_path)
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        stages = results["stage_timing"]["stages"]
+        self.assertEqual({stage: stages[stage]["count"] for stage in ["message_data", 
+            "decode", "ner", "xml", "write", "message"]}, {"message_data": 3, "decode": 3, 
+            "ner": 3, "xml": 3, "write": 3, "message": 3})
+        self.assertEqual(sum([value["messages"] for value in 
+            results["stage_timing"]["content_types"].values()]), 3)
+
+
+    def test__reporter(self):
+        """ Is progress reported when tagging starts and when it's done? """
+
+        # dry run functions.
+        def_html = lambda x: "HTML"
+        def_nlp = lambda x: etree.Element("NLP")
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        snapshots = []
+        e2t = EAXSToTagged(def_html, def_nlp)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            e2t.write_tagged(self.sample_file, tagged_path, 
+                    reporter=LiveReporter([snapshots.append], interval=0))
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        self.assertEqual([(s["status"], s["processed_messages"], s["total_messages"]) for s 
+            in snapshots], [("started", 0, 3), ("done", 3, 3)])
+        self.assertTrue(snapshots[-1]["bytes_per_second"] > 0)
+
+
+    def test__reporter_failed(self):
+        """ Is a failed run reported as such when writing the tagged EAXS fails? """
+
+        # dry run functions.
+        def_html = lambda x: "HTML"
+        def_nlp = lambda x: etree.Element("NLP")
+
+        # make writing fail.
+        def write_xml(*args, **kwargs):
+            raise IOError("Disk full.")
+
+        # try to make tagged EAXS.
+        snapshots = []
+        e2t = EAXSToTagged(def_html, def_nlp)
+        e2t._write_xml = write_xml
+        with self.assertRaises(IOError):
+            e2t.write_tagged(self.sample_file, "unwritten.xml",
+                    reporter=LiveReporter([snapshots.append], interval=0))
+
+        # check if result is as expected.
+        self.assertEqual([s["status"] for s in snapshots], ["started", "failed"])
+        self.assertIsNone(e2t.reporter)
+
+
+    def test__memory_probe(self):
+        """ Are the heaviest messages reported by their <MessageId> and body size? """
+
+        # dry run functions; the second message keeps 20 MB.
+        kept = []
+        def def_nlp(text):
+            kept.append(b"x" * (20000000 if len(kept) == 1 else 10))
+            return etree.Element("NLP")
+        def_html = lambda x: "HTML"
+
+        # make temporary file, save the filename, then delete the file.
+        tagged_handle, tagged_path = tempfile.mkstemp(dir=".", suffix=".xml")
+        os.close(tagged_handle)
+        os.remove(tagged_path)
+
+        # make tagged EAXS and suppress ResourceWarning in unittest.
+        e2t = EAXSToTagged(def_html, def_nlp, memory_probe=MemoryProbe())
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = e2t.write_tagged(self.sample_file, tagged_path)
+        os.remove(tagged_path)
+
+        # check if result is as expected.
+        heaviest = results["memory"]["heaviest_messages"]
+        self.assertEqual([message["index"] for message in heaviest[:1]], [2])
+        self.assertTrue(heaviest[0]["message_id"] != "" and heaviest[0]["characters"] > 0)
+        self.assertEqual(len(heaviest), 3)
+
+
 # CLI.
 def main(eaxs_file: "source EAXS file", tagged_file: "tagged EAXS destination"):
     
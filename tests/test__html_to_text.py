@@ -3,7 +3,10 @@
 # import modules.
 import sys; sys.path.append("..")
 import logging
+import os
 import plac
+import stat
+import tempfile
 import unittest
 from tomes_tagger.lib.html_to_text import *
 
@@ -54,6 +57,53 @@ class Test_HTMLToText(unittest.TestCase):
         self.assertEqual(html, expected)
 
     
+    def test__modify_lxml(self):
+        """ Does one lxml traversal shift links and remove images like BeautifulSoup? """
+
+        # add image tag to sample text.
+        html = self.sample.format("Hello World!<img src='hw.jpg' alt='Hello World!'>")
+
+        # modify HTML with each parser.
+        raws = []
+        for parser in ["html5lib", "lxml.html"]:
+            modified = ModifyHTML(html, parser)
+            modified.modify(preserve_alt=True)
+            raws.append(modified.raw().replace("<head></head>", ""))
+        
+        # check if result is as expected; the <a> tag has two children, so it's not shifted.
+        expected = self.sample.format("Hello World!<span>[IMAGE: Hello World!]</span>")
+        expected = expected.replace("<head></head>", "")
+        self.assertEqual(raws, [expected, expected])
+
+
+    def test__modify_lxml_skips_dom(self):
+        """ Is HTML without links or images returned as is, without parsing it? """
+
+        # modify HTML without links or images.
+        html = "<html><body><p>Hello <b>World!</b></p></body></html>"
+        modified = ModifyHTML(html, "lxml.html")
+        modified.modify()
+        
+        # check if result is as expected.
+        self.assertEqual([modified.root, modified.raw()], [None, html])
+
+
+    def test__strip_html(self):
+        """ Are styles, scripts, comments, and data URIs removed and counted? """
+
+        # strip payloads from sample text.
+        payloads = ("<style>a {color: red}</style>Hello<!--[if mso]>World<![endif]-->"
+                "<script>x = 1;</script> World!<img src='data:image/png;base64,iVBORw0K=='>")
+        strip = StripHTML()
+        html = strip.strip(self.sample.format(payloads))
+        stats = strip.get_stats()
+
+        # check if result is as expected.
+        self.assertEqual(html, self.sample.format("Hello World!<img src='data:,'>"))
+        self.assertEqual([stats["style"], stats["comment"], stats["script"], 
+            stats["data_uri"]], [29, 30, 23, 27])
+
+
     def test__html_to_text(self):
         """ Does HTML to text conversion work? """
         
@@ -80,6 +130,92 @@ class Test_HTMLToText(unittest.TestCase):
         self.assertEqual([empty_01, empty_02], ["", ""])
 
 
+    def test__stdin_fallback(self):
+        """ Does a failed pipe to Lynx fall back to a temporary file and is piping only
+        disabled after failures in a row? """
+
+        # make a fake Lynx that can't pipe "ODD" documents but can "dump" files.
+        temp_dir = tempfile.TemporaryDirectory(dir=".")
+        lynx = os.path.join(temp_dir.name, "lynx")
+        with open(lynx, "w") as fake:
+            fake.write("#!/usr/bin/env python3\nimport sys\n"
+                    "text = sys.stdin.read() if '-stdin' in sys.argv else "
+                    "open(sys.argv[-1]).read()\n"
+                    "sys.exit(1) if '-stdin' in sys.argv and 'ODD' in text else print(text)")
+        os.chmod(lynx, os.stat(lynx).st_mode | stat.S_IEXEC)
+
+        # convert HTML with the fake Lynx; odd documents alternate, then come in a row.
+        h2t = HTMLToText(lynx, max_stdin_failures=2)
+        plain = [h2t.get_text(html, is_raw=True).strip() for html in ["ODD 1", "2", 
+            "ODD 3"]]
+        use_stdin = [h2t.use_stdin]
+        plain.append(h2t.get_text("ODD 4", is_raw=True).strip())
+        use_stdin.append(h2t.use_stdin)
+        temp_dir.cleanup()
+
+        # check if result is as expected.
+        self.assertEqual(plain, ["ODD 1", "2", "ODD 3", "ODD 4"])
+        self.assertEqual(use_stdin, [True, False])
+
+
+    def test__get_texts(self):
+        """ Does concurrent conversion keep the order and isolate failed documents? """
+
+        # make a fake Lynx that echoes standard input and fails on "FAIL".
+        temp_dir = tempfile.TemporaryDirectory(dir=".")
+        lynx = os.path.join(temp_dir.name, "lynx")
+        with open(lynx, "w") as fake:
+            fake.write("#!/usr/bin/env python3\nimport sys\n"
+                    "text = sys.stdin.read() if '-stdin' in sys.argv else "
+                    "open(sys.argv[-1]).read()\nsys.exit(1) if 'FAIL' in text else print(text)")
+        os.chmod(lynx, os.stat(lynx).st_mode | stat.S_IEXEC)
+
+        # convert HTML with the fake Lynx.
+        h2t = HTMLToText(lynx)
+        html_docs = [str(i) for i in range(10)] + ["FAIL", "10"]
+        plain = [text.strip() for text in h2t.get_texts(html_docs, workers=3)]
+        temp_dir.cleanup()
+
+        # check if result is as expected.
+        self.assertEqual(plain, [str(i) for i in range(10)] + ["", "10"])
+
+
+    def test__lxml_lists(self):
+        """ Does the lxml converter lay out nested lists like Lynx? """
+
+        # convert lists.
+        plain = LXMLToText().get_text("sample_files/testLists.html", is_raw=False)
+        
+        # check if result is as expected.
+        expected = ("\nThis is a test of nested HTML lists.\n\nUnordered List:\n\n  * foo\n"
+                "       + foo_1\n  * bar\n  * baz\n\nOrdered List:\n\n 1. foo\n 2. bar\n"
+                "      1. bar_1\n 3. bar\n")
+        self.assertEqual(plain, expected)
+
+
+    def test__lxml_table(self):
+        """ Does the lxml converter keep each table row's cells together, in order? """
+
+        # convert table.
+        plain = LXMLToText().get_text("sample_files/testTable.html", is_raw=False)
+        lines = plain.split("\n")
+        
+        # check if result is as expected.
+        self.assertTrue("Earth 5.97 12,756 5514 9.8 24.0 149.6 15 1 Our world" in lines)
+        self.assertTrue("Planets data" in lines and "margin" not in plain)
+
+
+    def test__lxml_bad_data_gets_empty(self):
+        """ Does the lxml converter return an empty string for bad or empty data? """
+        
+        # try to convert an int, an empty string, and a non-existant file.
+        l2t = LXMLToText()
+        empties = [l2t.get_text(1), l2t.get_text(""), l2t.get_text("fake.html", False)]
+        
+        # check if result is as expected.
+        self.assertEqual(empties, ["", "", ""])
+
+
 # CLI.
 def main(html_file: "HTML file"):
     
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import os
+import plac
+import tempfile
+import time
+import unittest
+from tomes_tagger.lib.live_reporter import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_LiveReporter(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+        self.status_file = os.path.join(self.temp_dir.name, "status.json")
+
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+
+    def test__interval(self):
+        """ Does an interval of 0 only report the start and end of a run, even if a callback
+        fails? """
+
+        # report on a run with a failing callback.
+        snapshots = []
+        def fail(snapshot):
+            raise ValueError("Callback failed.")
+        reporter = LiveReporter([fail, snapshots.append], interval=0)
+        reporter.start("eaxs.xml", 3)
+        for is_tagged in [True, False, True]:
+            reporter.update(is_tagged, 100)
+        reporter.stop()
+
+        # check if result is as expected.
+        self.assertEqual([(s["status"], s["processed_messages"], s["untagged_messages"]) for
+            s in snapshots], [("started", 0, 0), ("done", 3, 1)])
+
+
+    def test__status_file(self):
+        """ Is the latest snapshot written to the status file without leftover files? """
+
+        # report on a run with a short interval.
+        reporter = LiveReporter([JSONStatusFile(self.status_file)], interval=0.01)
+        reporter.start("eaxs.xml", 2)
+        time.sleep(0.02)
+        reporter.add_latency(0.5)
+        reporter.update(True, 100)
+        with open(self.status_file, encoding="utf-8") as sf:
+            snapshot = json.load(sf)
+
+        # check if result is as expected.
+        self.assertEqual([snapshot["status"], snapshot["processed_messages"], 
+            snapshot["corenlp_mean_ms"]], ["running", 1, 500.0])
+        self.assertTrue(snapshot["eta_seconds"] > 0)
+        self.assertEqual(os.listdir(self.temp_dir.name), ["status.json"])
+
+
+# CLI.
+def main(status_file: "JSON status file written by tagger.py"):
+
+    "Prints the progress in a JSON status file.\
+    \nexample: `python3 test__live_reporter.py status.json`"
+
+    # print progress.
+    with open(status_file, encoding="utf-8") as sf:
+        snapshot = json.load(sf)
+    print("{processed_messages} of {total_messages} messages; ETA: {eta_seconds}".format(
+        **snapshot))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.memory_probe import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_MemoryProbe(unittest.TestCase):
+
+
+    def test__heaviest(self):
+        """ Is the message that kept the most memory reported first, with its allocator? """
+
+        # measure 3 messages; the second one keeps 20 MB.
+        probe = MemoryProbe(top_messages=2)
+        kept = []
+        probe.start()
+        for index, size in [(1, 1000), (2, 20000000), (3, 1000)]:
+            probe.start_message()
+            kept.append(b"x" * size)
+            probe.stop_message({"index": index, "message_id": str(index)}, size)
+        results = probe.stop()
+        heaviest = results["heaviest_messages"]
+
+        # check if result is as expected.
+        self.assertEqual(len(heaviest), 2)
+        self.assertEqual([heaviest[0]["message_id"], heaviest[0]["characters"]],
+                ["2", 20000000])
+        self.assertTrue(heaviest[0]["traced_delta"] >= 20000000)
+        self.assertTrue(__file__ in heaviest[0]["allocators"][0]["location"])
+        self.assertTrue(__file__ in results["run"]["retained_allocators"][0]["location"])
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+    def test__rss_only(self):
+        """ Are allocators skipped when tracing is off? """
+
+        probe = MemoryProbe(trace=False)
+        probe.start()
+        probe.start_message()
+        probe.stop_message({"index": 1, "message_id": "1"})
+        results = probe.stop()
+
+        # check if result is as expected.
+        self.assertEqual(results["heaviest_messages"][0]["allocators"], [])
+        self.assertIsNone(results["heaviest_messages"][0]["traced_peak"])
+
+
+# CLI.
+def main(size: ("bytes to allocate", "option", None, int)=10000000):
+
+    "Prints the memory probe report for one message that allocates @size bytes.\
+    \nexample: `python3 test__memory_probe.py -size 1000000`"
+
+    # print the report.
+    probe = MemoryProbe()
+    probe.start()
+    probe.start_message()
+    kept = b"x" * size
+    probe.stop_message({"index": 1, "message_id": "1"}, size)
+    print(json.dumps(probe.stop(), indent=2))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import os
+import plac
+import pstats
+import tempfile
+import time
+import unittest
+from tomes_tagger.lib.message_profiler import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_MessageProfiler(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+        self.profile_prefix = os.path.join(self.temp_dir.name, "profile")
+
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+
+    def test__stages(self):
+        """ Are only the first messages profiled and are frames labeled by stage? """
+
+        # tag 3 messages; only profile the first 2.
+        profiler = MessageProfiler(max_messages=2, interval=0.001)
+        for i in range(3):
+            profiler.start_message()
+            with profiler.time("ner"):
+                with profiler.time("ner.nlp_to_xml"):
+                    json.dumps(list(range(1000)))
+                    time.sleep(0.02)
+            profiler.stop_message()
+        written = profiler.write_profile(self.profile_prefix)
+
+        # read the profiles.
+        ner_stats = pstats.Stats(self.profile_prefix + ".ner.nlp_to_xml.pstats").stats
+        with open(self.profile_prefix + ".collapsed", encoding="utf-8") as pf:
+            stacks = [line.rsplit(" ", 1) for line in pf.read().splitlines()]
+
+        # check if result is as expected.
+        self.assertEqual([profiler.profiled_messages, profiler.stages["ner"]["count"]],
+                [2, 3])
+        self.assertTrue(all([os.path.isfile(path) for path in written]))
+        self.assertTrue(any(["dumps" in key[2] for key in ner_stats]))
+        self.assertTrue(len(stacks) > 0)
+        self.assertTrue(all([stack.startswith("[message];[ner];[ner.nlp_to_xml];") for
+            stack, count in stacks]))
+
+
+    def test__sample_rate(self):
+        """ Is nothing profiled if the sample rate is 0? """
+
+        profiler = MessageProfiler(sample_rate=0)
+        profiler.start_message()
+        with profiler.time("html"):
+            pass
+        profiler.stop_message()
+        written = profiler.write_profile(self.profile_prefix)
+
+        # check if result is as expected.
+        self.assertEqual(profiler.profiled_messages, 0)
+        self.assertEqual(written, [self.profile_prefix + ".collapsed"])
+
+
+# CLI.
+def main(pstats_file: "pstats file written by tagger.py",
+        top: ("number of functions to print", "option", None, int)=20):
+
+    "Prints the functions with the highest cumulative time in a profile.\
+    \nexample: `python3 test__message_profiler.py profile.ner.pstats`"
+
+    # print functions.
+    stats = pstats.Stats(pstats_file)
+    stats.sort_stats("cumulative").print_stats(top)
+
+
+if __name__ == "__main__":
+    plac.call(main)
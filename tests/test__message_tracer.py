@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import os
+import plac
+import tempfile
+import time
+import unittest
+from tomes_tagger.lib.message_tracer import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_MessageTracer(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+        self.trace_file = os.path.join(self.temp_dir.name, "trace.jsonl")
+
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+
+    def test__records(self):
+        """ Is one record written per message with its spans and CoreNLP counts? """
+
+        # trace 2 messages.
+        tracer = MessageTracer(self.trace_file)
+        for index in [1, 2]:
+            tracer.start_message()
+            tracer.annotate(index=index, message_id=str(index))
+            tracer.set_message("text/plain", 100 * index)
+            with tracer.time("ner"):
+                with tracer.time("ner.corenlp"):
+                    time.sleep(0.01)
+                    tracer.add_request(0.01, is_error=index == 2)
+                    tracer.add_chunks(1, index - 1)
+            tracer.annotate(outcome="tagged")
+            tracer.stop_message()
+        results = tracer.close()
+
+        # read the records.
+        with open(self.trace_file, encoding="utf-8") as tf:
+            records = [json.loads(line) for line in tf]
+
+        # check if result is as expected.
+        self.assertEqual(results["records"], 2)
+        self.assertEqual([r["message_id"] for r in records], ["1", "2"])
+        self.assertEqual([r["characters"] for r in records], [100, 200])
+        self.assertEqual([s["stage"] for s in records[0]["spans"]], ["ner.corenlp", "ner"])
+        self.assertTrue(records[0]["spans"][0]["duration_ms"] >= 10)
+        self.assertTrue(records[0]["duration_ms"] >= records[0]["spans"][1]["duration_ms"])
+        self.assertEqual(records[1]["corenlp"], {"requests": 1, "errors": 1, "chunks": 1,
+                "retries": 1, "seconds": 0.01})
+        self.assertTrue(all([r["run_id"] == results["run_id"] for r in records]))
+
+
+    def test__append(self):
+        """ Are records from a later run appended with a new run identifier? """
+
+        # trace one message in each of 2 runs.
+        tracer = MessageTracer(self.trace_file)
+        run_ids = []
+        for i in range(2):
+            tracer.reset()
+            tracer.start_message()
+            tracer.stop_message()
+            run_ids.append(tracer.close()["run_id"])
+
+        # read the records.
+        with open(self.trace_file, encoding="utf-8") as tf:
+            records = [json.loads(line) for line in tf]
+
+        # check if result is as expected.
+        self.assertEqual([r["run_id"] for r in records], run_ids)
+        self.assertNotEqual(run_ids[0], run_ids[1])
+
+
+# CLI.
+def main(trace_file: "JSONL trace file written by tagger.py",
+        top: ("number of messages to print", "option", None, int)=10):
+
+    "Prints the slowest messages in a trace file.\
+    \nexample: `python3 test__message_tracer.py trace.jsonl`"
+
+    # print the slowest messages.
+    with open(trace_file, encoding="utf-8") as tf:
+        records = [json.loads(line) for line in tf]
+    records.sort(key=lambda x: x["duration_ms"], reverse=True)
+    for record in records[:top]:
+        print(record.get("message_id"), record["duration_ms"], record.get("outcome"),
+                [(s["stage"], s["duration_ms"]) for s in record["spans"]])
+
+
+if __name__ == "__main__":
+    plac.call(main)
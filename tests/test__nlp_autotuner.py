@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.corenlp_standin import CoreNLPStandIn
+from tomes_tagger.lib.nlp_autotuner import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_NLPAutotuner(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.standin = CoreNLPStandIn(latency=0.05, max_concurrency=2)
+        self.standin.start()
+        self.texts = ["Jane Doe lives in Raleigh. " * 8] * 2
+
+
+    def tearDown(self):
+
+        self.standin.stop()
+
+
+    def test__knee(self):
+        """ Does throughput level off at the stand-in's concurrency limit? """
+
+        # tune against a server that annotates 2 requests at a time; split each text
+        # into 4 chunks.
+        tuner = NLPAutotuner(self.standin.url, chunk_sizes=[60],
+                concurrency=[1, 2, 4, 8], min_gain=0.5)
+        results = tuner.tune(self.texts)
+
+        # check if result is as expected.
+        self.assertEqual(results["recommended"]["workers"], 2)
+        self.assertEqual([p["concurrency"] for p in results["probes"]], [1, 2, 4])
+        self.assertEqual([p["requests"] for p in results["probes"]], [8, 8, 8])
+
+
+    def test__short_texts(self):
+        """ Is 1 worker recommended when no text is longer than the chunk size? """
+
+        # tune with texts that fit in one chunk.
+        tuner = NLPAutotuner(self.standin.url, chunk_sizes=[50000],
+                concurrency=[1, 2, 4], min_gain=0.5)
+        results = tuner.tune(self.texts)
+
+        # check if result is as expected.
+        self.assertEqual(results["recommended"]["workers"], 1)
+
+
+    def test__errors(self):
+        """ Is nothing recommended if every request fails? """
+
+        # tune against a server that always fails.
+        self.standin.error_rate = 1
+        tuner = NLPAutotuner(self.standin.url, chunk_sizes=[50000], concurrency=[1, 2])
+        results = tuner.tune(self.texts[:2])
+
+        # check if result is as expected.
+        self.assertIsNone(results["recommended"])
+        self.assertEqual(len(results["probes"]), 1)
+        with self.assertRaises(ValueError):
+            tuner.write_config("nlp_config.json", results)
+
+
+# CLI.
+def main(host="http://localhost:9003", text="Jane Doe lives in Raleigh."):
+
+    "Prints the recommended CoreNLP config for 10 texts made of @text repeated 1000 times.\
+    \nexample: `python3 test__nlp_autotuner.py http://localhost:9003`"
+
+    # print the recommended config.
+    tuner = NLPAutotuner(host)
+    results = tuner.tune([" ".join([text] * 1000)] * 10)
+    print(json.dumps(results["recommended"], indent=2))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import os
+import plac
+import tempfile
+import unittest
+from tomes_tagger.lib.prometheus_textfile import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_PrometheusTextfile(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.temp_dir = tempfile.TemporaryDirectory(dir=".")
+        self.prom_file = os.path.join(self.temp_dir.name, "tagger.prom")
+
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+
+    def test__histogram(self):
+        """ Are histogram buckets written cumulatively with labels? """
+
+        # observe three requests.
+        metrics = PrometheusTextfile(self.prom_file)
+        metrics.add_histogram("corenlp_request_seconds", "CoreNLP request latency.", 
+                [0.1, 1])
+        for seconds in [0.05, 0.5, 5]:
+            metrics.observe("corenlp_request_seconds", seconds, mode="ner")
+        metrics.write()
+        with open(self.prom_file, encoding="utf-8") as pf:
+            lines = [line for line in pf.read().splitlines() if line.startswith(
+                "tomes_tagger_corenlp_request_seconds")]
+
+        # check if result is as expected.
+        self.assertEqual(lines, [
+            'tomes_tagger_corenlp_request_seconds_bucket{mode="ner",le="0.1"} 1',
+            'tomes_tagger_corenlp_request_seconds_bucket{mode="ner",le="1"} 2',
+            'tomes_tagger_corenlp_request_seconds_bucket{mode="ner",le="+Inf"} 3',
+            'tomes_tagger_corenlp_request_seconds_sum{mode="ner"} 5.55',
+            'tomes_tagger_corenlp_request_seconds_count{mode="ner"} 3'])
+
+
+    def test__snapshots(self):
+        """ Do message counters keep growing across runs? """
+
+        # pass two runs' worth of progress snapshots.
+        metrics = PrometheusTextfile(self.prom_file)
+        for i in range(2):
+            for status, processed, untagged in [("started", 0, 0), ("running", 2, 1), 
+                    ("done", 3, 1)]:
+                metrics({"status": status, "total_messages": 3, "bytes_read": processed * 10,
+                    "processed_messages": processed, "untagged_messages": untagged})
+        rendered = metrics.render()
+
+        # check if result is as expected.
+        for line in ["tomes_tagger_messages_tagged_total 4", 
+                "tomes_tagger_messages_untagged_total 2", "tomes_tagger_bytes_read_total 60",
+                'tomes_tagger_queue_depth{queue="messages"} 0']:
+            self.assertIn(line + "\n", rendered)
+
+
+# CLI.
+def main(prom_file: "Prometheus textfile written by tagger.py"):
+
+    "Prints the samples in a Prometheus textfile without comments.\
+    \nexample: `python3 test__prometheus_textfile.py tagger.prom`"
+
+    # print samples.
+    with open(prom_file, encoding="utf-8") as pf:
+        for line in pf:
+            if not line.startswith("#"):
+                print(line.strip())
+
+
+if __name__ == "__main__":
+    plac.call(main)
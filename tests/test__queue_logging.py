@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import plac
+import threading
+import time
+import unittest
+from tomes_tagger.lib.queue_logging import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class _ListHandler(logging.Handler):
+    """ A handler that keeps each record and the thread that handled it. """
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.handled = []
+
+    def emit(self, record):
+        self.handled.append((self.format(record), threading.get_ident()))
+
+
+class Test_QueueLogging(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.logger = logging.getLogger("test__queue_logging")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.handler = _ListHandler(logging.INFO)
+        self.logger.addHandler(self.handler)
+
+
+    def tearDown(self):
+
+        self.logger.removeHandler(self.handler)
+
+
+    def test__queue_logging(self):
+        """ Are records handled on another thread at the handler's level and are handlers
+        restored? """
+
+        # log while the handlers are on a background thread.
+        queue_logging = QueueLogging([self.logger.name])
+        queue_logging.start()
+        self.logger.debug("Tagging message with id: %s", "<1@nc.gov>")
+        self.logger.info("Processed %d of %d messages.", 1, 2)
+        queue_logging.stop()
+
+        # check if result is as expected.
+        self.assertEqual([message for message, thread in self.handler.handled],
+                ["Processed 1 of 2 messages."])
+        self.assertNotEqual(self.handler.handled[0][1], threading.get_ident())
+        self.assertEqual(self.logger.handlers, [self.handler])
+
+
+# CLI.
+def main(messages: ("number of log records to time", "option", None, int)=100000):
+
+    "Prints the seconds spent logging @messages records to a file with and without a queue.\
+    \nexample: `python3 test__queue_logging.py -messages 10000`"
+
+    # log to a file in the calling thread, then from a queue.
+    logger = logging.getLogger("test__queue_logging")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.FileHandler("test__queue_logging.log", delay=True))
+    for label in ["direct", "queued"]:
+        queue_logging = QueueLogging([logger.name])
+        if label == "queued":
+            queue_logging.start()
+        start_time = time.perf_counter()
+        for i in range(messages):
+            logger.info("Processed %d of %d messages.", i, messages)
+        print(label, round(time.perf_counter() - start_time, 3))
+        queue_logging.stop()
+
+
+if __name__ == "__main__":
+    plac.call(main)
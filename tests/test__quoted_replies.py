@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.quoted_replies import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_QuotedReplies(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.qr = QuotedReplies()
+        self.sample_file = "../scripts/experiments/signatures/sample_email.txt"
+
+
+    def test__split(self):
+        """ Is the sample email split into three replies that rejoin to the original? """
+
+        # split sample email.
+        with open(self.sample_file, encoding="utf-8") as sf:
+            text = sf.read()
+        segments = self.qr.split(text)
+
+        # check if result is as expected.
+        self.assertEqual(len(segments), 3)
+        self.assertEqual("".join(segments), text)
+        self.assertTrue(segments[1].startswith("-----Original Message-----\n"))
+
+
+    def test__split_header(self):
+        """ Is a quoted reply's header block split from its body? """
+
+        # split the first quoted reply in the sample email.
+        with open(self.sample_file, encoding="utf-8") as sf:
+            segment = self.qr.split(sf.read())[1]
+        header, body = self.qr.split_header(segment)
+
+        # check if result is as expected.
+        self.assertEqual(header + body, segment)
+        self.assertTrue(header.startswith("-----Original Message-----\nFrom: "))
+        self.assertFalse(header.strip().endswith("-----"))
+        self.assertTrue(body.startswith("\n"))
+
+
+    def test__thread_id(self):
+        """ Do replies share the thread identifier of the first message? """
+
+        # get thread identifiers; the third message only knows its parent.
+        thread_ids = [self.qr.get_thread_id("<1@x>"),
+                self.qr.get_thread_id("<2@x>", ["<1@x>"], ["<1@x>"]),
+                self.qr.get_thread_id("<3@x>", ["<2@x>"], [])]
+
+        # check if result is as expected.
+        self.assertEqual(thread_ids, ["<1@x>"] * 3)
+
+
+# CLI.
+def main(text_file: "plain text email file"):
+
+    "Prints the replies found in a plain text email.\
+    \nexample: `python3 test__quoted_replies.py \
+../scripts/experiments/signatures/sample_email.txt`"
+
+    # print replies.
+    with open(text_file, encoding="utf-8") as tf:
+        segments = QuotedReplies().split(tf.read())
+    print(json.dumps(segments, indent=2))
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.run_estimator import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_RunEstimator(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # add 90 small plain text messages and 10 larger HTML messages.
+        self.estimator = RunEstimator(sample_size=10)
+        for index in range(1, 101):
+            if index % 10 == 0:
+                self.estimator.add_message(index, "text/html", 5000)
+            else:
+                self.estimator.add_message(index, "text/plain", 500)
+
+
+    def test__sample(self):
+        """ Is each stratum sampled in proportion to its size? """
+
+        sample = self.estimator.get_sample()
+        html = [index for index in sample if index % 10 == 0]
+
+        # check if result is as expected.
+        self.assertEqual([len(sample), len(html)], [10, 1])
+        self.assertEqual(sample, sorted(set(sample)))
+
+
+    def test__estimate(self):
+        """ Are CoreNLP calls and output size weighted up to the whole file? """
+
+        # time the sample; HTML messages spend 10 times longer in CoreNLP.
+        for index in self.estimator.get_sample():
+            content_type, characters = (("text/html", 5000) if index % 10 == 0 else
+                    ("text/plain", 500))
+            self.estimator.start_message()
+            self.estimator.set_message(content_type, characters)
+            self.estimator.add("ner.corenlp", 0.1 if content_type == "text/html" else 0.01)
+            self.estimator.stop_message()
+        estimate = self.estimator.get_estimate(scan_seconds=1, output_bytes=19000)
+
+        # check if result is as expected.
+        self.assertEqual([estimate["total_messages"], estimate["sampled_messages"]],
+                [100, 10])
+        self.assertEqual(estimate["estimated_corenlp"]["calls"], 100)
+        self.assertAlmostEqual(estimate["estimated_corenlp"]["busy_seconds"], 1.9)
+        self.assertAlmostEqual(estimate["estimated_stage_seconds"]["ner.corenlp"], 1.9)
+        self.assertEqual(estimate["estimated_output_bytes"], 190000)
+        self.assertTrue(estimate["estimated_seconds"] >= 1)
+
+
+# CLI.
+def main(estimate_file: "estimate written by tagger.py"):
+
+    "Prints the estimated stage times in an estimate from slowest to fastest.\
+    \nexample: `python3 test__run_estimator.py estimate.json`"
+
+    # print stages.
+    with open(estimate_file, encoding="utf-8") as ef:
+        stages = json.load(ef)["estimated_stage_seconds"]
+    for stage in sorted(stages, key=lambda x: stages[x], reverse=True):
+        print(stage, stages[stage])
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.signatures import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_SignatureFinder(unittest.TestCase):
+
+
+    def setUp(self):
+
+        # set attributes.
+        self.sf = SignatureFinder()
+        self.sender = '"John Doe" <john_doe@fake.nc.gov>'
+
+
+    def test__sender_signature(self):
+        """ Is a block starting with the sender's name found as a signature? """
+
+        # split reply.
+        text = "Jane,\n\nSee you at noon.\n\nJohn Doe\nDirector\n(919) 555-5555\n\n"
+        body, signature = self.sf.get_signature(text, self.sender)
+
+        # check if result is as expected.
+        self.assertEqual(signature, "John Doe\nDirector\n(919) 555-5555\n\n")
+        self.assertEqual(body + signature, text)
+
+
+    def test__contact_signature(self):
+        """ Is a final paragraph of contact details found without a sender? """
+
+        # split reply.
+        text = "Hi,\n\nBudget attached.\n\nJane Q. Smith\nDCR\njane@nc.gov | 919-555-1234\n"
+        body, signature = self.sf.get_signature(text)
+
+        # check if result is as expected.
+        self.assertEqual(body, "Hi,\n\nBudget attached.\n\n")
+
+
+    def test__no_signature(self):
+        """ Is prose with a phone number left alone? """
+
+        # split reply.
+        text = "Please call me at 919-555-1234 tomorrow.\nThanks.\n"
+        body, signature = self.sf.get_signature(text, self.sender)
+
+        # check if result is as expected.
+        self.assertEqual([body, signature], [text, ""])
+
+
+# CLI.
+def main(text_file: "plain text email file", sender: ("<From> value", "option")=None):
+
+    "Prints the signature block found in a plain text email.\
+    \nexample: `python3 test__signatures.py \
+../scripts/experiments/signatures/sample_email.txt`"
+
+    # print signature.
+    with open(text_file, encoding="utf-8") as tf:
+        body, signature = SignatureFinder().get_signature(tf.read(), sender)
+    print(signature)
+
+
+if __name__ == "__main__":
+    plac.call(main)
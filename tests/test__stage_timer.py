@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# import modules.
+import sys; sys.path.append("..")
+import json
+import logging
+import plac
+import unittest
+from tomes_tagger.lib.stage_timer import *
+
+# enable logging.
+logging.basicConfig(level=logging.DEBUG)
+
+
+class Test_StageTimer(unittest.TestCase):
+
+
+    def test__percentiles(self):
+        """ Are percentiles estimated from the histogram and capped at the slowest time? """
+
+        # add 90 fast and 10 slow timings.
+        timer = StageTimer()
+        for i in range(100):
+            timer.add("ner", 0.0005 if i < 90 else 0.003)
+        report = timer.get_report()["stages"]["ner"]
+
+        # check if result is as expected.
+        self.assertEqual([report["count"], report["p50_ms"], report["p99_ms"]], 
+                [100, 0.501, 3.0])
+        self.assertEqual(sum(report["histogram_ms"].values()), 100)
+
+
+    def test__breakdowns(self):
+        """ Are messages broken down by content type and body size? """
+
+        # time three messages.
+        timer = StageTimer()
+        for content_type, characters in [("text/html", 50), ("text/html", 5000), 
+                ("text/plain", 200000)]:
+            timer.start_message()
+            timer.set_message(content_type, characters)
+            timer.stop_message()
+        report = timer.get_report()
+
+        # check if result is as expected.
+        self.assertEqual({key: value["messages"] for key, value in 
+                report["content_types"].items()}, {"text/html": 2, "text/plain": 1})
+        self.assertEqual({key: value["characters"] for key, value in 
+                report["body_sizes"].items()}, {"<1K": 50, "1K-10K": 5000, 
+                "100K-1M": 200000})
+
+
+# CLI.
+def main(report_file: "stage timing report written by tagger.py"):
+
+    "Prints the stages in a stage timing report from slowest to fastest total time.\
+    \nexample: `python3 test__stage_timer.py timing.json`"
+
+    # print stages.
+    with open(report_file, encoding="utf-8") as rf:
+        stages = json.load(rf)["stages"]
+    for stage in sorted(stages, key=lambda x: stages[x]["total_s"], reverse=True):
+        print(stage, stages[stage])
+
+
+if __name__ == "__main__":
+    plac.call(main)
@@ -5,7 +5,12 @@ import sys; sys.path.append("..")
 import logging
 import math
 import plac
+import threading
+import time
 import unittest
+from tomes_tagger.lib.content_cache import ContentCache
+from tomes_tagger.lib.corenlp_standin import CoreNLPStandIn
+from tomes_tagger.lib.deadline import Deadline
 from tomes_tagger.lib.text_to_nlp import *
 
 # enable logging.
@@ -36,6 +41,54 @@ class Test_TextToNLP(unittest.TestCase):
         self.assertTrue(is_connection_error)
 
 
+    def test__semaphore_timeout(self):
+        """ Does waiting for a request slot stop when the time budget runs out? """
+
+        # take the only slot; wait for it with a 0.1 second budget.
+        semaphore = threading.BoundedSemaphore(1)
+        semaphore.acquire()
+        deadline = Deadline(0.1)
+        t2n = TextToNLP(host=self.host, deadline=deadline, semaphore=semaphore)
+        deadline.start()
+        start_time = time.perf_counter()
+        with self.assertRaises(ConnectionError):
+            t2n.corenlp.annotate("North Carolina")
+
+        # check if result is as expected.
+        self.assertTrue(time.perf_counter() - start_time < 1)
+        semaphore.release()
+
+
+    def test__deadline_parses_json(self):
+        """ Does a request with a time budget return a dict without logging warnings? """
+
+        # keep the records this module's logger handles.
+        records = []
+        handler = logging.Handler(logging.WARNING)
+        handler.emit = records.append
+        logger = logging.getLogger("tomes_tagger.lib.text_to_nlp")
+        logger.addHandler(handler)
+
+        # tag text with a time budget running.
+        standin = CoreNLPStandIn()
+        standin.start()
+        deadline = Deadline(10)
+        t2n = TextToNLP(host=standin.url, deadline=deadline)
+        deadline.start()
+        try:
+            results = t2n.corenlp.annotate("Jane Doe lives in Raleigh.")
+            ner = t2n.get_NER("Jane Doe lives in Raleigh.")
+        finally:
+            deadline.stop()
+            standin.stop()
+            logger.removeHandler(handler)
+
+        # check if result is as expected.
+        self.assertIsInstance(results, dict)
+        self.assertEqual(ner[0][:2], ("Jane", "::stanford.edu::PERSON"))
+        self.assertEqual(records, [])
+
+
     def test__gets_empty_list(self):
         """ If we try and tag an empty string, is an empty list returned? """
 
@@ -43,6 +96,106 @@ class Test_TextToNLP(unittest.TestCase):
         self.assertTrue(results == [])
 
 
+    def test__paragraph_cache(self):
+        """ Are cached paragraphs skipped and is whitespace reassembled exactly? """
+
+        # create a fake CoreNLP annotator that tokenizes on single spaces.
+        sent = []
+        def annotate(text):
+            sent.append(text)
+            words = text.split(" ")
+            tokens = [{"word": w, "ner": "O", "after": " "} for w in words]
+            tokens[-1]["after"] = ""
+            return {"sentences": [{"tokens": tokens}]}
+        
+        # tag two texts that share a paragraph.
+        t2n = TextToNLP(host=self.host, cache=ContentCache())
+        t2n.corenlp.annotate = annotate
+        text = "  Hi Jane.\n \n\nThis is confidential.\n"
+        ner = t2n.get_NER(text)
+        t2n.get_NER("Bye Jane.\n\nThis is confidential.")
+        stats = t2n.get_cache_stats()
+
+        # check if result is as expected.
+        self.assertEqual("".join([n[0] + n[2] for n in ner]), text)
+        self.assertEqual(sent, ["Hi Jane.", "This is confidential.", "Bye Jane."])
+        self.assertEqual([stats["cached_paragraphs"], stats["characters_saved"]], [1, 21])
+
+
+    def test__chunk_workers(self):
+        """ Are chunks tagged concurrently put back together in order? """
+
+        # create a fake CoreNLP annotator that tokenizes on single spaces.
+        def annotate(text):
+            words = text.strip().split(" ")
+            tokens = [{"word": w, "ner": "O", "after": " "} for w in words]
+            tokens[-1]["after"] = ""
+            return {"sentences": [{"tokens": tokens}]}
+
+        # tag text in chunks, one at a time and concurrently.
+        text = " ".join(["word{}".format(i) for i in range(50)])
+        results = []
+        for workers in [1, 4]:
+            t2n = TextToNLP(host=self.host, chunk_size=40, workers=workers)
+            t2n.corenlp.annotate = annotate
+            results.append(t2n.get_NER(text))
+
+        # check if result is as expected.
+        self.assertEqual(results[0], results[1])
+        self.assertEqual("".join([n[0] + n[2] for n in results[1]]), text)
+
+
+    def test__chunk_cancel(self):
+        """ Are chunks that haven't been sent yet dropped once one chunk fails? """
+
+        # create a fake CoreNLP annotator that fails on the first chunk.
+        sent = []
+        def annotate(text):
+            sent.append(text)
+            time.sleep(0.02)
+            if text.startswith("word0 "):
+                return {}
+            return {"sentences": [{"tokens": [{"word": text.strip(), "ner": "O",
+                "after": ""}]}]}
+
+        # tag 10 chunks with 2 workers, twice.
+        t2n = TextToNLP(host=self.host, chunk_size=40, workers=2, retry=False)
+        t2n.corenlp.annotate = annotate
+        text = " ".join(["word{}".format(i) for i in range(50)])
+        results = [t2n.get_NER(text), t2n.get_NER(text)]
+        executor = t2n.executor
+        t2n.close()
+
+        # check if result is as expected.
+        self.assertEqual(results, [[], []])
+        self.assertTrue(len(sent) < 10)
+        self.assertTrue(executor._shutdown and t2n.executor is None)
+
+
+    def test__chunk_hook(self):
+        """ Are chunks and retries reported to the chunk hook? """
+
+        # create a fake CoreNLP annotator that fails on its first call.
+        calls = []
+        def annotate(text):
+            calls.append(text)
+            if len(calls) == 1:
+                return {}
+            return {"sentences": [{"tokens": [{"word": text.strip(), "ner": "O",
+                "after": ""}]}]}
+
+        # tag text in 2 chunks.
+        hooked = []
+        t2n = TextToNLP(host=self.host, chunk_size=10,
+                chunk_hook=lambda *args: hooked.append(args))
+        t2n.corenlp.annotate = annotate
+        t2n.get_NER("abcdefgh ijklmnop")
+
+        # check if result is as expected.
+        self.assertEqual(hooked, [(2, 1)])
+        self.assertEqual(len(calls), 3)
+
+
 # CLI.
 def main(text="North Carolina.", host="http://localhost:9003"):
 
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for converting many EAXS files to 'tagged' EAXS with a pool
+of workers that share one work queue.
+
+Todo:
+    * Workers are threads. CoreNLP and Lynx run outside of Python, so their work overlaps,
+    but the Python parts of tagging, such as parsing and building XML, share one core.
+    * The cap on CoreNLP requests in flight is shared with other tagger processes on this
+    host that use the same cap. See "help(capacity_governor.CapacityGovernor)".
+    * Options that write one file per run (@timing_file, @status_file, @prom_file,
+    @profile_prefix, @trace_file) and @memory_probe aren't supported because workers would
+    overwrite or mix each other's output.
+"""
+
+# import modules.
+import sys; sys.path.append("..")
+import logging
+import os
+import plac
+import queue
+import threading
+import time
+from tomes_tagger.lib.capacity_governor import CapacityGovernor
+from tomes_tagger.lib.live_reporter import JSONStatusFile
+from tomes_tagger.tagger import Tagger, set_logging
+
+
+class BatchTagger():
+    """ A class for converting many EAXS files to 'tagged' EAXS with a pool of workers that
+    share one work queue. Each worker keeps one Tagger for all the files it tags, and all
+    workers share a cap on the CoreNLP requests in flight.
+
+    Example:
+        >>> batch = BatchTagger("http://localhost:9003", workers=4, corenlp_capacity=8)
+        >>> eaxs_files = batch.get_eaxs_files("eaxs_folder") # or a manifest file.
+        >>> batch.write_tagged(eaxs_files, "tagged_folder", "manifest.json") # dict.
+    """
+
+    # Tagger options that workers can't share.
+    unshared_options = ["timing_file", "status_file", "prom_file", "profile_prefix",
+            "trace_file", "memory_probe"]
+
+
+    def __init__(self, host, workers=2, corenlp_capacity=None, check_host=False,
+            **tagger_kwargs):
+        """ Sets instance attributes.
+
+        Args:
+            - host (str): The URL for the CoreNLP server (ex: "http://localhost:9003").
+            - workers (int): The number of EAXS files to tag at once.
+            - corenlp_capacity (int): The maximum number of CoreNLP requests in flight
+            across all workers and any other tagger processes on this host that set it. If
+            None, there's no limit beyond what each worker sends.
+            - check_host (bool): Use True to test if @host is active. Otherwise, use False.
+            - **tagger_kwargs: Any additional, optional arguments to pass to each Tagger.
+            See "help(tagger.Tagger)".
+
+        Raises:
+            - ValueError: If any option in @self.unshared_options is set.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # verify that each option can be shared by the workers.
+        unshared = [key for key in self.unshared_options if tagger_kwargs.get(key)]
+        if len(unshared) != 0:
+            msg = "Options can't be used in batch mode: {}".format(unshared)
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        # set attributes.
+        self.host = host
+        self.workers = max(1, workers)
+        self.corenlp_capacity = corenlp_capacity
+        self.governor = None
+        if self.corenlp_capacity is not None:
+            self.governor = CapacityGovernor(self.host, self.corenlp_capacity)
+
+        # compose one Tagger per worker; only check @host once.
+        self.logger.info("Creating {} taggers.".format(self.workers))
+        self.taggers = [Tagger(self.host, check_host=(check_host and i == 0),
+            corenlp_semaphore=self.governor, **tagger_kwargs) for i in range(
+                self.workers)]
+
+
+    @staticmethod
+    def get_eaxs_files(source):
+        """ Returns the EAXS files in @source.
+
+        Args:
+            - source (str): A folder to search for ".xml" files, including subfolders, or a
+            manifest file that lists one EAXS file per line. Blank lines and lines that
+            start with "#" are ignored. Relative paths are relative to the manifest's
+            folder.
+
+        Returns:
+            list: The return value.
+            The absolute filepaths for the EAXS files.
+
+        Raises:
+            - FileNotFoundError: If @source or a listed EAXS file doesn't exist.
+        """
+
+        # if @source is a folder, find all ".xml" files in it.
+        if os.path.isdir(source):
+            eaxs_files = []
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                eaxs_files += [os.path.join(dirpath, f) for f in sorted(filenames) if
+                        os.path.splitext(f)[1].lower() == ".xml"]
+            return [os.path.abspath(f) for f in eaxs_files]
+
+        # otherwise, read the manifest.
+        with open(source, encoding="utf-8") as sf:
+            lines = [line.strip() for line in sf.read().splitlines()]
+        container = os.path.dirname(os.path.abspath(source))
+        eaxs_files = [os.path.abspath(os.path.join(container, line)) for line in lines if
+                line != "" and not line.startswith("#")]
+        for eaxs_file in eaxs_files:
+            if not os.path.isfile(eaxs_file):
+                raise FileNotFoundError("Can't find listed EAXS file: {}".format(
+                    eaxs_file))
+
+        return eaxs_files
+
+
+    @staticmethod
+    def get_tagged_paths(eaxs_files, output_dir):
+        """ Returns the tagged EAXS filepath for each file in @eaxs_files. The folder
+        structure of @eaxs_files below their common folder is kept in @output_dir.
+
+        Args:
+            - eaxs_files (list): The EAXS filepaths.
+            - output_dir (str): The folder in which to write tagged EAXS files.
+
+        Returns:
+            list: The return value.
+
+        Raises:
+            - ValueError: If a tagged EAXS filepath is the same as its EAXS filepath.
+        """
+
+        # get the common folder of @eaxs_files.
+        eaxs_files = [os.path.abspath(f) for f in eaxs_files]
+        common_dir = os.path.commonpath([os.path.dirname(f) for f in eaxs_files])
+
+        tagged_paths = []
+        for eaxs_file in eaxs_files:
+            tagged_path = os.path.join(os.path.abspath(output_dir), os.path.relpath(
+                eaxs_file, common_dir))
+            if tagged_path == eaxs_file:
+                raise ValueError("Tagged EAXS would overwrite EAXS file: {}".format(
+                    eaxs_file))
+            tagged_paths.append(tagged_path)
+
+        return tagged_paths
+
+
+    def _tag_accounts(self, tagger, work, accounts, on_done):
+        """ Tags EAXS files from @work with @tagger until @work is empty.
+
+        Args:
+            - tagger (tomes_tagger.tagger.Tagger): The worker's Tagger.
+            - work (queue.Queue): The positions in @accounts of the files left to tag.
+            - accounts (list): The account dicts.
+            - on_done (function): A function to call with each account and the dict to
+            update it with once its file is done.
+
+        Returns:
+            None
+        """
+
+        while True:
+            try:
+                index = work.get_nowait()
+            except queue.Empty:
+                break
+            account = accounts[index]
+
+            # tag the file; don't let one failed file stop the batch.
+            self.logger.info("Tagging EAXS file: {}".format(account["eaxs_file"]))
+            start_time = time.perf_counter()
+            try:
+                os.makedirs(os.path.dirname(account["tagged_eaxs_file"]), exist_ok=True)
+                results = tagger.write_tagged(account["eaxs_file"],
+                        account["tagged_eaxs_file"], report_interval=0)
+                update = {"status": "tagged", "total_messages": results["total_messages"],
+                        "untagged_messages": len(results["untagged_messages"]),
+                        "results": results}
+            except Exception as err:
+                self.logger.error(err)
+                self.logger.warning("Failed to tag EAXS file: {}".format(
+                    account["eaxs_file"]))
+                update = {"status": "failed", "error": repr(err)}
+            update["seconds"] = round(time.perf_counter() - start_time, 3)
+            on_done(account, update)
+
+        return
+
+
+    def write_tagged(self, eaxs_files, output_dir, manifest_file=None):
+        """ Writes a tagged version of each file in @eaxs_files to @output_dir. The largest
+        files are started first, so that a large file doesn't start last and leave the
+        other workers idle.
+
+        Args:
+            - eaxs_files (list): The EAXS filepaths.
+            - output_dir (str): The folder in which to write tagged EAXS files. See
+            self.get_tagged_paths().
+            - manifest_file (str): An optional filepath to which to atomically write the
+            results manifest as JSON after each file is done.
+
+        Returns:
+            dict: The return value.
+            The "accounts" key's value is a list of dicts, one per file in @eaxs_files. Each
+            has the "eaxs_file", the "tagged_eaxs_file", the "status" ("pending", "tagged",
+            or "failed"), and the "seconds" spent. Tagged files also have the
+            "total_messages", the number of "untagged_messages", and the Tagger's
+            "results". Failed files have the "error". If @self.corenlp_capacity is set, the
+            "corenlp_governor" key's value is a dict with the time spent waiting for CoreNLP
+            request slots.
+        """
+
+        self.logger.info("Tagging {} EAXS files with {} workers.".format(len(eaxs_files),
+            self.workers))
+        start_time = time.perf_counter()
+
+        # create one account per file.
+        tagged_paths = self.get_tagged_paths(eaxs_files, output_dir)
+        accounts = [{"eaxs_file": eaxs_file, "tagged_eaxs_file": tagged_path,
+            "status": "pending", "bytes": os.path.getsize(eaxs_file)} for eaxs_file,
+            tagged_path in zip(eaxs_files, tagged_paths)]
+        manifest = {"host": self.host, "workers": self.workers,
+                "corenlp_capacity": self.corenlp_capacity,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "finished": None,
+                "seconds": None, "accounts": accounts}
+        if self.governor is not None:
+            self.governor.reset_stats()
+
+        # create function to update an account and write @manifest after each file.
+        lock = threading.Lock()
+        writer = JSONStatusFile(manifest_file) if manifest_file is not None else None
+        def on_done(account, update):
+            with lock:
+                account.update(update)
+                manifest["seconds"] = round(time.perf_counter() - start_time, 3)
+                if self.governor is not None:
+                    manifest["corenlp_governor"] = self.governor.get_stats()
+                if writer is not None:
+                    writer(manifest)
+
+        # queue files from largest to smallest.
+        work = queue.Queue()
+        for index in sorted(range(len(accounts)), key=lambda x: accounts[x]["bytes"],
+                reverse=True):
+            work.put(index)
+
+        # tag files with each worker's Tagger until @work is empty.
+        threads = [threading.Thread(target=self._tag_accounts, args=(tagger, work,
+            accounts, on_done)) for tagger in self.taggers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # write the final manifest.
+        manifest["finished"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        on_done({}, {})
+        self.logger.info("Tagged {} of {} EAXS files.".format(len([a for a in accounts if
+            a["status"] == "tagged"]), len(accounts)))
+
+        return manifest
+
+
+# CLI.
+def main(source: ("folder of EAXS files or manifest file listing them"),
+        output_dir: ("folder in which to write tagged EAXS files"),
+        manifest_file: ("JSON results manifest to write"),
+        silent: ("disable console logs", "flag", "s"),
+        ner_cache: ("cache NER results per paragraph", "flag", "n"),
+        html_cache: ("cache plain text versions of HTML", "flag", "c"),
+        host: ("NLP server URL", "option")="http://localhost:9003",
+        workers: ("number of EAXS files to tag at once", "option", None, int)=2,
+        corenlp_capacity: ("maximum CoreNLP requests in flight across workers and tagger \
+processes", "option", None, int)=None,
+        cache_dir: ("folder in which to persist caches", "option")=None,
+        html_backend: ("HTML to text converter", "option", None, str, ["lynx", "lxml"])="lynx",
+        html_parser: ("HTML parser for modifying HTML", "option", None, str,
+            ["html5lib", "lxml.html"])="html5lib",
+        message_timeout: ("maximum seconds to spend tagging one message", "option", None,
+            float)=None,
+        nlp_config: ("JSON file with the CoreNLP chunk size and workers", "option")=None,
+        log_profile: ("logging profile; 'production' logs per-message summaries from a \
+background thread", "option", None, str, ["default", "production"])="default"):
+
+    "Converts a folder or manifest of EAXS documents to tagged EAXS.\
+    \nexample: `python3 batch_tagger.py ../tests/sample_files tagged manifest.json`"
+
+    # set logging.
+    set_logging(silent, log_profile)
+
+    # make tagged versions of each EAXS.
+    logging.info("Running CLI: " + " ".join(sys.argv))
+    try:
+        batch = BatchTagger(host, workers=workers, corenlp_capacity=corenlp_capacity,
+                check_host=True, ner_cache=ner_cache, html_cache=html_cache,
+                cache_dir=cache_dir, html_backend=html_backend, html_parser=html_parser,
+                message_timeout=message_timeout, nlp_config=nlp_config)
+        eaxs_files = batch.get_eaxs_files(source)
+        manifest = batch.write_tagged(eaxs_files, output_dir, manifest_file)
+        failed = [a["eaxs_file"] for a in manifest["accounts"] if a["status"] != "tagged"]
+        logging.info("Failed EAXS files: {}".format(failed))
+        logging.info("Done.")
+        sys.exit()
+    except Exception as err:
+        logging.critical(err)
+        sys.exit(err.__repr__())
+
+
+if __name__ == "__main__":
+    plac.call(main)
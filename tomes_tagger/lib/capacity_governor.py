@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for capping the CoreNLP requests in flight across all tagger
+processes and threads on a host. Each request slot is a lock file; a request holds an
+exclusive lock on one slot file while it's in flight.
+
+Todo:
+    * Locks are taken with "fcntl.flock", so the governor only works on Unix. Slot locks are
+    released by the OS when a process dies, so a crashed tagger can't leak a slot.
+    * Processes that disagree on the capacity share the first slots; the effective cap is
+    the largest capacity in use.
+    * Waiting requests poll for a free slot, so they aren't served in order. Under heavy
+    contention, a request can wait longer than requests that arrived after it.
+"""
+
+# import modules.
+import hashlib
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class CapacityGovernor():
+    """ A class for capping the CoreNLP requests in flight across all tagger processes and
+    threads on a host. It has the same acquire() and release() methods as a
+    threading.BoundedSemaphore, so it can be passed as the @semaphore of a
+    tomes_tagger.lib.text_to_nlp.TextToNLP.
+
+    Example:
+        >>> governor = CapacityGovernor("http://localhost:9003", capacity=4)
+        >>> with governor:
+        >>>     pass # send a request to CoreNLP.
+        >>> governor.acquire(timeout=5) # False if no slot was free within 5 seconds.
+        >>> governor.release()
+        >>> governor.get_stats() # dict.
+    """
+
+
+    def __init__(self, host, capacity, lock_dir=None, poll_interval=0.001,
+            max_poll_interval=0.05):
+        """ Sets instance attributes.
+
+        Args:
+            - host (str): The URL for the CoreNLP server (ex: "http://localhost:9003").
+            Processes that use the same @host and @lock_dir share slots.
+            - capacity (int): The maximum number of requests in flight.
+            - lock_dir (str): The folder for the slot files. If None, a folder named after
+            @host in the system's temporary folder is used.
+            - poll_interval (float): The seconds to wait before looking for a free slot
+            again. The wait doubles after each try, up to @max_poll_interval.
+            - max_poll_interval (float): The longest wait between tries.
+
+        Raises:
+            - OSError: If file locks aren't supported on this platform.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # verify that file locks are supported.
+        if fcntl is None:
+            msg = "Can't limit CoreNLP requests across processes; 'fcntl' is missing."
+            self.logger.error(msg)
+            raise OSError(msg)
+
+        # set attributes.
+        self.host = host
+        self.capacity = max(1, capacity)
+        self.lock_dir = lock_dir
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.held = threading.local()
+        self.lock = threading.Lock()
+
+        # if needed, name the slot folder after @host; create the slot filepaths.
+        if self.lock_dir is None:
+            self.lock_dir = os.path.join(tempfile.gettempdir(), "tomes_tagger_corenlp_" +
+                    hashlib.sha1(self.host.encode()).hexdigest()[:12])
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.slot_files = [os.path.join(self.lock_dir, "slot_{}.lock".format(i)) for i in
+                range(self.capacity)]
+        self.logger.info("Limiting CoreNLP requests to {} via slot files in: {}".format(
+            self.capacity, self.lock_dir))
+
+        # start counters; @self.wait_seconds_total is never reset, so it can be exported as
+        # a monotonic counter.
+        self.wait_seconds_total = 0.0
+        self.reset_stats()
+
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+
+    def __exit__(self, *args):
+        self.release()
+        return False
+
+
+    def reset_stats(self):
+        """ Resets the counters for waiting on slots, except @self.wait_seconds_total.
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            self.stats = {"requests": 0, "waited": 0, "timeouts": 0, "wait_seconds": 0.0,
+                    "max_wait_seconds": 0.0}
+
+        return
+
+
+    def get_stats(self):
+        """ Returns the counters for waiting on slots.
+
+        Returns:
+            dict: The return value.
+            The "requests" that got a slot, the number of them that "waited" for it, the
+            number of "timeouts", and the total and longest seconds spent waiting,
+            including for requests that timed out.
+        """
+
+        with self.lock:
+            stats = dict(self.stats)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 6)
+        stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 6)
+        stats["capacity"] = self.capacity
+
+        return stats
+
+
+    def _lock_slot(self):
+        """ Locks the first free slot file, starting from a random slot so that processes
+        don't all contend for the same one.
+
+        Returns:
+            int: The return value.
+            The file descriptor of the locked slot file. If no slot is free, None is
+            returned.
+        """
+
+        offset = random.randrange(self.capacity)
+        for i in range(self.capacity):
+            slot_file = self.slot_files[(offset + i) % self.capacity]
+            fd = os.open(slot_file, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+
+        return None
+
+
+    def acquire(self, timeout=None):
+        """ Waits for a free slot and locks it.
+
+        Args:
+            - timeout (float): The maximum seconds to wait. If None, waits until a slot is
+            free.
+
+        Returns:
+            bool: The return value.
+            True if a slot was locked. Otherwise, False.
+        """
+
+        start_time = time.monotonic()
+        interval = self.poll_interval
+
+        # try to lock a slot until one is free or @timeout passes.
+        fd = self._lock_slot()
+        is_waiting = fd is None
+        while fd is None:
+            elapsed = time.monotonic() - start_time
+            if timeout is not None and elapsed >= timeout:
+                break
+            wait = interval if timeout is None else min(interval, timeout - elapsed)
+            time.sleep(wait)
+            interval = min(interval * 2, self.max_poll_interval)
+            fd = self._lock_slot()
+
+        # update counters.
+        seconds = time.monotonic() - start_time
+        with self.lock:
+            self.wait_seconds_total += seconds
+            self.stats["wait_seconds"] += seconds
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], seconds)
+            if fd is None:
+                self.stats["timeouts"] += 1
+            else:
+                self.stats["requests"] += 1
+                self.stats["waited"] += int(is_waiting)
+
+        # if no slot was locked, give up.
+        if fd is None:
+            self.logger.warning("No CoreNLP request slot was free within {} seconds.".format(
+                timeout))
+            return False
+
+        # remember the slot for this thread.
+        if not hasattr(self.held, "fds"):
+            self.held.fds = []
+        self.held.fds.append(fd)
+
+        return True
+
+
+    def release(self):
+        """ Unlocks the slot most recently locked by the calling thread.
+
+        Returns:
+            None
+
+        Raises:
+            - ValueError: If the calling thread doesn't hold a slot.
+        """
+
+        fds = getattr(self.held, "fds", [])
+        if len(fds) == 0:
+            raise ValueError("Governor released too many times.")
+
+        fd = fds.pop()
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+        return
+
+
+if __name__ == "__main__":
+    pass
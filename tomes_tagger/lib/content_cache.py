@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for a bounded, content-addressed cache with an in-memory LRU
+layer and an optional on-disk SQLite layer. The on-disk layer can be shared across runs and
+across processes on the same machine.
+
+Todo:
+    * Values are stored as JSON, so tuples come back as lists. Callers need to convert them
+    back as needed.
+"""
+
+# import modules.
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+
+
+class ContentCache():
+    """ A class for a bounded, content-addressed cache with an in-memory LRU layer and an
+    optional on-disk SQLite layer.
+
+    Example:
+        >>> cache = ContentCache("cache.sqlite", max_items=1000)
+        >>> key = cache.get_key("North Carolina", "some option")
+        >>> cache.set(key, [["North", "", " "], ["Carolina", "", ""]])
+        >>> cache.get(key) # list.
+        >>> cache.get_stats() # dict.
+    """
+
+
+    def __init__(self, cache_file=None, max_items=10000, max_bytes=1073741824):
+        """ Sets instance attributes.
+
+        Args:
+            - cache_file (str): The optional filepath for the on-disk SQLite cache. If None,
+            only the in-memory cache is used.
+            - max_items (int): The maximum number of items to hold in memory. Least recently
+            used items are evicted first.
+            - max_bytes (int): The approximate maximum size of the values in @cache_file.
+            Least recently used items are evicted first.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.cache_file = cache_file
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        # create in-memory cache and counters.
+        self.memory = OrderedDict()
+        self.reset_stats()
+
+        # if specified, open the on-disk cache.
+        self.db = None
+        self.disk_bytes = 0
+        if self.cache_file is not None:
+            self.db = self._open_db()
+
+
+    def _open_db(self):
+        """ Opens and, if needed, creates the SQLite database at @self.cache_file.
+
+        Returns:
+            sqlite3.Connection: The return value.
+            If the database can't be opened, None is returned instead.
+        """
+
+        self.logger.info("Opening on-disk cache: {}".format(self.cache_file))
+
+        # open database; use WAL mode so that concurrent processes can share it.
+        try:
+            db = sqlite3.connect(self.cache_file, timeout=30, isolation_level=None,
+                    check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, "
+                    "value TEXT, size INTEGER, accessed REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            self.disk_bytes = db.execute("SELECT TOTAL(size) FROM cache").fetchone()[0]
+        except sqlite3.Error as err:
+            self.logger.error(err)
+            self.logger.warning("Can't open on-disk cache; falling back to memory only.")
+            return None
+
+        return db
+
+
+    @staticmethod
+    def get_key(*parts):
+        """ Returns a SHA-256 hex digest for all @parts.
+
+        Args:
+            - *parts (str): The strings from which to create a key.
+
+        Returns:
+            str: The return value.
+        """
+
+        # hash each part followed by a delimiter that can't occur in text.
+        sha = hashlib.sha256()
+        for part in parts:
+            sha.update(part.encode("utf-8", errors="surrogatepass"))
+            sha.update(b"\x00")
+
+        return sha.hexdigest()
+
+
+    def reset_stats(self):
+        """ Resets the hit and miss counters.
+
+        Returns:
+            None
+        """
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        return
+
+
+    def get_stats(self):
+        """ Returns the hit and miss counters and the overall hit rate.
+
+        Returns:
+            dict: The return value.
+        """
+
+        stats = dict(self.stats)
+        lookups = sum(self.stats.values())
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        stats["hit_rate"] = round(hits/lookups, 4) if lookups > 0 else 0.0
+
+        return stats
+
+
+    def _remember(self, key, value):
+        """ Adds @key and @value to the in-memory cache and, if needed, evicts the least
+        recently used item.
+
+        Args:
+            - key (str): The cache key.
+            - value (object): The value to cache.
+
+        Returns:
+            None
+        """
+
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+
+        return
+
+
+    def get(self, key):
+        """ Gets the cached value for @key.
+
+        Args:
+            - key (str): The cache key.
+
+        Returns:
+            object: The return value.
+            If @key isn't cached, None is returned.
+        """
+
+        # check the in-memory cache.
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return self.memory[key]
+
+        # otherwise, check the on-disk cache.
+        if self.db is not None:
+            try:
+                row = self.db.execute("SELECT value FROM cache WHERE key = ?",
+                        (key,)).fetchone()
+                if row is not None:
+                    self.db.execute("UPDATE cache SET accessed = ? WHERE key = ?",
+                            (time.time(), key))
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.stats["disk_hits"] += 1
+                    return value
+            except (sqlite3.Error, ValueError) as err:
+                self.logger.error(err)
+                self.logger.warning("Failed to read from on-disk cache.")
+
+        self.stats["misses"] += 1
+        return None
+
+
+    def set(self, key, value):
+        """ Caches @value for @key.
+
+        Args:
+            - key (str): The cache key.
+            - value (object): Any JSON serializable value.
+
+        Returns:
+            None
+        """
+
+        # add @value to the in-memory cache.
+        self._remember(key, value)
+        if self.db is None:
+            return
+
+        # add @value to the on-disk cache.
+        try:
+            jvalue = json.dumps(value)
+            size = len(jvalue)
+            self.db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    (key, jvalue, size, time.time()))
+            self.disk_bytes += size
+        except (sqlite3.Error, TypeError, ValueError) as err:
+            self.logger.error(err)
+            self.logger.warning("Failed to write to on-disk cache.")
+            return
+
+        # if needed, evict the least recently used items.
+        if self.disk_bytes > self.max_bytes:
+            self._evict()
+
+        return
+
+
+    def _evict(self):
+        """ Deletes the least recently used items from the on-disk cache until it is
+        at 90% of @self.max_bytes.
+
+        Returns:
+            None
+        """
+
+        self.logger.info("On-disk cache exceeds {} bytes; evicting items.".format(
+            self.max_bytes))
+
+        # delete rows in access order until enough space has been freed.
+        target = int(self.max_bytes * 0.9)
+        try:
+            self.disk_bytes = self.db.execute("SELECT TOTAL(size) FROM cache").fetchone()[0]
+            rows = self.db.execute("SELECT key, size FROM cache ORDER BY accessed")
+            stale_keys = []
+            for key, size in rows:
+                if self.disk_bytes <= target:
+                    break
+                stale_keys.append((key,))
+                self.disk_bytes -= size
+            self.db.executemany("DELETE FROM cache WHERE key = ?", stale_keys)
+        except sqlite3.Error as err:
+            self.logger.error(err)
+            self.logger.warning("Failed to evict items from on-disk cache.")
+
+        return
+
+
+    def close(self):
+        """ Closes the on-disk cache, if any.
+
+        Returns:
+            None
+        """
+
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for cheaply scoring a decoded message body and deciding
+whether it should get full NER tagging, pattern-only (regex) tagging, or no tagging at all.
+Machine-generated bodies such as log dumps, CSV pastes, and other text with few letters or
+long tokens are routed to pattern-only tagging so that PII patterns are still found. Only
+bodies that decode as Base64 or that are mostly binary characters are skipped.
+
+Todo:
+    * The thresholds were picked by hand. They should be revisited against a sample of real
+    accounts.
+"""
+
+# import modules.
+import binascii
+import logging
+import re
+from collections import Counter
+
+
+class ContentTriage():
+    """ A class for routing a decoded message body to full NER tagging ("ner"),
+    pattern-only tagging ("regex"), or no tagging ("skip").
+
+    Example:
+        >>> triage = ContentTriage()
+        >>> triage.get_route("Hi Jane, are you free for lunch?") # ("ner", "short").
+        >>> triage.get_route(open("server.log").read()) # ("regex", "log").
+        >>> triage.get_features("a,b,c\\n1,2,3\\n") # dict.
+    """
+
+
+    def __init__(self, min_length=500, sample_length=20000):
+        """ Sets instance attributes.
+
+        Args:
+            - min_length (int): Bodies shorter than this are always routed to "ner".
+            - sample_length (int): The number of characters from the start of the body to
+            score. This keeps scoring cheap for huge bodies.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.min_length = min_length
+        self.sample_length = sample_length
+
+        # set patterns.
+        self.encoded_pattern = re.compile(r"^[A-Za-z0-9+/=_\-]{40,}$")
+        self.base64_pattern = re.compile(r"^[A-Za-z0-9+/]+={0,2}$")
+        self.word_pattern = re.compile(r"^[^\W\d_]+[.,;:!?'\"()]*$")
+        self.timestamp_pattern = re.compile(r"^\W{0,2}(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4}"
+                r"|\d{2}:\d{2}:\d{2}|[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2})")
+
+
+    def get_features(self, text):
+        """ Scores character classes, token lengths, and line structure for @text.
+
+        Args:
+            - text (str): The decoded message body.
+
+        Returns:
+            dict: The return value.
+            All ratios are between 0 and 1.
+        """
+
+        # score only the start of @text.
+        sample = text[:self.sample_length]
+        length = max(1, len(sample))
+
+        # get character class ratios.
+        letters = sum([1 for char in sample if char.isalpha()])
+        spaces = sum([1 for char in sample if char.isspace()])
+        digits = sum([1 for char in sample if char.isdigit()])
+        binary = sum([1 for char in sample if char == "\ufffd" or (ord(char) < 32 and
+            char not in "\t\n\r")])
+        features = {"letter_ratio": letters/length, "digit_ratio": digits/length,
+                "symbol_ratio": (length - letters - spaces - digits)/length,
+                "binary_ratio": binary/length}
+
+        # get token length features.
+        tokens = sample.split()
+        total_tokens = max(1, len(tokens))
+        features["mean_token_length"] = sum([len(t) for t in tokens])/total_tokens
+        features["encoded_ratio"] = sum([1 for t in tokens if
+            self.encoded_pattern.match(t)])/total_tokens
+        features["word_ratio"] = sum([1 for t in tokens if
+            self.word_pattern.match(t)])/total_tokens
+
+        # get line structure features; ignore the last line since it may be cut off.
+        lines = [line for line in sample.splitlines()[:-1] if line.strip() != ""]
+        total_lines = max(1, len(lines))
+        features["lines"] = len(lines)
+        features["timestamp_ratio"] = sum([1 for line in lines if
+            self.timestamp_pattern.match(line)])/total_lines
+        features["unique_line_ratio"] = len(set(lines))/total_lines
+
+        # get the share of lines with the most common non-zero delimiter count.
+        delimited = Counter()
+        for line in lines:
+            for delimiter in [",", "\t", "|", ";"]:
+                count = line.count(delimiter)
+                if count > 1:
+                    delimited[(delimiter, count)] += 1
+        features["delimited_ratio"] = 0.0
+        if len(delimited) > 0:
+            features["delimited_ratio"] = delimited.most_common(1)[0][1]/total_lines
+
+        return features
+
+
+    def is_base64(self, text):
+        """ Determines if @text decodes as Base64. Text that only has digits or letters of 
+        one case isn't considered Base64 even though it may decode, since that's more
+        likely to be numbers or identifiers.
+
+        Args:
+            - text (str): The decoded message body.
+
+        Returns:
+            bool: The return value.
+        """
+
+        # remove whitespace; ignore any trailing characters cut off by @self.sample_length.
+        joined = "".join(text[:self.sample_length].split())
+        if len(text) > self.sample_length:
+            joined = joined[:len(joined) - len(joined) % 4]
+        if len(joined) < self.min_length or not self.base64_pattern.match(joined):
+            return False
+
+        # require a mix of both cases and digits, as in encoded binary data.
+        if not (re.search("[a-z]", joined) and re.search("[A-Z]", joined) and
+                re.search("[0-9]", joined)):
+            return False
+
+        # verify that @joined decodes.
+        try:
+            binascii.a2b_base64(joined)
+        except binascii.Error:
+            return False
+
+        return True
+
+
+    def get_route(self, text):
+        """ Decides how to tag @text.
+
+        Args:
+            - text (str): The decoded message body.
+
+        Returns:
+            tuple: The return value.
+            The first item is the route (str): "ner", "regex", or "skip".
+            The second item is the reason (str) for the route.
+        """
+
+        # always fully tag short bodies.
+        if len(text.strip()) < self.min_length:
+            return ("ner", "short")
+
+        features = self.get_features(text)
+        self.logger.debug("Content triage features: {}".format(features))
+
+        # only skip Base64 and binary blobs; they can't hold readable PII.
+        if features["encoded_ratio"] > 0.5 and self.is_base64(text):
+            return ("skip", "encoded")
+        if features["binary_ratio"] > 0.1:
+            return ("skip", "binary")
+
+        # use pattern-only tagging for bodies with long tokens or hardly any letters.
+        if features["encoded_ratio"] > 0.5 or features["mean_token_length"] > 30:
+            return ("regex", "long_tokens")
+        if features["letter_ratio"] < 0.25:
+            return ("regex", "non_text")
+
+        # use pattern-only tagging for machine-generated text.
+        if features["lines"] >= 10:
+            if features["timestamp_ratio"] > 0.5:
+                return ("regex", "log")
+            if features["delimited_ratio"] > 0.7:
+                return ("regex", "delimited")
+            if features["unique_line_ratio"] < 0.2:
+                return ("regex", "repetitive")
+        if features["word_ratio"] < 0.4:
+            return ("regex", "few_words")
+
+        return ("ner", "text")
+
+
+if __name__ == "__main__":
+    pass
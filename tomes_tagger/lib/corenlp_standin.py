@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for a lightweight, local stand-in for the CoreNLP server. It
+speaks the same annotate API used by pycorenlp and tomes_tagger.lib.text_to_nlp and returns
+deterministic token/NER JSON. Latency, errors, hangs, and a concurrency limit can be injected
+so that pooling, retries, batching, and parallelism can be tested and benchmarked offline.
+
+Todo:
+    * NER tags come from a small built-in gazetteer and the regexNER patterns are limited to
+    URLs and email addresses. Results are plausible, not accurate; don't use them to judge
+    tagging quality.
+"""
+
+# import modules.
+import ast
+import json
+import logging
+import math
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """ An HTTP server that handles each request in a daemon thread. """
+
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """ A request handler that passes requests to the CoreNLPStandIn instance at
+    @self.server.standin. """
+
+
+    def log_message(self, *args):
+        """ Suppresses per-request logging to stderr. """
+        return
+
+
+    def _respond(self, status, body, content_type="application/json"):
+        """ Sends an HTTP response with @status and @body (str). """
+
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+        # ignore clients that gave up, e.g. after a timeout.
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            pass
+
+        return
+
+
+    def do_GET(self):
+        """ Answers pycorenlp's liveness check. """
+
+        self._respond(200, "CoreNLP stand-in", "text/plain")
+        return
+
+
+    def do_POST(self):
+        """ Annotates the request body. """
+
+        length = int(self.headers.get("Content-Length", 0))
+        text = self.rfile.read(length).decode("utf-8", errors="replace")
+        properties = parse_qs(urlparse(self.path).query).get("properties", ["{}"])[0]
+        status, body = self.server.standin.handle(text, properties)
+        self._respond(status, body)
+        return
+
+
+class CoreNLPStandIn():
+    """ A class for a lightweight, local stand-in for the CoreNLP server.
+
+    Example:
+        >>> standin = CoreNLPStandIn(latency=0.05, error_rate=0.01, max_concurrency=4)
+        >>> standin.start()
+        >>> t2n = TextToNLP(host=standin.url)
+        >>> t2n.get_NER("Jane Doe lives in Raleigh.") # list.
+        >>> standin.get_stats() # dict.
+        >>> standin.stop()
+    """
+
+    # set the built-in gazetteer.
+    gazetteer = {"PERSON": ["Jane", "John", "Jack", "Jill", "Roy", "Susan", "Ann", "Carlos",
+            "Mei", "Priya", "Doe", "Hill", "Cooper", "Kluttz", "Smith", "Ruiz", "Chen",
+            "Patel"],
+            "LOCATION": ["Raleigh", "Durham", "Asheville", "Wilmington", "Greensboro",
+            "Charlotte", "Boone", "Carolina", "Wake", "County"],
+            "ORGANIZATION": ["Archives", "Department", "Assembly", "Division", "University"]}
+
+    # set the regexNER patterns and tags.
+    patterns = [(re.compile(r"^(http|https|ftp)://\S+$"), "2aa1a6#0001::nc.gov::TOMES.URL"),
+            (re.compile(r"^[\w.\-]+@([\w\-]+\.)+\w{2,4}$"),
+                "2aa1a6#0002::nc.gov::TOMES.email_address")]
+
+    # set the tokenizer pattern.
+    token_pattern = re.compile(r"(?:https?|ftp)://\S+|[\w.\-]+@[\w.\-]+\w|\w+(?:['\-]\w+)*|"
+            r"[^\w\s]")
+
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, latency_sigma=0.0,
+            per_character=0.0, error_rate=0.0, hang_rate=0.0, hang_seconds=60,
+            max_concurrency=None, seed=0):
+        """ Sets instance attributes.
+
+        Args:
+            - host (str): The interface to listen on.
+            - port (int): The port to listen on. Use 0 to pick a free port.
+            - latency (float): The median seconds to wait before each response.
+            - latency_sigma (float): The sigma of a log-normal distribution around
+            @latency. Use 0 for a fixed latency.
+            - per_character (float): Additional seconds to wait per character of text.
+            - error_rate (float): The share of requests that get an HTTP 500 error.
+            - hang_rate (float): The share of requests that wait @hang_seconds before
+            responding, as a stuck server would.
+            - hang_seconds (float): The seconds a hung request waits. Hung requests are
+            released when the server stops.
+            - max_concurrency (int): The maximum number of requests annotated at once, like
+            the server's "-threads" option. Others wait in a queue. If None, there's no
+            limit.
+            - seed (int): The random seed for latency, error, and hang draws.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.per_character = per_character
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.max_concurrency = max_concurrency
+
+        # set thread-safe random draws, concurrency limit, and counters.
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.slots = None
+        if max_concurrency is not None:
+            self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.stopping = threading.Event()
+        self.server = None
+        self.thread = None
+        self.reset_stats()
+
+
+    @property
+    def url(self):
+        """ The URL of the running server (ex: "http://127.0.0.1:9003"). """
+        return "http://{}:{}".format(self.host, self.port)
+
+
+    def reset_stats(self):
+        """ Resets the request counters.
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            self.stats = {"requests": 0, "errors": 0, "hangs": 0, "characters": 0,
+                    "active": 0, "peak_active": 0, "waiting": 0, "peak_waiting": 0}
+
+        return
+
+
+    def get_stats(self):
+        """ Returns the request counters.
+
+        Returns:
+            dict: The return value.
+        """
+
+        with self.lock:
+            return dict(self.stats)
+
+
+    def start(self):
+        """ Starts the server in a background thread.
+
+        Returns:
+            None
+        """
+
+        self.stopping.clear()
+        self.server = _ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.server.standin = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.logger.info("Started CoreNLP stand-in at: {}".format(self.url))
+
+        return
+
+
+    def stop(self):
+        """ Stops the server and releases hung requests.
+
+        Returns:
+            None
+        """
+
+        if self.server is None:
+            return
+
+        self.stopping.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+        self.logger.info("Stopped CoreNLP stand-in.")
+
+        return
+
+
+    def _count(self, **changes):
+        """ Adds each value in @changes to its counter and updates peak counters.
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            for key, value in changes.items():
+                self.stats[key] += value
+            for key in ["active", "waiting"]:
+                peak = "peak_" + key
+                self.stats[peak] = max(self.stats[peak], self.stats[key])
+
+        return
+
+
+    def _draw(self):
+        """ Draws the fault and the latency for one request.
+
+        Returns:
+            tuple: The return value.
+            The first item is "error", "hang", or None. The second item is the latency in
+            seconds (float).
+        """
+
+        with self.lock:
+            roll = self.random.random()
+            latency = self.latency
+            if self.latency_sigma > 0 and self.latency > 0:
+                latency = self.random.lognormvariate(math.log(self.latency),
+                        self.latency_sigma)
+
+        fault = None
+        if roll < self.error_rate:
+            fault = "error"
+        elif roll < self.error_rate + self.hang_rate:
+            fault = "hang"
+
+        return (fault, latency)
+
+
+    def handle(self, text, properties):
+        """ Handles one annotate request.
+
+        Args:
+            - text (str): The text to annotate.
+            - properties (str): The request properties as JSON or as a Python dict literal,
+            which is what pycorenlp sends.
+
+        Returns:
+            tuple: The return value.
+            The first item is the HTTP status (int). The second item is the body (str).
+        """
+
+        # if needed, wait for a free slot.
+        self._count(requests=1, characters=len(text))
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            self._count(waiting=1)
+            self.slots.acquire()
+            self._count(waiting=-1)
+        self._count(active=1)
+
+        try:
+            fault, latency = self._draw()
+            self.stopping.wait(latency + len(text) * self.per_character)
+
+            # inject faults.
+            if fault == "hang":
+                self._count(hangs=1)
+                self.stopping.wait(self.hang_seconds)
+            if fault == "error":
+                self._count(errors=1)
+                return (500, "java.lang.RuntimeException: injected error")
+
+            # annotate @text.
+            try:
+                properties = json.loads(properties)
+            except ValueError:
+                properties = ast.literal_eval(properties)
+            return (200, json.dumps(self.annotate(text, properties)))
+        except Exception as err:
+            self.logger.error(err)
+            self._count(errors=1)
+            return (500, str(err))
+        finally:
+            self._count(active=-1)
+            if self.slots is not None:
+                self.slots.release()
+
+
+    def annotate(self, text, properties=None):
+        """ Tokenizes, sentence splits, and tags @text deterministically.
+
+        Args:
+            - text (str): The text to annotate.
+            - properties (dict): The CoreNLP properties. Only "annotators" is used; if it
+            doesn't include "ner", only regexNER patterns are tagged.
+
+        Returns:
+            dict: The return value.
+            The CoreNLP JSON output with "sentences" and their "tokens".
+        """
+
+        annotators = [a.strip() for a in (properties or {}).get("annotators",
+            "tokenize, ssplit, pos, ner, regexner").split(",")]
+        use_ner = "ner" in annotators
+        lookup = {word: tag for tag, words in self.gazetteer.items() for word in words}
+
+        # tokenize @text; keep the whitespace around each token.
+        matches = list(self.token_pattern.finditer(text))
+        sentences, tokens = [], []
+        for i, match in enumerate(matches):
+            word = match.group(0)
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            before = text[matches[i - 1].end():match.start()] if i > 0 else text[
+                    :match.start()]
+            token = {"index": len(tokens) + 1, "word": word, "originalText": word,
+                    "characterOffsetBegin": match.start(), "characterOffsetEnd":
+                    match.end(), "before": before, "after": text[match.end():end]}
+
+            # tag the token.
+            tag = "O"
+            if use_ner:
+                token["pos"] = "NNP" if word[:1].isupper() else "NN"
+                tag = lookup.get(word, "NUMBER" if word.isdigit() else "O")
+            for pattern, pattern_tag in self.patterns:
+                if pattern.match(word):
+                    tag = pattern_tag
+            if use_ner or tag != "O":
+                token["ner"] = tag
+            tokens.append(token)
+
+            # end the sentence after terminal punctuation.
+            if word in [".", "!", "?"] or i + 1 == len(matches):
+                sentences.append({"index": len(sentences), "tokens": tokens})
+                tokens = []
+
+        return {"sentences": sentences}
+
+
+if __name__ == "__main__":
+    pass
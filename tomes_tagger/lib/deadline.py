@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for a per-message wall-clock time budget that is shared by
+all tagging stages and an exception for when the budget runs out.
+
+Todo:
+    * Stages that run in-process (e.g. decoding, lxml) can't be interrupted. The budget is
+    only checked between them. Blocking calls to Lynx and CoreNLP are given the time left as
+    their timeout.
+"""
+
+# import modules.
+import logging
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """ An exception raised when a message's time budget runs out. """
+
+
+    def __init__(self, stage):
+        """ Sets instance attributes.
+
+        Args:
+            - stage (str): The stage during which the time budget ran out.
+        """
+
+        self.stage = stage
+        super().__init__("Time budget ran out during stage: {}".format(stage))
+
+
+class Deadline():
+    """ A class for a per-message wall-clock time budget that is shared by all tagging
+    stages.
+
+    Example:
+        >>> deadline = Deadline(60)
+        >>> deadline.start()
+        >>> deadline.check("decode") # raises DeadlineExceeded if 60 seconds have passed.
+        >>> deadline.get_remaining() # float; the seconds left.
+        >>> deadline.stop()
+        >>> deadline.get_remaining() # None.
+    """
+
+
+    def __init__(self, seconds=None):
+        """ Sets instance attributes.
+
+        Args:
+            - seconds (float): The time budget per message. If None, there's no budget.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.seconds = seconds
+        self.expires = None
+        self.stage = None
+
+
+    def start(self):
+        """ Starts the time budget for a new message.
+
+        Returns:
+            None
+        """
+
+        if self.seconds is not None:
+            self.expires = time.monotonic() + self.seconds
+        self.stage = "start"
+
+        return
+
+
+    def stop(self):
+        """ Stops the time budget.
+
+        Returns:
+            None
+        """
+
+        self.expires = None
+        return
+
+
+    def get_remaining(self):
+        """ Returns the seconds left in the time budget.
+
+        Returns:
+            float: The return value.
+            If no time budget is running, None is returned. The value is never negative.
+        """
+
+        if self.expires is None:
+            return None
+
+        return max(0.0, self.expires - time.monotonic())
+
+
+    def is_expired(self):
+        """ Returns True if the time budget is running and has run out. Otherwise, False.
+
+        Returns:
+            bool: The return value.
+        """
+
+        return self.get_remaining() == 0.0
+
+
+    def check(self, stage):
+        """ Raises DeadlineExceeded if the time budget has run out. Otherwise, @stage is
+        remembered as the stage now running.
+
+        Args:
+            - stage (str): The name of the stage about to run.
+
+        Returns:
+            None
+
+        Raises:
+            - DeadlineExceeded: If the time budget has run out. Its stage is the stage that
+            was running when the budget ran out, not @stage.
+        """
+
+        if self.is_expired():
+            self.logger.warning("Time budget of {} seconds ran out during stage: {}".format(
+                self.seconds, self.stage))
+            raise DeadlineExceeded(self.stage)
+        self.stage = stage
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -15,8 +15,11 @@ import base64
 import logging
 import os
 import quopri
+import time
 import unicodedata
 from lxml import etree
+from tomes_tagger.lib.quoted_replies import QuotedReplies
+from tomes_tagger.lib.stage_timer import StageTimer
 
 
 class EAXSToTagged():
@@ -36,7 +39,10 @@ class EAXSToTagged():
     """
 
 
-    def __init__(self, html_converter, nlp_tagger, charset="utf-8", buffered=False):
+    def __init__(self, html_converter, nlp_tagger, charset="utf-8", buffered=False,
+            reuse_quoted=False, signature_finder=None, content_triage=None, 
+            regex_tagger=None, max_body_size=None, size_policy="head_tail", 
+            head_tail_size=100000, deadline=None, stage_timer=None, memory_probe=None):
         """ Sets instance attributes.
 
         Args:
@@ -51,6 +57,44 @@ class EAXSToTagged():
             - buffered (bool): Use True to write tagged EAXS files with buffering. Otherwise,
             use False. For more information, see: 
             http://lxml.de/api/lxml.etree.xmlfile-class.html.
+            - reuse_quoted (bool): Use True to split message bodies into replies and to reuse
+            the tagged results of quoted replies already tagged in an earlier message of the
+            same thread, either as its new text or as quoted history. Otherwise, use False.
+            For more information, see "help(quoted_replies)".
+            - signature_finder (function): Any function that accepts plain text (str) and the
+            message's <From> value (str) and returns a tuple with the text's body (str) and 
+            its trailing signature block (str). Signature blocks are written as <BlockText>
+            elements and are not passed to @nlp_tagger. If None, signatures aren't sought.
+            - content_triage (function): Any function that accepts plain text (str) and 
+            returns a tuple with a route (str) and the reason for it (str). The route "ner"
+            uses @nlp_tagger, "regex" uses @regex_tagger, and "skip" writes the text as a 
+            <BlockText> element without tagging it. If None, all text uses @nlp_tagger.
+            - regex_tagger (function): Like @nlp_tagger, but only applies pattern-based tags.
+            If None, the "regex" route falls back to @nlp_tagger.
+            - max_body_size (int): The number of characters in a message's raw <Content> 
+            above which @size_policy applies. If None, all messages are fully tagged.
+            - size_policy (str): Use "head_tail" to only decode and tag the first and last 
+            @head_tail_size characters of oversized messages. Use "regex" to tag oversized
+            messages with @regex_tagger only. Use "defer" to fully tag oversized messages
+            after all other messages; deferred messages are written last.
+            - head_tail_size (int): The number of raw characters to keep from each end of an
+            oversized message if @size_policy is "head_tail".
+            - deadline (tomes_tagger.lib.deadline.Deadline): An optional time budget that is
+            started for each message and checked between decoding, HTML conversion, NER 
+            tagging, and XML building. If it runs out, the message is left untagged. Pass the
+            same instance to @html_converter and @nlp_tagger's underlying classes so their
+            blocking calls time out with it. If None, there's no time budget.
+            - stage_timer (tomes_tagger.lib.stage_timer.StageTimer): An optional timer for
+            each tagging stage and message. If None, stages aren't timed. Each message is
+            annotated with its "index", "message_id", "transfer_encoding", "size_policy", and
+            "outcome" ("tagged", "empty", "failed", or "deadline:<stage>"), which a
+            tomes_tagger.lib.message_tracer.MessageTracer writes to its trace records.
+            - memory_probe (tomes_tagger.lib.memory_probe.MemoryProbe): An optional probe 
+            that records the memory used while tagging each message. If None, memory isn't
+            recorded.
+
+        Raises:
+            - ValueError: If @size_policy is not "head_tail", "regex", or "defer".
         """
 
         # set logger; suppress logging by default.
@@ -62,6 +106,40 @@ class EAXSToTagged():
         self.nlp_tagger = nlp_tagger
         self.charset = charset
         self.buffered = buffered
+        self.reuse_quoted = reuse_quoted
+        self.signature_finder = signature_finder
+        self.content_triage = content_triage
+        self.regex_tagger = regex_tagger
+        self.max_body_size = max_body_size
+        self.size_policy = size_policy
+        self.head_tail_size = head_tail_size
+        self.deadline = deadline
+        self.stage_timer = stage_timer
+        self.memory_probe = memory_probe
+
+        # raise error if @size_policy is unknown.
+        if self.size_policy not in ["head_tail", "regex", "defer"]:
+            msg = "Size policy '{}' must be 'head_tail', 'regex', or 'defer'.".format(
+                    self.size_policy)
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        # start with no quoted reply tracker; one is created per account.
+        self.quoted_replies = None
+
+        # start counters.
+        self._reset_stats()
+
+        # start with empty information about the message being tagged.
+        self.message_info = {}
+        self.content_size = 0
+
+        # start with no progress reporter; one can be passed per run.
+        self.reporter = None
+
+        # start counting bytes written; this is never reset so it can be exported as a
+        # monotonic counter.
+        self.bytes_written = 0
 
         # set namespace attributes.
         self.ncdcr_prefix = "ncdcr"
@@ -92,6 +170,87 @@ class EAXSToTagged():
         return xtext
 
 
+    def _reset_stats(self):
+        """ Resets the per-run counters for the optional tagging stages.
+
+        Returns:
+            None
+        """
+
+        self.signature_stats = {"signatures": 0, "characters_saved": 0}
+        self.triage_stats = {"routes": {"ner": 0, "regex": 0, "skip": 0}, 
+                "characters": {"ner": 0, "regex": 0, "skip": 0},
+                "seconds": {"ner": 0.0, "regex": 0.0, "skip": 0.0},
+                "diverted_messages": []}
+        self.size_stats = {"head_tail": [], "regex": [], "deferred": []}
+        self.deferred_messages = []
+        self.deadline_hits = []
+        if self.stage_timer is not None:
+            self.stage_timer.reset()
+        
+        return
+
+
+    def _time(self, stage):
+        """ Returns a context manager that times its block as @stage via @self.stage_timer.
+
+        Args:
+            - stage (str): The name of the stage to time.
+
+        Returns:
+            object: The return value.
+            If @self.stage_timer is None, the context manager does nothing.
+        """
+
+        if self.stage_timer is None:
+            return StageTimer.no_timing
+
+        return self.stage_timer.time(stage)
+
+
+    def _check_deadline(self, stage):
+        """ Raises DeadlineExceeded if @self.deadline has run out. See 
+        "help(tomes_tagger.lib.deadline.Deadline.check)".
+
+        Args:
+            - stage (str): The name of the stage about to run.
+
+        Returns:
+            None
+        """
+
+        if self.deadline is not None:
+            self.deadline.check(stage)
+
+        return
+
+
+    def _get_triage_results(self):
+        """ Summarizes @self.triage_stats and estimates the NER time saved by routing text 
+        away from @self.nlp_tagger. The estimate is based on this run's average NER time per
+        character.
+
+        Returns:
+            dict: The return value.
+        """
+
+        # copy counters.
+        stats = self.triage_stats
+        results = {key: dict(stats[key]) for key in ["routes", "characters", "seconds"]}
+        results["diverted_messages"] = list(stats["diverted_messages"])
+
+        # estimate time saved.
+        results["estimated_seconds_saved"] = 0.0
+        if stats["characters"]["ner"] > 0:
+            ner_rate = stats["seconds"]["ner"]/stats["characters"]["ner"]
+            diverted = stats["characters"]["regex"] + stats["characters"]["skip"]
+            spent = stats["seconds"]["regex"] + stats["seconds"]["skip"]
+            results["estimated_seconds_saved"] = round(max(0, diverted * ner_rate - spent), 
+                    3)
+
+        return results
+
+
     def _get_folder_name(self, message_el):
         """ Gets the folder name for a given <Message> element. Subfolders are preceeded by
         their parent folder name and a forward slash, e.g. 'parent/child'. 
@@ -191,6 +350,54 @@ class EAXSToTagged():
         return message_id
 
     
+    def _get_thread_id(self, message_el):
+        """ Gets the thread identifier for a given <Message> element based on its 
+        <MessageId>, <InReplyTo>, and <References> element values.
+
+        Args:
+            message_el (lxml.etree._Element): An EAXS <Message> element.
+
+        Returns:
+            str: The return value.
+        """
+
+        # get all <InReplyTo> and <References> values; allow for space-delimited values.
+        parents = {}
+        for name in ["InReplyTo", "References"]:
+            path = "{ns}:{name}".format(ns=self.ncdcr_prefix, name=name)
+            values = message_el.xpath(path, namespaces=self.ns_map)
+            values = [v.text for v in values if v.text is not None]
+            parents[name] = " ".join(values).split()
+
+        # get thread identifier.
+        message_id = self._get_message_id(message_el)
+        thread_id = self.quoted_replies.get_thread_id(message_id, parents["InReplyTo"],
+                parents["References"])
+
+        return thread_id
+
+    
+    def _get_sender(self, message_el):
+        """ Gets the <From> element value for a given <Message> element.
+
+        Args:
+            message_el (lxml.etree._Element): An EAXS <Message> element.
+
+        Returns:
+            str: The return value.
+            If no <From> value exists, None is returned.
+        """
+
+        # get <From> element value; strip leading/trailing space.
+        path = "{ns}:From".format(ns=self.ncdcr_prefix)
+        sender = message_el.xpath(path, namespaces=self.ns_map)
+        if len(sender) == 0 or sender[0].text is None:
+            return None
+        sender = sender[0].text.strip()
+
+        return sender
+
+    
     def _get_message_data(self, message_el):
         """ Gets relevant element values from the given <Message> element, @message_el.
         
@@ -249,52 +456,382 @@ class EAXSToTagged():
         return message_data
 
 
-    def _tag_message(self, content_text, transfer_encoding_text, content_type_text):
-        """ Tags a given <Message> element with a given text value (@content_text) and given
-        @transfer_encoding_text and @content_type_text values.
+    def _get_size_policy(self, content_text, allow_deferral=True):
+        """ Gets the size policy to apply to a message with the given @content_text.
 
         Args:
-            - content_text (str): The text from which to extract NER tags via 
-            @self.nlp_tagger.
+            - content_text (str): The message's raw <Content> value. See 
+            @self._get_message_data().
+            - allow_deferral (bool): Use True if oversized messages can still be deferred.
+            Otherwise, use False.
+
+        Returns:
+            str: The return value.
+            If the message isn't oversized, None is returned. If @allow_deferral is False,
+            oversized messages under the "defer" policy return "deferred".
+        """
+
+        # if the message isn't oversized, don't apply a policy.
+        if self.max_body_size is None or len(content_text) <= self.max_body_size:
+            return None
+
+        # get the policy; pattern-only tagging requires @self.regex_tagger.
+        size_policy = self.size_policy
+        if size_policy == "defer" and not allow_deferral:
+            size_policy = "deferred"
+        elif size_policy == "regex" and self.regex_tagger is None:
+            self.logger.warning("No regex tagger available; falling back to 'head_tail'.")
+            size_policy = "head_tail"
+        
+        return size_policy
+
+
+    def _get_head_tail(self, content_text, transfer_encoding_text):
+        """ Gets the first and last @self.head_tail_size characters of @content_text so that
+        each can still be decoded per @transfer_encoding_text.
+
+        Args:
+            - content_text (str): The message's raw <Content> value.
             - transfer_encoding_text (str): The message's transfer encoding value.
-            - content_type_text (str): The message's content type value.
 
         Returns:
             tuple: The return value.
-            The first item is an lxml.etree._Element: the tagged XML tree.
-            The second item is a string: the original message stripped of HTML tags and/or
-            Base64-decoded and/or decoded quoted-printable. If the messages was unaltered,
-            this value is None.
+            The first item is the head (str) and the second item is the tail (str).
         """
 
-        self.logger.info("Tagging <Message> element content.")
+        # if the head and tail would overlap, keep everything.
+        if len(content_text) <= 2 * self.head_tail_size:
+            return (content_text, "")
+
+        head = content_text[:self.head_tail_size]
+        tail = content_text[-self.head_tail_size:]
+
+        # keep whole Base64 quanta; the encoded length is always a multiple of 4.
+        if transfer_encoding_text == "base64":
+            head, tail = "".join(head.split()), "".join(tail.split())
+            head = head[:len(head) - len(head) % 4]
+            tail = tail[len(tail) % 4:]
+
+        # keep whole quoted-printable lines so that soft line breaks aren't split.
+        elif transfer_encoding_text == "quoted-printable":
+            head = head[:head.rfind("\n") + 1]
+            tail = tail[tail.find("\n") + 1:]
+
+        return (head, tail)
+
 
-        # assume that @content_text will not be altered.
-        is_stripped = False
+    def _decode_content(self, content_text, transfer_encoding_text):
+        """ Decodes Base64 or quoted-printable @content_text.
+
+        Args:
+            - content_text (str): The message's raw <Content> value.
+            - transfer_encoding_text (str): The message's transfer encoding value.
+
+        Returns:
+            tuple: The return value.
+            The first item is the decoded text (str). The second item is a boolean: True if
+            @content_text was decoded. Otherwise, False.
+        """
 
         # if needed, Base64 decode @content_text.
         if transfer_encoding_text == "base64":
-            self.logger.info("Decoding Base64 message content.")
+            self.logger.debug("Decoding Base64 message content.")
             content_text = base64.b64decode(content_text)
             content_text = content_text.decode(self.charset, errors="backslashreplace")
-            is_stripped = True
+            return (content_text, True)
 
         # if needed, decode quoted-printable text.
         if transfer_encoding_text == "quoted-printable":
-            self.logger.info("Decoding quoted-printable message content.")
+            self.logger.debug("Decoding quoted-printable message content.")
             content_text = quopri.decodestring(content_text)
             content_text = content_text.decode(self.charset, errors="backslashreplace")
-            is_stripped = True
+            return (content_text, True)
+
+        return (content_text, False)
+
+
+    def _merge_tagged(self, tagged_els):
+        """ Merges the children of each tagged XML tree in @tagged_els into the first tree.
+        Each tree's @group attribute values are offset so that they remain unique.
+
+        Args:
+            - tagged_els (list): The lxml.etree._Element trees to merge, in order.
+
+        Returns:
+            lxml.etree._Element: The return value.
+        """
+
+        # use the first tree as the root.
+        merged_el = tagged_els[0]
+        max_group = 0
+
+        # append each subsequent tree's children to @merged_el.
+        for tagged_el in tagged_els[1:]:
+
+            # get the highest group value so far.
+            for element in merged_el.iterchildren():
+                if element.get("group", "").isdigit():
+                    max_group = max(max_group, int(element.get("group")))
+
+            # preserve any leading text.
+            if tagged_el.text:
+                children = merged_el.getchildren()
+                if len(children) != 0:
+                    children[-1].tail = (children[-1].tail or "") + tagged_el.text
+                else:
+                    merged_el.text = (merged_el.text or "") + tagged_el.text
+
+            # offset group values; move children.
+            for element in tagged_el.getchildren():
+                if element.get("group", "").isdigit():
+                    element.set("group", str(int(element.get("group")) + max_group))
+                merged_el.append(element)
+
+        return merged_el
+
+
+    def _get_block_text(self, text, tagged_el=None):
+        """ Appends @text to @tagged_el as a <BlockText> element, i.e. as text that wasn't 
+        subjected to NLP.
+
+        Args:
+            - text (str): The text to append.
+            - tagged_el (lxml.etree._Element): The tagged XML tree to which to append @text.
+            If None, a new tree is created.
+
+        Returns:
+            lxml.etree._Element: The return value.
+        """
+
+        # if needed, create a new tagged XML tree.
+        if tagged_el is None:
+            tagged_el = etree.Element("{" + self.ncdcr_uri + "}Tokens", 
+                    nsmap={None: self.ncdcr_uri})
+            tagged_el.text = ""
+
+        # append @text.
+        block_el = etree.SubElement(tagged_el, "{" + self.ncdcr_uri + "}BlockText", 
+                nsmap={None: self.ncdcr_uri})
+        try:
+            block_el.text = text
+        except ValueError as err:
+            self.logger.error(err)
+            self.logger.info("Cleaning text for new <BlockText> element.")
+            block_el.text = self._legalize_xml_text(text)
+
+        return tagged_el
+
+
+    def _tag_text(self, text, sender=None):
+        """ Gets NER tags for @text via @self.nlp_tagger. If @self.signature_finder is not 
+        None, any trailing signature block is omitted from NER tagging and appended as a
+        <BlockText> element instead.
+
+        Args:
+            - text (str): The text from which to extract NER tags.
+            - sender (str): The message's <From> value.
+
+        Returns:
+            lxml.etree._Element: The return value.
+        """
+
+        # if not finding signatures, tag the whole text.
+        if self.signature_finder is None:
+            return self.nlp_tagger(text)
+
+        # if no signature is found, tag the whole text.
+        body, signature = self.signature_finder(text, sender)
+        if signature == "":
+            return self.nlp_tagger(text)
+
+        self.logger.debug("Found signature block; omitting it from NER tagging.")
+        self.signature_stats["signatures"] += 1
+        self.signature_stats["characters_saved"] += len(signature)
+        
+        # tag the body and append the signature block; if there's no body, don't tag.
+        if body.strip() != "":
+            tagged_el = self._get_block_text(signature, self.nlp_tagger(body))
+        else:
+            tagged_el = self._get_block_text(text)
+
+        return tagged_el
+
+
+    def _add_outer_space(self, tagged_el, leading_space, trailing_space):
+        """ Adds whitespace before and after the text of a tagged XML tree.
+
+        Args:
+            - tagged_el (lxml.etree._Element): The tagged XML tree to alter.
+            - leading_space (str): The whitespace to add before the tree's text.
+            - trailing_space (str): The whitespace to add after the tree's text.
+
+        Returns:
+            lxml.etree._Element: The return value.
+        """
+
+        # add @leading_space to the tree's text.
+        tagged_el.text = leading_space + (tagged_el.text or "")
+
+        # add @trailing_space to the last child's tail or, if none, to the tree's text.
+        children = tagged_el.getchildren()
+        if len(children) != 0:
+            children[-1].tail = (children[-1].tail or "") + trailing_space
+        else:
+            tagged_el.text += trailing_space
+
+        return tagged_el
+
+
+    def _tag_reply(self, text, thread_id, sender=None):
+        """ Gets NER tags for @text via @self._tag_text() unless @text was already tagged in
+        an earlier message of the same thread. Replies are matched after stripping outer
+        whitespace, so a message's new text matches its later quoted copies.
+
+        Args:
+            - text (str): The reply text from which to extract NER tags.
+            - thread_id (str): The message's thread identifier.
+            - sender (str): The reply's <From> value.
+
+        Returns:
+            lxml.etree._Element: The return value.
+        """
+
+        # split off outer whitespace.
+        stripped = text.strip()
+        leading_space = text[:len(text) - len(text.lstrip())]
+        trailing_space = text[len(leading_space) + len(stripped):]
+
+        # if there's no text, don't tag.
+        if stripped == "":
+            tagged_el = etree.Element("{" + self.ncdcr_uri + "}Tokens", 
+                    nsmap={None: self.ncdcr_uri})
+            return self._add_outer_space(tagged_el, text, "")
+
+        # reuse or tag and remember @stripped.
+        tagged = self.quoted_replies.get(thread_id, stripped)
+        if tagged is not None:
+            tagged_el = etree.fromstring(tagged)
+        else:
+            tagged_el = self._tag_text(stripped, sender)
+            self._check_deadline("ner")
+            tagged = etree.tostring(tagged_el, encoding="unicode")
+            self.quoted_replies.set(thread_id, stripped, tagged)
+
+        return self._add_outer_space(tagged_el, leading_space, trailing_space)
+
+
+    def _get_NER_tags(self, content_text, thread_id=None, sender=None):
+        """ Gets NER tags for @content_text via @self._tag_text(). If @thread_id is not 
+        None, the new reply text and each quoted reply's header block and body are tagged
+        via @self._tag_reply(), so that text already tagged in an earlier message of the
+        same thread is reused.
+
+        Args:
+            - content_text (str): The text from which to extract NER tags.
+            - thread_id (str): The message's thread identifier.
+            - sender (str): The message's <From> value.
+
+        Returns:
+            lxml.etree._Element: The return value.
+        """
+
+        # if there's no thread, tag the whole text.
+        if thread_id is None or self.quoted_replies is None:
+            return self._tag_text(content_text, sender)
+
+        # tag or reuse the new reply text so that later replies that quote it can reuse it.
+        segments = self.quoted_replies.split(content_text)
+        tagged_els = [self._tag_reply(segments[0], thread_id, sender)]
+
+        # tag or reuse the header block and body of each quoted reply.
+        for segment in segments[1:]:
+            for part in self.quoted_replies.split_header(segment):
+                if part != "":
+                    tagged_els.append(self._tag_reply(part, thread_id))
+
+        # combine results.
+        tagged_el = self._merge_tagged(tagged_els)
+        return tagged_el
+
+
+    def _tag_message(self, content_text, transfer_encoding_text, content_type_text,
+            thread_id=None, sender=None, size_policy=None):
+        """ Tags a given <Message> element with a given text value (@content_text) and given
+        @transfer_encoding_text and @content_type_text values.
+
+        Args:
+            - content_text (str): The text from which to extract NER tags via 
+            @self.nlp_tagger.
+            - transfer_encoding_text (str): The message's transfer encoding value.
+            - content_type_text (str): The message's content type value.
+            - thread_id (str): The message's thread identifier. See @self._get_NER_tags().
+            - sender (str): The message's <From> value. See @self._tag_text().
+            - size_policy (str): The size policy for oversized messages. See 
+            @self._get_size_policy().
+
+        Returns:
+            tuple: The return value.
+            The first item is an lxml.etree._Element: the tagged XML tree.
+            The second item is a string: the original message stripped of HTML tags and/or
+            Base64-decoded and/or decoded quoted-printable. If the messages was unaltered,
+            this value is None. If @size_policy is "head_tail", this value is the message's
+            decoded head and tail.
+        """
+
+        self.logger.debug("Tagging <Message> element content.")
+        self._check_deadline("decode")
+
+        # if needed, only decode the head and tail of oversized content.
+        with self._time("decode"):
+            if size_policy == "head_tail":
+                self.logger.debug("Keeping only the head and tail of oversized message "
+                        "content.")
+                head, tail = self._get_head_tail(content_text, transfer_encoding_text)
+                head = self._decode_content(head, transfer_encoding_text)[0]
+                tail = self._decode_content(tail, transfer_encoding_text)[0]
+                content_text, is_stripped = head + "\n\n" + tail, True
+            else:
+                content_text, is_stripped = self._decode_content(content_text, 
+                        transfer_encoding_text)
         
         # if needed, convert HTML in @content_text to plain text.
         if content_type_text in ["text/html", "application/xml+html"]:
-            self.logger.info("Converting HTML message content to plain text.")
-            content_text = self.html_converter(content_text)
+            self.logger.debug("Converting HTML message content to plain text.")
+            self._check_deadline("html")
+            with self._time("html"):
+                content_text = self.html_converter(content_text)
             is_stripped = True
 
-        # get NER tags.
-        self.logger.info("Tagging message content with NER.")
-        tagged_el = self.nlp_tagger(content_text)
+        # if requested, decide how to tag @content_text.
+        route = "ner"
+        if size_policy == "regex":
+            route = "regex"
+        elif self.content_triage is not None:
+            route, reason = self.content_triage(content_text)
+            if route == "regex" and self.regex_tagger is None:
+                route = "ner"
+            if route != "ner":
+                self.logger.debug("Routing message content to '%s' path: %s", route, reason)
+                self.triage_stats["diverted_messages"].append({"route": route, 
+                    "reason": reason, **self.message_info})
+        self._check_deadline(route)
+        start_time = time.perf_counter()
+
+        # get NER tags, pattern-based tags, or no tags.
+        with self._time(route):
+            if route == "skip":
+                tagged_el = self._get_block_text(content_text)
+            elif route == "regex":
+                self.logger.debug("Tagging message content with patterns only.")
+                tagged_el = self.regex_tagger(content_text)
+            else:
+                self.logger.debug("Tagging message content with NER.")
+                tagged_el = self._get_NER_tags(content_text, thread_id, sender)
+
+        # update routing counters.
+        self.triage_stats["routes"][route] += 1
+        self.triage_stats["characters"][route] += len(content_text)
+        self.triage_stats["seconds"][route] += time.perf_counter() - start_time
 
         # set value of stripped content.
         stripped_content = None
@@ -304,7 +841,7 @@ class EAXSToTagged():
         return (tagged_el, stripped_content)
 
 
-    def _update_message(self, message_el, folder_name):
+    def _update_message(self, message_el, folder_name, message_data, size_policy=None):
         """ Updates a <Message> element's value with NER-tagged content. Affixes the 
         @folder_name as a new attribute.
 
@@ -312,13 +849,17 @@ class EAXSToTagged():
             - message_el (lxml.etree._Element): An EAXS <Message> element.
             - folder_name (str): The name of the EAXS <Folder> element that contains the 
             <Message> element.
+            - message_data (tuple): The <Message> element's values. See 
+            @self._get_message_data().
+            - size_policy (str): The size policy for oversized messages. If not None, it's
+            affixed as the @SizePolicy attribute. See @self._get_size_policy().
 
         Returns:
             lxml.etree._Element: The return value.
             The updated <Message> element.
         """
         
-        self.logger.info("Updating <Message> element tree.")
+        self.logger.debug("Updating <Message> element tree.")
 
         # set new attributes and elements.
         try:
@@ -330,72 +871,96 @@ class EAXSToTagged():
         message_el.set("Processed", "false")
         message_el.set("Record", "true")
         message_el.set("Restricted", "false")
+        if size_policy is not None:
+            message_el.set("SizePolicy", size_policy)
+            self.size_stats[size_policy].append(dict(self.message_info))
         message_el.append(etree.Element("{" + self.ncdcr_uri + "}Restriction", 
             nsmap=self.ns_map))
 
-        # get relevant <Message> element data.
-        message_data = self._get_message_data(message_el)
+        # set relevant <Message> element data.
         content_text, transfer_encoding_text, content_type_text = message_data
+        self.content_size = len(content_text)
+        if self.stage_timer is not None:
+            self.stage_timer.set_message(content_type_text, len(content_text))
+            self.stage_timer.annotate(transfer_encoding=transfer_encoding_text or None,
+                    size_policy=size_policy)
 
         # if no viable <Content> sub-element exists, return the <Message> element.
         if content_text == "":
             self.logger.warning("Found empty message content; skipping message tagging.")
             return message_el
 
-        # otherwise, get NER tags and a plain text version of the message body.
-        tagged_content, stripped_content = self._tag_message(content_text, 
-                transfer_encoding_text, content_type_text)
+        # if needed, get the message's thread identifier.
+        thread_id = None
+        if self.quoted_replies is not None:
+            thread_id = self._get_thread_id(message_el)
 
-        # if PII appears to exist in the message; update the @Restricted attribute.
-        token_el = "{" + self.ncdcr_uri + "}Token"
-        for element in tagged_content.iterchildren(tag=token_el):
-            if "entity" not in element.attrib:
-                continue
-            if element.attrib["entity"][:4] == "PII.":
-                self.logger.info("Found PII tag; updating messages's @Restricted attribute.")
-                message_el.set("Restricted", "true")
-                break
+        # if needed, get the message's sender.
+        sender = None
+        if self.signature_finder is not None:
+            sender = self._get_sender(message_el)
 
-        # create a new <SingleBody> element.
-        single_body_el = etree.Element("{" + self.ncdcr_uri + "}SingleBody", 
-                nsmap=self.ns_map)
+        # get NER tags and a plain text version of the message body.
+        tagged_content, stripped_content = self._tag_message(content_text, 
+                transfer_encoding_text, content_type_text, thread_id, sender, size_policy)
 
-        # create a new <TaggedContent> element; append it to the new <SingleBody> element.
-        tagged_content_el = etree.Element("{" + self.ncdcr_uri + "}TaggedContent", 
-                nsmap=self.ns_map)
-        tagged_content = etree.tostring(tagged_content, encoding=self.charset)
-        tagged_content = tagged_content.decode(self.charset, errors="backslashreplace")
-        try:
-            tagged_content_el.text = etree.CDATA(tagged_content.strip())
-        except ValueError as err:
-            self.logger.error(err)
-            self.logger.warning("Cleaning tagged content in order to write CDATA.")
-            tagged_content = self._legalize_xml_text(tagged_content)
-            tagged_content_el.text = etree.CDATA(tagged_content.strip())
-        single_body_el.append(tagged_content_el)
-
-        # if needed, append a plain text message body to the new <SingleBody> element.
-        if stripped_content is not None:
-                stripped_content_el = etree.Element("{" + self.ncdcr_uri + 
-                        "}StrippedContent", nsmap=self.ns_map)
-                try:
-                    stripped_content_el.text = etree.CDATA(stripped_content.strip())
-                except ValueError as err:
-                    self.logger.error(err)
-                    self.logger.info("Cleaning stripped content in order to write CDATA.")
-                    stripped_content = self._legalize_xml_text(stripped_content)
-                    stripped_content_el.text = etree.CDATA(stripped_content.strip())
-                single_body_el.append(stripped_content_el)
-
-        # append the new <SingleBody> element to @message_el.
-        multi_body_tag = "{ns}:MultiBody".format(ns=self.ncdcr_prefix)
-        message_el.xpath(multi_body_tag, namespaces=self.ns_map)[0].append(single_body_el)
+        self._check_deadline("xml")
+        with self._time("xml"):
+
+            # if PII appears to exist in the message; update the @Restricted attribute.
+            token_el = "{" + self.ncdcr_uri + "}Token"
+            for element in tagged_content.iterchildren(tag=token_el):
+                if "entity" not in element.attrib:
+                    continue
+                if element.attrib["entity"][:4] == "PII.":
+                    self.logger.info("Found PII tag; updating messages's @Restricted "
+                            "attribute.")
+                    message_el.set("Restricted", "true")
+                    break
+
+            # create a new <SingleBody> element.
+            single_body_el = etree.Element("{" + self.ncdcr_uri + "}SingleBody", 
+                    nsmap=self.ns_map)
+
+            # create a new <TaggedContent> element; append it to the new <SingleBody>
+            # element.
+            tagged_content_el = etree.Element("{" + self.ncdcr_uri + "}TaggedContent", 
+                    nsmap=self.ns_map)
+            tagged_content = etree.tostring(tagged_content, encoding=self.charset)
+            tagged_content = tagged_content.decode(self.charset, errors="backslashreplace")
+            try:
+                tagged_content_el.text = etree.CDATA(tagged_content.strip())
+            except ValueError as err:
+                self.logger.error(err)
+                self.logger.warning("Cleaning tagged content in order to write CDATA.")
+                tagged_content = self._legalize_xml_text(tagged_content)
+                tagged_content_el.text = etree.CDATA(tagged_content.strip())
+            single_body_el.append(tagged_content_el)
+
+            # if needed, append a plain text message body to the new <SingleBody> element.
+            if stripped_content is not None:
+                    stripped_content_el = etree.Element("{" + self.ncdcr_uri + 
+                            "}StrippedContent", nsmap=self.ns_map)
+                    try:
+                        stripped_content_el.text = etree.CDATA(stripped_content.strip())
+                    except ValueError as err:
+                        self.logger.error(err)
+                        self.logger.info("Cleaning stripped content in order to write "
+                                "CDATA.")
+                        stripped_content = self._legalize_xml_text(stripped_content)
+                        stripped_content_el.text = etree.CDATA(stripped_content.strip())
+                    single_body_el.append(stripped_content_el)
+
+            # append the new <SingleBody> element to @message_el.
+            multi_body_tag = "{ns}:MultiBody".format(ns=self.ncdcr_prefix)
+            message_el.xpath(multi_body_tag, namespaces=self.ns_map)[0].append(
+                    single_body_el)
 
         return message_el
 
     
     def _get_tagged_messages(self, eaxs_file, total_messages, restrictions=[], 
-            inclusive=True):
+            inclusive=True, allow_deferral=True):
         """ Tags <Message> elements in a given @eaxs_file.
         
         Args:
@@ -407,6 +972,9 @@ class EAXSToTagged():
             - inclusive (bool): Use True to only tag messages whose position values are in
             @restrictions. Otherwise, use False to tag all messages except the ones listed in
             @restrictions. If @restrictions is empty, this value is ignored.
+            - allow_deferral (bool): Use True to skip oversized messages under the "defer" 
+            size policy and add their position to @self.deferred_messages. Otherwise, use 
+            False.
             
         Returns:
             generator: The return value.
@@ -428,33 +996,79 @@ class EAXSToTagged():
             
             # if @restrictions is not empty; filter results as requested.            
             if len(restrictions) != 0:
-                msg = "Skipping message {} as requested.".format(message_index)
+                msg = "Skipping message %d as requested."
                 if inclusive and message_index not in restrictions:
-                    self.logger.info(msg)
+                    self.logger.debug(msg, message_index)
+                    element.clear()
                     continue
                 elif not inclusive and message_index in restrictions:
-                    self.logger.info(msg)
+                    self.logger.debug(msg, message_index)
+                    element.clear()
                     continue
             
             # get needed values from the message element.
             message_id = self._get_message_id(element)
             folder_name = self._get_folder_name(element)
+            self.message_info = {"index": message_index, "message_id": message_id}
+            self.content_size = 0
+
+            # get relevant <Message> element data once; it's needed for the size policy.
+            with self._time("message_data"):
+                message_data = self._get_message_data(element)
+
+            # if requested, defer oversized messages until all other messages are tagged.
+            size_policy = self._get_size_policy(message_data[0], allow_deferral)
+            if size_policy == "defer":
+                self.logger.info("Deferring oversized message with id: {}".format(
+                    message_id))
+                self.deferred_messages.append(message_index)
+                element.clear()
+                continue
 
             # tag the message.
-            self.logger.info("Tagging message with id: {}".format(message_id))
+            self.logger.debug("Tagging message with id: %s", message_id)
+            if self.deadline is not None:
+                self.deadline.start()
+            if self.stage_timer is not None:
+                self.stage_timer.start_message()
+                self.stage_timer.annotate(**self.message_info)
+            if self.memory_probe is not None:
+                self.memory_probe.start_message()
+            outcome = "failed"
+            start_time = time.perf_counter()
             try:
-                tagged_message = self._update_message(element, folder_name)
+                tagged_message = self._update_message(element, folder_name, message_data,
+                        size_policy)
+                outcome = "tagged" if self.content_size != 0 else "empty"
             except Exception as err:
                 self.logger.error(err)
                 self.logger.warning("Failed to complete tagging workflow.")
                 tagged_message = None
 
-            # report on progress.
-            remaining_messages = total_messages - message_index
-            self.logger.info("Processed {} of {} messages.".format(message_index, 
-                total_messages))
-            if remaining_messages > 0:
-                self.logger.info("Messages left to process: {}".format(remaining_messages))
+                # if the time budget ran out, record the stage it ran out in.
+                if self.deadline is not None and self.deadline.is_expired():
+                    self.logger.warning("Time budget ran out for message with id: {}".format(
+                        message_id))
+                    self.deadline_hits.append({"stage": self.deadline.stage, 
+                        "seconds": self.deadline.seconds, **self.message_info})
+                    outcome = "deadline:{}".format(self.deadline.stage)
+            finally:
+                if self.deadline is not None:
+                    self.deadline.stop()
+                if self.stage_timer is not None:
+                    self.stage_timer.annotate(outcome=outcome)
+                    self.stage_timer.stop_message()
+                if self.memory_probe is not None:
+                    self.memory_probe.stop_message(self.message_info, self.content_size)
+
+            # if needed, report on progress to the live reporter.
+            if self.reporter is not None:
+                self.reporter.update(tagged_message is not None, self.content_size)
+
+            # report on progress with one summary line per message; format it lazily.
+            self.logger.info("Processed %d of %d messages: %s; %s; %d characters; %.1f ms.",
+                    message_index, total_messages, message_id, outcome, self.content_size, 
+                    (time.perf_counter() - start_time) * 1000)
             
             # yield the tagged message tuple.
             yield (message_index, message_id, tagged_message)
@@ -492,6 +1106,9 @@ class EAXSToTagged():
 
         # create placeholder for untagged messages.
         untagged_messages = []
+
+        # count bytes written to @tagged_eaxs_file on top of those already written.
+        bytes_before = self.bytes_written
         
         # open new @tagged_eaxs_file.
         with etree.xmlfile(tagged_eaxs_file, encoding=self.charset, close=True, 
@@ -515,14 +1132,20 @@ class EAXSToTagged():
                     
                     # otherwise, write message.
                     else:
-                        xfile.write(tagged_message)
+                        with self._time("write"):
+                            xfile.write(tagged_message)
                         tagged_message.clear()
+                        self.bytes_written = bytes_before + os.path.getsize(
+                                tagged_eaxs_file)
+
+        # count the complete file.
+        self.bytes_written = bytes_before + os.path.getsize(tagged_eaxs_file)
             
-            return untagged_messages
+        return untagged_messages
 
 
     def write_tagged(self, eaxs_file, tagged_eaxs_file, split=False, restrictions=[], 
-            inclusive=True):
+            inclusive=True, reporter=None):
         """ Converts an @eaxs_file to one or many tagged EAXS file/s.
             
         Args:
@@ -538,12 +1161,33 @@ class EAXSToTagged():
             - inclusive (bool): Use True to only tag messages whose position values are in
             @restrictions. Otherwise, use False to tag all messages except the ones listed in
             @restrictions. If @restrictions is empty, this value is ignored.
+            - reporter (tomes_tagger.lib.live_reporter.LiveReporter): An optional reporter
+            that is started when tagging starts, updated after each message, and stopped when
+            tagging is done.
         
         Returns:
             dict: The return type.
             The "message_count" key's value is and int, the total number of messages in 
             @eaxs_file. The "untagged_messages" key's value is a list of ints - the message
             indexes of <Message> elements that didn't make it through the tagging workflow.
+            If @self.reuse_quoted is True, the "quoted_replies" key's value is a dict with the
+            number of replies and quoted headers looked up, reused, and the number of 
+            characters not sent to @self.nlp_tagger. If @self.signature_finder is not None,
+            the "signatures" key's value is a dict with the number of signature blocks found
+            and the number of characters not sent to @self.nlp_tagger. If
+            @self.content_triage is not None, the "triage" key's value is a dict with the
+            message count, character count, and seconds spent per route, the
+            "diverted_messages" routed away from @self.nlp_tagger, and the
+            "estimated_seconds_saved". If @self.max_body_size is not None, the
+            "size_policies" key's value is a dict with the oversized messages per applied
+            size policy. If @self.deadline is not None, the "deadline_hits" key's value is a
+            list of the untagged messages whose time budget ran out and the stage it ran out
+            in. If @self.stage_timer is not None, the "stage_timing" key's value is a dict
+            with per-stage percentiles and histograms and per-message timings by content
+            type and body size. See "help(stage_timer.StageTimer.get_report)". If
+            @self.memory_probe is not None, the "memory" key's value is a dict with the
+            heaviest messages and the memory the run retained. See
+            "help(memory_probe.MemoryProbe.stop)".
 
         Raises:
             - FileNotFoundError: If @eaxs_file doesn't exist or if the containing folder for 
@@ -590,9 +1234,35 @@ class EAXSToTagged():
         global_id = self._get_global_id(eaxs_file)
         source_eaxs = os.path.basename(eaxs_file)
         
+        # reset counters.
+        self._reset_stats()
+
+        # if requested, start tracking quoted replies for this account.
+        if self.reuse_quoted:
+            self.quoted_replies = QuotedReplies()
+
+        # if requested, start recording memory use.
+        if self.memory_probe is not None:
+            self.memory_probe.start()
+
+        # if requested, start reporting on progress.
+        self.reporter = reporter
+        if self.reporter is not None:
+            self.reporter.start(eaxs_file, total_messages)
+
+        # create generator to tag all messages; tag deferred messages last.
+        def get_tagged_messages():
+
+            yield from self._get_tagged_messages(eaxs_file, total_messages, restrictions,
+                    inclusive)
+            if len(self.deferred_messages) != 0:
+                self.logger.info("Tagging {} deferred messages.".format(
+                    len(self.deferred_messages)))
+                yield from self._get_tagged_messages(eaxs_file, total_messages, 
+                        self.deferred_messages, True, allow_deferral=False)
+
         # launch generator to tag all messages.
-        tagged_messages = self._get_tagged_messages(eaxs_file, total_messages, restrictions,
-                inclusive)
+        tagged_messages = get_tagged_messages()
 
         # create placeholder dict to return.
         results = {"total_messages": total_messages, "untagged_messages": []}
@@ -625,11 +1295,60 @@ class EAXSToTagged():
             
             return results
 
-        # execute the appropriate function depending on the value of @split.
-        if split:
-            results = multi_file_writer()
-        else:
-            results = single_file_writer()
+        # write the tagged EAXS; always stop @self.reporter, even if writing fails.
+        status = "failed"
+        try:
+            # execute the appropriate function depending on the value of @split.
+            if split:
+                results = multi_file_writer()
+            else:
+                results = single_file_writer()
+
+            # if needed, report on reused quoted replies.
+            if self.quoted_replies is not None:
+                results["quoted_replies"] = self.quoted_replies.get_stats()
+                self.logger.info("Quoted reply results: {}".format(results["quoted_replies"]))
+                self.quoted_replies = None
+
+            # if needed, report on signature blocks.
+            if self.signature_finder is not None:
+                results["signatures"] = dict(self.signature_stats)
+                self.logger.info("Signature results: {}".format(results["signatures"]))
+
+            # if needed, report on content routing.
+            if self.content_triage is not None:
+                results["triage"] = self._get_triage_results()
+                self.logger.info("Triage results: {}".format({key: results["triage"][key] for
+                    key in ["routes", "estimated_seconds_saved"]}))
+
+            # if needed, report on oversized messages.
+            if self.max_body_size is not None:
+                results["size_policies"] = {key: list(value) for key, value in 
+                        self.size_stats.items()}
+                self.logger.info("Size policy results: {}".format({key: len(value) for 
+                    key, value in results["size_policies"].items()}))
+
+            # if needed, report on messages that ran out of time.
+            if self.deadline is not None:
+                results["deadline_hits"] = list(self.deadline_hits)
+                self.logger.info("Deadline hits: {}".format(len(results["deadline_hits"])))
+
+            # if needed, report on stage timings.
+            if self.stage_timer is not None:
+                results["stage_timing"] = self.stage_timer.get_report()
+                self.logger.info("Stage timing results: {}".format({key: value["total_s"] for
+                    key, value in results["stage_timing"]["stages"].items()}))
+
+            # if needed, report on memory use.
+            if self.memory_probe is not None:
+                results["memory"] = self.memory_probe.stop()
+                self.logger.info("Peak RSS: {}".format(results["memory"]["run"]["peak_rss"]))
+
+            status = "done"
+        finally:
+            if self.reporter is not None:
+                self.reporter.stop(status)
+                self.reporter = None
 
         return results
 
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 """ This module contains classes for manipulating HTML and converting HTML to plain text. 
+HTML can be converted via the Lynx browser or in-process via lxml.
 
 Todo:
     * ModifyHTML.remove_images() should probably not have a @preserve_alt option. It should be
@@ -11,13 +12,98 @@ Todo:
 import codecs
 import logging
 import os
+import re
 import subprocess
 import tempfile
+import textwrap
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+
+class StripHTML():
+    """ A class for removing non-content payloads from HTML before any DOM is built: <style>
+    and <script> elements, comments (including conditional comments), and the data in 
+    Base64 "data:" URIs. None of these affect the plain text version of the HTML.
+    
+    Example:
+        >>> strip = StripHTML()
+        >>> strip.strip("<style>p {margin: 0}</style><p>Hi<!-- x --></p>") # "<p>Hi</p>".
+        >>> strip.get_stats() # dict; the characters removed per payload type.
+    """
+
+
+    def __init__(self):
+        """ Sets instance attributes. """
+
+        # set logger; suppress logging by default. 
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set pattern; unclosed elements and comments are left alone.
+        self.payload_pattern = re.compile(r"(?P<comment><!--.*?-->)"
+                r"|(?P<element><(?P<tag>style|script)\b[^>]*>.*?</(?P=tag)\s*>)"
+                r"|(?P<data_uri>(?<=data:)[\w.+/-]+;base64,[\w+/=\r\n]+)", re.I | re.S)
+        
+        # start counters.
+        self.reset_stats()
+
+
+    def reset_stats(self):
+        """ Resets the counters for removed characters.
+
+        Returns:
+            None
+        """
+
+        self.stats = {"documents": 0, "characters": 0, "comment": 0, "style": 0, 
+                "script": 0, "data_uri": 0}
+        return
+
+
+    def get_stats(self):
+        """ Returns the counters for removed characters.
+
+        Returns:
+            dict: The return value.
+            The "characters" key's value is the total number of characters in all HTML 
+            documents. The other payload keys' values are the number of characters removed.
+        """
+
+        return dict(self.stats)
+
+
+    def strip(self, html):
+        """ Removes non-content payloads from @html in one pass.
+
+        Args:
+            - html (str): The HTML to strip.
+
+        Returns:
+            str: The return value.
+        """
+
+        self.stats["documents"] += 1
+        self.stats["characters"] += len(html)
+
+        # create function to count and remove each payload.
+        def remove(match):
+            kind = match.lastgroup
+            if kind == "element":
+                kind = match.group("tag").lower()
+            self.stats[kind] += len(match.group(0))
+            return "," if kind == "data_uri" else ""
+
+        # remove payloads.
+        html = self.payload_pattern.sub(remove, html)
+        return html
 
 
 class ModifyHTML():
-    """ A class with tools to modify the HTML DOM via BeautifulSoup.
+    """ A class with tools to modify the HTML DOM via BeautifulSoup or lxml.
     
     Example:
         >>> html = open("sample.html").read() # string.
@@ -25,6 +111,9 @@ class ModifyHTML():
         >>> html.shift_links()
         >>> html.remove_images()
         >>> html.raw() # string version of the HTML with shifted links and no images.
+        >>> html = ModifyHTML(open("sample.html").read(), "lxml.html") # lxml tree.
+        >>> html.modify() # shift links and remove images in one traversal.
+        >>> html.raw() # same as above.
     """
 
 
@@ -33,17 +122,125 @@ class ModifyHTML():
         
         Args:
             - html (str): The HTML source code to modify.
-            - parser (str): The library with which to parse @html. See: 
+            - parser (str): The library with which to parse @html. Use "lxml.html" to parse
+            @html directly with lxml. Otherwise, see: 
             "https://www.crummy.com/software/BeautifulSoup/bs4/doc/#installing-a-parser". 
+            If "lxml.html" is used and @html has no <a> or <img> tags, @html isn't parsed.
         """
 
         # set logger; suppress logging by default. 
         self.logger = logging.getLogger(__name__)
         self.logger.addHandler(logging.NullHandler())
 
+        # set attributes.
+        self.html = html
+        self.is_lxml = parser == "lxml.html"
+
         # compose BeautifulSoup object.
-        self.logger.info("Creating BeautifulSoup object.")
-        self.root = BeautifulSoup(html, parser)
+        if not self.is_lxml:
+            self.logger.debug("Creating BeautifulSoup object.")
+            self.root = BeautifulSoup(html, parser)
+            return
+
+        # if there's nothing to modify, don't parse @html.
+        if re.search(r"<(a|img)[\s/>]", html, re.I) is None:
+            self.logger.debug("Found no <a> or <img> tags; skipping DOM creation.")
+            self.root = None
+            return
+
+        # compose lxml tree; strings with an encoding declaration must be parsed as bytes.
+        self.logger.debug("Creating lxml tree.")
+        try:
+            self.root = lxml_html.document_fromstring(html)
+        except ValueError:
+            self.root = lxml_html.document_fromstring(html.encode("utf-8"))
+        except etree.ParserError as err:
+            self.logger.warning(err)
+            self.root = None
+
+
+    def _get_tags(self, *names):
+        """ Gets all tags with the given @names, in document order.
+
+        Args:
+            - names (str): The tag names to get.
+
+        Returns:
+            list: The return value.
+        """
+
+        if self.root is None:
+            return []
+        elif self.is_lxml:
+            return list(self.root.iter(*names))
+        else:
+            return self.root.find_all(list(names))
+
+
+    def _shift_link(self, a_tag):
+        """ Appends an <a> tag's "href" attribute value to its text value. See 
+        @self.shift_links().
+
+        Args:
+            - a_tag (object): The <a> tag.
+
+        Returns:
+            None
+        """
+
+        # get @href; ignore non-http|https values. 
+        href = a_tag.get("href")
+        if href is None or href[0:4].lower() != "http":
+            return
+
+        # alter the BeautifulSoup tag.
+        if not self.is_lxml:
+            if a_tag.string is not None:
+                text = a_tag.string + " [" + href + "]"  
+                a_tag.string.replace_with(text)
+            return
+
+        # like BeautifulSoup's "string", descend through lone children to the text.
+        while len(a_tag) == 1 and not (a_tag.text or "").strip() and not (
+                a_tag[0].tail or "").strip() and isinstance(a_tag[0].tag, str):
+            a_tag = a_tag[0]
+        if len(a_tag) == 0 and a_tag.text is not None:
+            a_tag.text = a_tag.text + " [" + href + "]"
+
+        return
+
+
+    def _remove_image(self, img_tag, preserve_alt=False):
+        """ Removes an <img> tag. See @self.remove_images().
+
+        Args:
+            - img_tag (object): The <img> tag.
+            - preserve_alt (bool): See @self.remove_images().
+
+        Returns:
+            None
+        """
+        
+        alt = img_tag.get("alt", "")
+
+        # alter the BeautifulSoup tree.
+        if not self.is_lxml:
+            if preserve_alt and alt != "":
+                span = BeautifulSoup.new_tag(self.root, "span")
+                span.string = "[IMAGE: " + alt + "]"
+                img_tag.insert_after(span)
+            img_tag.extract()
+            return
+
+        # alter the lxml tree; keep any text after the tag.
+        if preserve_alt and alt != "":
+            span = lxml_html.Element("span")
+            span.text = "[IMAGE: " + alt + "]"
+            span.tail, img_tag.tail = img_tag.tail, None
+            img_tag.addnext(span)
+        img_tag.drop_tree()
+
+        return
 
 
     def shift_links(self):
@@ -55,24 +252,11 @@ class ModifyHTML():
             None
         """
 
-        self.logger.info("Shifting @href values to parent <a> tags.")
+        self.logger.debug("Shifting @href values to parent <a> tags.")
 
-        # get all <a> tags.
-        a_tags = self.root.find_all("a")
-        
         # append @href values to text values.
-        for a_tag in a_tags:
-            
-            if a_tag.string is None:
-                continue
-            if "href" not in a_tag.attrs:
-                continue
-            
-            # get @href; ignore non-http|https values. 
-            href = a_tag["href"]
-            if href[0:4].lower() == "http":
-                text = a_tag.string + " [" + href + "]"  
-                a_tag.string.replace_with(text)
+        for a_tag in self._get_tags("a"):
+            self._shift_link(a_tag)
 
         return
 
@@ -89,17 +273,35 @@ class ModifyHTML():
             None
         """
         
-        self.logger.info("Removing image tags.")
+        self.logger.debug("Removing image tags.")
         
         # get all image tags; remove them.
-        img_tags = self.root.find_all("img")
-        for img_tag in img_tags:
-            if preserve_alt:
-                if "alt" in img_tag.attrs and img_tag["alt"] != "":
-                    span = BeautifulSoup.new_tag(self.root, "span")
-                    span.string = "[IMAGE: " + img_tag["alt"] + "]"
-                    img_tag.insert_after(span)
-            img_tag.extract()
+        for img_tag in self._get_tags("img"):
+            self._remove_image(img_tag, preserve_alt)
+
+        return
+
+
+    def modify(self, preserve_alt=False):
+        """ Shifts links and removes images in one traversal of the DOM. This is the same as
+        calling @self.shift_links() and then @self.remove_images().
+
+        Args:
+            - preserve_alt (bool): See @self.remove_images().
+        
+        Returns:
+            None
+        """
+        
+        self.logger.debug("Shifting @href values and removing image tags.")
+
+        # alter <a> and <img> tags in document order.
+        for tag in self._get_tags("a", "img"):
+            tag_name = tag.tag if self.is_lxml else tag.name
+            if tag_name == "a":
+                self._shift_link(tag)
+            else:
+                self._remove_image(tag, preserve_alt)
 
         return
 
@@ -111,7 +313,16 @@ class ModifyHTML():
             str: The return value.
         """
 
-        self.logger.info("Converting BeautifulSoup object to HTML string.")
+        # if no DOM was created, return the original HTML.
+        if self.root is None:
+            return self.html
+
+        if self.is_lxml:
+            self.logger.debug("Converting lxml tree to HTML string.")
+            strroot = lxml_html.tostring(self.root, encoding="unicode")
+            return strroot
+
+        self.logger.debug("Converting BeautifulSoup object to HTML string.")
         strroot = str(self.root)
         return strroot
 
@@ -126,9 +337,12 @@ class HTMLToText():
         # returns plain text version of "sample.html".
         >>> ht2.get_text("<p class='hi'>Hello World!</p>", is_raw=True)
         # returns "Hello World!" with leading/trailing line breaks.
+        >>> h2t.get_texts(["<p>Hello</p>", "<p>World!</p>"])
+        # returns a generator of plain text versions, in order.
     """
     
-    def __init__(self, lynx_command="lynx", lynx_options=None):
+    def __init__(self, lynx_command="lynx", lynx_options=None, timeout=60, use_stdin=True,
+            deadline=None, max_stdin_failures=3):
         """ Sets instance attributes.
     
         Args:
@@ -136,6 +350,15 @@ class HTMLToText():
             - lynx_options (dict): Any additional command line options for the Lynx "dump"
             command. See: 
             "http://lynx.invisible-island.net/release/lynx_help/Lynx_users_guide.html#Invoking". 
+            - timeout (int): The maximum number of seconds to wait for Lynx per document. If
+            None, there's no time limit.
+            - use_stdin (bool): Use True to pipe HTML strings to Lynx via standard input. 
+            Otherwise, use False to write them to temporary files. If piping fails, temporary
+            files are used instead.
+            - deadline (tomes_tagger.lib.deadline.Deadline): An optional per-message time
+            budget. While it's running, Lynx times out when either it or @timeout runs out.
+            - max_stdin_failures (int): The number of documents in a row that must fail to
+            pipe to Lynx but convert via a temporary file before piping is disabled.
         """
 
         # set logger; suppress logging by default. 
@@ -152,8 +375,23 @@ class HTMLToText():
                 self.lynx_options[key] = val
         self.lynx_options["dump"] = True
 
-        # start with null output folder.
+        # set subprocess options.
+        self.timeout = timeout
+        self.use_stdin = use_stdin
+        self.deadline = deadline
+        self.max_stdin_failures = max_stdin_failures
+
+        # start counting piping failures in a row; create a lock for updating it from threads.
+        self._stdin_failures = 0
+        self._stdin_lock = threading.Lock()
+
+        # start with null output folder; create a lock for creating it from threads.
         self.temp_dir = None
+        self._temp_dir_lock = threading.Lock()
+
+        # start Lynx counters; create a lock for updating them from threads.
+        self.lynx_stats = {"runs": 0, "timeouts": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
 
 
     def __del__(self):
@@ -181,8 +419,9 @@ class HTMLToText():
 
 
     def _make_temp_dir(self):
-        """ Creates a temporary folder inside the current working directory + "./_temp" in 
-        which to write temporary files for the duration of the class instance.
+        """ Creates a temporary folder in which to write temporary files for the duration of
+        the class instance. The memory-backed "/dev/shm" folder is used if it exists. 
+        Otherwise, the folder is created inside the current working directory + "./_temp".
         
         Returns:
             tempfile.TemporaryDirectory: The return value.
@@ -191,6 +430,13 @@ class HTMLToText():
             - OSError: If the container "./_temp" folder does not exist AND can't be created. 
         """
 
+        # prefer a memory-backed container folder.
+        container_dir = "/dev/shm"
+        if os.path.isdir(container_dir) and os.access(container_dir, os.W_OK):
+            temp_dir = tempfile.TemporaryDirectory(dir=container_dir)
+            self.logger.info("Created temporary HTML folder: {}".format(temp_dir.name))
+            return temp_dir
+
         # get absolute path of container folder.
         container_dir = os.path.abspath(os.getcwd())
         container_dir = os.path.join(container_dir, "_temp")
@@ -227,7 +473,8 @@ class HTMLToText():
             str: The return value.
 
         Raises:
-            - RuntimeError: If the "lynx" command can't be called successfully.
+            - RuntimeError: If the "lynx" command can't be called successfully or if Lynx 
+            times out.
         """
     
         # verify @html is a string or a file.
@@ -247,38 +494,217 @@ class HTMLToText():
             if val:
                 cli_args.append("-{}".format(key))
 
-        # is @self.temp_dir is None, update it.
-        if self.temp_dir is None:
-            self.temp_dir = self._make_temp_dir()
-
-        # if needed, write @html to a temporary file.
-        if is_raw:
-            tf_handle, tf_path = tempfile.mkstemp(dir=self.temp_dir.name, suffix=".html")
-            self.logger.info("Writing HTML to temporary file: {}".format(tf_path))
-            with codecs.open(tf_path, "w", encoding=charset) as tf:
-                tf.write(html)
-            cli_args.append(tf_path)
-        else:
-            cli_args.append(html)
+        # if @html is a file, run Lynx on it.
+        if not is_raw:
+            try:
+                text = self._run_lynx(cli_args + [html], charset=charset)
+            except subprocess.TimeoutExpired as err:
+                self.logger.error(err)
+                raise RuntimeError(err)
+            return text
+
+        # if requested, pipe @html to Lynx.
+        if self.use_stdin:
+            try:
+                text = self._run_lynx(cli_args + ["-force_html", "-stdin"], 
+                        html.encode(charset, errors="backslashreplace"), charset)
+                with self._stdin_lock:
+                    self._stdin_failures = 0
+                return text
+            except subprocess.TimeoutExpired as err:
+                self.logger.error(err)
+                raise RuntimeError(err)
+            except RuntimeError as err:
+                self.logger.error(err)
+                self.logger.warning("Couldn't pipe HTML to Lynx; falling back to temporary "
+                        "file.")
+
+        # otherwise, convert @html via a temporary file.
+        text = self._get_text_via_file(html, cli_args, charset)
+        
+        # if piping keeps failing but temporary files work, stop piping.
+        with self._stdin_lock:
+            if self.use_stdin:
+                self._stdin_failures += 1
+                if self._stdin_failures >= self.max_stdin_failures:
+                    self.logger.warning("Disabling piping HTML to Lynx after {} failures in "
+                            "a row.".format(self._stdin_failures))
+                    self.use_stdin = False
+
+        return text
+
+
+    def get_texts(self, html_docs, is_raw=True, charset="utf-8", workers=None):
+        """ Converts HTML files OR HTML strings to plain text via a bounded pool of 
+        concurrent Lynx processes. A document that can't be converted yields an empty string
+        without affecting the other documents.
+
+        Args:
+            - html_docs (iterable): The HTML files OR the raw HTML strings to convert.
+            - is_raw (bool): Use True if @html_docs are HTML strings. Otherwise, use False if
+            they are HTML file paths.
+            - charset (str): The encoding for the converted text.
+            - workers (int): The maximum number of concurrent Lynx processes. If None, the 
+            number of CPUs is used.
+
+        Returns:
+            generator: The return value.
+            The yielded data is a string, the plain text version of each item in @html_docs, 
+            in order.
+        """
+
+        # set the pool size.
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        # create function to isolate failures per document.
+        def get_text(html):
+            try:
+                return self.get_text(html, is_raw, charset)
+            except Exception as err:
+                self.logger.error(err)
+                self.logger.warning("Falling back to empty string.")
+                return ""
+
+        # keep at most twice @workers documents in flight; yield results in order.
+        self.logger.info("Converting HTML to text with {} workers.".format(workers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for html in html_docs:
+                pending.append(executor.submit(get_text, html))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while len(pending) != 0:
+                yield pending.popleft().result()
+
+        return
+
+
+    def _count(self, key):
+        """ Increments the Lynx counter @key in @self.lynx_stats. These counters are never
+        reset, so they can be exported as monotonic counters.
+
+        Args:
+            - key (str): "runs", "timeouts", or "errors".
+
+        Returns:
+            None
+        """
+
+        with self._stats_lock:
+            self.lynx_stats[key] += 1
+
+        return
+
+
+    def _get_timeout(self):
+        """ Returns the seconds to wait for Lynx: the lesser of @self.timeout and the time
+        left in @self.deadline, if it's running.
+
+        Returns:
+            float: The return value.
+            If there's no time limit, None is returned.
+        """
+
+        # get the time left for the current message, if any.
+        remaining = None
+        if self.deadline is not None:
+            remaining = self.deadline.get_remaining()
+
+        # use the lesser limit.
+        if remaining is None:
+            return self.timeout
+        elif self.timeout is None:
+            return remaining
+        
+        return min(self.timeout, remaining)
+
+
+    def _run_lynx(self, cli_args, stdin=None, charset="utf-8"):
+        """ Runs Lynx with @cli_args and returns its output.
+
+        Args:
+            - cli_args (list): The Lynx command line arguments.
+            - stdin (bytes): The optional input to pipe to Lynx.
+            - charset (str): The encoding for the converted text.
+
+        Returns:
+            str: The return value.
+
+        Raises:
+            - RuntimeError: If the "lynx" command can't be called successfully.
+            - subprocess.TimeoutExpired: If Lynx runs longer than @self.timeout or than the
+            time left in @self.deadline.
+        """
 
         # run Lynx; return its output.
         self.logger.debug("Using Lynx command line: {}".format(" ".join(cli_args)))
+        timeout = self._get_timeout()
+        self._count("runs")
         try:
-            self.logger.info("Converting HTML to text via Lynx.")
-            cmd = subprocess.run(cli_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
-                    check=True)
+            self.logger.debug("Converting HTML to text via Lynx.")
+            cmd = subprocess.run(cli_args, input=stdin, stdout=subprocess.PIPE, 
+                    stderr=subprocess.PIPE, check=True, timeout=timeout)
             text = cmd.stdout.decode(encoding=charset, errors="backslashreplace")
         except subprocess.CalledProcessError as err:
             self.logger.warning("Couldn't convert HTML. Is Lynx installed and working?")
             self.logger.error("stderr: {}".format(err.stderr))
+            self.logger.error(err)
+            self._count("errors")
+            raise RuntimeError(err)
+        except subprocess.TimeoutExpired as err:
+            self.logger.warning("Lynx timed out after {} seconds.".format(timeout))
+            self._count("timeouts")
+            raise err
+        except OSError as err:
+            self.logger.warning("Couldn't convert HTML. Is Lynx installed and working?")
+            self.logger.error(err)
+            self._count("errors")
+            raise RuntimeError(err)
+
+        return text
+
+
+    def _get_text_via_file(self, html, cli_args, charset="utf-8"):
+        """ Converts an HTML string to plain text by writing it to a temporary file and
+        running Lynx on the file.
+
+        Args:
+            - html (str): The raw HTML string to convert to text.
+            - cli_args (list): The Lynx command line arguments, excluding the file path.
+            - charset (str): The encoding for the converted text.
+
+        Returns:
+            str: The return value.
+
+        Raises:
+            - RuntimeError: If the "lynx" command can't be called successfully or if Lynx 
+            times out.
+        """
+
+        # is @self.temp_dir is None, update it.
+        with self._temp_dir_lock:
+            if self.temp_dir is None:
+                self.temp_dir = self._make_temp_dir()
+
+        # write @html to a temporary file.
+        tf_handle, tf_path = tempfile.mkstemp(dir=self.temp_dir.name, suffix=".html")
+        self.logger.debug("Writing HTML to temporary file: %s", tf_path)
+        with codecs.open(tf_path, "w", encoding=charset) as tf:
+            tf.write(html)
+
+        # run Lynx on the temporary file.
+        try:
+            text = self._run_lynx(cli_args + [tf_path], charset=charset)
+        except subprocess.TimeoutExpired as err:
             self.logger.error(err)
             raise RuntimeError(err)
           
-        # if a temporary file was made, delete it. 
+        # delete the temporary file. 
         # deletion method per: "https://www.logilab.org/blogentry/17873".
-        if is_raw:
+        finally:
             try:
-                self.logger.info("Deleting temporary file: {}".format(tf_path))
+                self.logger.debug("Deleting temporary file: %s", tf_path)
                 os.close(tf_handle)
                 os.remove(tf_path)
             except Exception as err:
@@ -288,5 +714,472 @@ class HTMLToText():
         return text
 
 
+class _TextLayout():
+    """ A class for laying out the plain text lines of one document for @LXMLToText. 
+    
+    Example:
+        >>> layout = _TextLayout(width=79)
+        >>> layout.bullet = "  * "
+        >>> layout.add_text("Hello ")
+        >>> layout.add_text("World!")
+        >>> layout.get_text() # "\n  * Hello World!\n".
+    """
+
+
+    def __init__(self, width=79):
+        """ Sets instance attributes.
+
+        Args:
+            - width (int): The maximum line length. If None, lines aren't wrapped.
+        """
+
+        # set attributes.
+        self.width = width
+        self.lines = []
+        self.words = []
+        self.indent = 0
+        self.bullet = ""
+
+
+    def add_text(self, text):
+        """ Adds inline @text to the current paragraph. """
+        
+        self.words.append(text)
+        return
+
+
+    def add_line(self, line):
+        """ Ends the current paragraph and adds @line as is. """
+
+        self.flush()
+        self.lines.append(line)
+        return
+
+
+    def add_blank(self):
+        """ Ends the current paragraph and adds a blank line unless there already is one. """
+
+        self.flush()
+        if len(self.lines) != 0 and self.lines[-1] != "":
+            self.lines.append("")
+        return
+
+
+    def flush(self):
+        """ Collapses whitespace in the current paragraph and adds it as wrapped lines. 
+        
+        Returns:
+            None
+        """
+
+        # collapse whitespace.
+        text = " ".join("".join(self.words).split())
+        self.words = []
+        if text == "" and self.bullet == "":
+            return
+
+        # wrap lines; indent lines after a bullet to the bullet's text.
+        first_indent = " " * self.indent + self.bullet
+        if self.width is None:
+            lines = [first_indent + text]
+        else:
+            lines = textwrap.wrap(text, self.width, initial_indent=first_indent, 
+                    subsequent_indent=" " * len(first_indent), break_long_words=False, 
+                    break_on_hyphens=False)
+        self.lines += lines or [first_indent.rstrip()]
+        self.indent += len(self.bullet)
+        self.bullet = ""
+
+        return
+
+
+    def get_text(self):
+        """ Returns the laid out text with a leading and trailing line break.
+
+        Returns:
+            str: The return value.
+        """
+
+        self.flush()
+        text = "\n" + "\n".join(self.lines).rstrip() + "\n"
+        return text
+
+
+class LXMLToText():
+    """ A class to convert HTML files OR strings to plain text in-process via lxml. The 
+    output approximates that of @HTMLToText, i.e. "lynx -dump -nolist -nomargins", without
+    starting an external process per document.
+    
+    Example:
+        >>> l2t = LXMLToText()
+        >>> l2t.get_text("<ul><li>Hello</li><li>World!</li></ul>", is_raw=True)
+        # returns "\n  * Hello\n  * World!\n".
+        >>> l2t.get_texts(["<p>Hello</p>", "<p>World!</p>"])
+        # returns a generator of plain text versions, in order.
+        >>> l2t.get_tree_text(lxml.html.fromstring("<p>Hello World!</p>"))
+        # returns "\nHello World!\n".
+    """
+
+
+    def __init__(self, width=79):
+        """ Sets instance attributes.
+
+        Args:
+            - width (int): The maximum line length. The default is the same as Lynx's. Table
+            rows that fit are aligned in columns; preformatted text isn't wrapped. If None, 
+            lines aren't wrapped.
+        """
+
+        # set logger; suppress logging by default. 
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.width = width
+
+        # set tag groups; paragraph tags are surrounded by blank lines.
+        self.skip_tags = {"head", "script", "style", "template", "title"}
+        self.paragraph_tags = {"address", "blockquote", "dl", "fieldset", "form", "h1", 
+                "h2", "h3", "h4", "h5", "h6", "hr", "p", "pre", "table"}
+        self.block_tags = self.paragraph_tags | {"article", "aside", "br", "caption", 
+                "center", "dd", "div", "dt", "figure", "footer", "header", "li", "main", 
+                "nav", "ol", "section", "td", "th", "tr", "ul"}
+        self.list_tags = {"ol", "ul"}
+        self.cell_tags = {"caption", "td", "th"}
+
+        # set bullets per unordered list depth.
+        self.bullets = "*+o#@-="
+
+
+    def _get_root(self, html, is_raw=True, charset="utf-8"):
+        """ Parses @html into an lxml.html tree.
+
+        Args:
+            - html (str): The HTML file OR the raw HTML string to parse.
+            - is_raw (bool): Use True if @html is an HTML string. Otherwise, use False if 
+            @html is an HTML file path.
+            - charset (str): The encoding with which to read HTML files.
+
+        Returns:
+            lxml.html.HtmlElement: The return value.
+            If @html is empty, None is returned.
+        """
+
+        # parse @html; strings with an encoding declaration must be parsed as bytes.
+        try:
+            if not is_raw:
+                parser = lxml_html.HTMLParser(encoding=charset)
+                return lxml_html.parse(html, parser=parser).getroot()
+            try:
+                return lxml_html.document_fromstring(html)
+            except ValueError:
+                return lxml_html.document_fromstring(html.encode(charset, 
+                    errors="backslashreplace"))
+        except etree.ParserError as err:
+            self.logger.warning(err)
+            return None
+
+
+    @staticmethod
+    def _walk(root):
+        """ A static method that yields "start" and "end" events for @root and each of its
+        descendants, including comments, without recursion.
+
+        Args:
+            - root (lxml.etree._Element): The tree to walk.
+
+        Returns:
+            generator: The return value.
+            The yielded data is a tuple with the event (str) and the element.
+        """
+
+        # keep a stack of elements and iterators over their children.
+        yield ("start", root)
+        stack = [(root, iter(root))]
+        while len(stack) != 0:
+            parent, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield ("end", parent)
+            else:
+                yield ("start", child)
+                stack.append((child, iter(child)))
+
+        return
+
+
+    def _format_table(self, rows):
+        """ Formats table @rows as lines. Rows are aligned in columns if they fit within 
+        @self.width. Otherwise, each row's cells are joined with a space and wrapped. 
+        
+        Args:
+            - rows (list): Each item is a list of cell texts (str).
+
+        Returns:
+            list: The return value.
+        """
+        
+        # get column widths, ignoring single cell rows such as captions.
+        widths = []
+        for row in rows:
+            if len(row) < 2:
+                continue
+            for i, cell in enumerate(row):
+                if i == len(widths):
+                    widths.append(0)
+                widths[i] = max(widths[i], len(cell))
+        is_aligned = self.width is None or sum(widths) + len(widths) - 1 <= self.width
+
+        # format each row.
+        lines = []
+        for row in rows:
+            if all([cell == "" for cell in row]):
+                continue
+            if is_aligned and len(row) > 1:
+                line = " ".join([cell.ljust(widths[i]) for i, cell in enumerate(row)])
+                lines.append(line.rstrip())
+            else:
+                layout = _TextLayout(self.width)
+                layout.add_text(" ".join([cell for cell in row if cell != ""]))
+                layout.flush()
+                lines += layout.lines
+
+        return lines
+
+
+    def _get_layout(self, root):
+        """ Walks the @root tree and lays out its text.
+
+        Args:
+            - root (lxml.html.HtmlElement): The parsed HTML document.
+
+        Returns:
+            _TextLayout: The return value.
+        """
+
+        layout = _TextLayout(self.width)
+        
+        # set counters and containers; @lists holds the tag and item count per list.
+        skip_depth, pre_depth, table_depth = 0, 0, 0
+        lists, rows, cell, pre_text = [], [], None, []
+        
+        # create function to route text to preformatted text, a table cell, or the layout.
+        def add_text(text):
+            if text is None or text == "":
+                return
+            if pre_depth > 0:
+                pre_text.append(text)
+            elif cell is not None:
+                cell.append(text)
+            elif table_depth > 0:
+                if text.strip() != "":
+                    rows.append([" ".join(text.split())])
+            else:
+                layout.add_text(text)
+            return
+
+        # create function to get the indentation for text inside the current list item.
+        get_indent = lambda depth: 0 if depth == 0 else 5 * (depth - 1) + 4
+
+        # walk the tree; text follows a start event and tails follow an end event.
+        for event, element in self._walk(root):
+
+            # handle comments and processing instructions.
+            if not isinstance(element.tag, str):
+                if event == "end" and skip_depth == 0:
+                    add_text(element.tail)
+                continue
+            tag = element.tag.split("}")[-1].lower()
+
+            # skip non-displayed elements; keep their tails.
+            if tag in self.skip_tags or skip_depth > 0:
+                skip_depth += 1 if event == "start" else -1
+                if event == "end" and skip_depth == 0:
+                    add_text(element.tail)
+                continue
+
+            # inside a table cell, blocks and nested tables are only spaces.
+            is_cell_end = tag in self.cell_tags and table_depth == 1 and event == "end"
+            if cell is not None and not is_cell_end:
+                if tag == "table":
+                    table_depth += 1 if event == "start" else -1
+                if tag in self.block_tags:
+                    add_text(" ")
+                if tag == "img" and event == "start":
+                    add_text(element.get("alt"))
+                add_text(element.text if event == "start" else element.tail)
+                continue
+
+            if event == "start":
+                
+                if tag == "pre":
+                    layout.add_blank()
+                    pre_depth += 1
+                elif tag == "table":
+                    table_depth += 1
+                    if table_depth == 1:
+                        layout.add_blank()
+                        rows = []
+                elif table_depth > 0:
+                    if tag == "tr" and table_depth == 1:
+                        rows.append([])
+                    elif tag in self.cell_tags:
+                        if tag == "caption" or len(rows) == 0:
+                            rows.append([])
+                        cell = []
+                elif tag in self.list_tags:
+                    if len(lists) == 0:
+                        layout.add_blank()
+                    else:
+                        layout.flush()
+                    lists.append([tag, 0])
+                elif tag == "li":
+                    layout.flush()
+                    depth = max(1, len(lists))
+                    layout.indent = 5 * (depth - 1)
+                    if len(lists) != 0 and lists[-1][0] == "ol":
+                        lists[-1][1] += 1
+                        layout.bullet = "{:>2}. ".format(lists[-1][1])
+                    else:
+                        layout.bullet = "  {} ".format(self.bullets[(depth - 1) % 
+                            len(self.bullets)])
+                elif tag == "br":
+                    if pre_depth > 0:
+                        add_text("\n")
+                    else:
+                        layout.flush()
+                elif tag == "hr":
+                    layout.add_blank()
+                    layout.add_line("_" * (self.width or 79))
+                elif tag in self.paragraph_tags:
+                    layout.add_blank()
+                elif tag in self.block_tags:
+                    layout.flush()
+                elif tag == "img":
+                    add_text(element.get("alt"))
+                
+                add_text(element.text)
+                continue
+
+            # handle end events.
+            if tag == "pre":
+                pre_depth -= 1
+                if pre_depth == 0:
+                    for line in "".join(pre_text).strip("\n").split("\n"):
+                        layout.add_line((" " * layout.indent + line).rstrip())
+                    pre_text = []
+                    layout.add_blank()
+            elif tag == "table":
+                table_depth -= 1
+                if table_depth == 0:
+                    for line in self._format_table(rows):
+                        layout.add_line(" " * layout.indent + line)
+                    layout.add_blank()
+            elif tag in self.cell_tags and table_depth > 0:
+                rows[-1].append(" ".join("".join(cell).split()))
+                cell = None
+            elif table_depth > 0:
+                pass
+            elif tag == "li":
+                layout.flush()
+                layout.indent = get_indent(len(lists) - 1)
+            elif tag in self.list_tags:
+                lists.pop()
+                layout.indent = get_indent(len(lists))
+                if len(lists) == 0:
+                    layout.add_blank()
+                else:
+                    layout.flush()
+            elif tag in self.paragraph_tags:
+                layout.add_blank()
+            elif tag in self.block_tags:
+                layout.flush()
+            
+            add_text(element.tail)
+
+        return layout
+
+
+    def get_text(self, html, is_raw=True, charset="utf-8"):
+        """ Converts an HTML file OR an HTML string to plain text.
+
+        Args:
+            - html (str): The HTML file OR the raw HTML string to convert to text.
+            - is_raw (bool): Use True is @html is an HTML string snippet. Otherwise, use False
+            if @html is an HTML file path.
+            - charset (str): The encoding with which to read HTML files.
+
+        Returns:
+            str: The return value.
+        """
+
+        # verify @html is a string or a file.
+        if not isinstance(html, str):
+            self.logger.error("Expected file path or string, found '{}' instead.".format(
+                type(html).__name__))
+            self.logger.warning("Falling back to empty string.""")
+            return ""   
+        if not is_raw and not os.path.isfile(html):
+            self.logger.error("Non-existant file path: {}".format(html))
+            self.logger.warning("Falling back to empty string.""")
+            return ""
+
+        # parse @html.
+        self.logger.debug("Converting HTML to text via lxml.")
+        root = self._get_root(html, is_raw, charset)
+        if root is None:
+            self.logger.warning("Falling back to empty string.""")
+            return ""
+
+        # lay out text.
+        text = self.get_tree_text(root)
+        return text
+
+
+    def get_tree_text(self, root):
+        """ Converts an already parsed HTML tree to plain text. This avoids serializing and
+        reparsing a tree altered by @ModifyHTML.
+
+        Args:
+            - root (lxml.html.HtmlElement): The parsed HTML document.
+
+        Returns:
+            str: The return value.
+        """
+
+        text = self._get_layout(root).get_text()
+        return text
+
+
+    def get_texts(self, html_docs, is_raw=True, charset="utf-8", workers=None):
+        """ Converts HTML files OR HTML strings to plain text. A document that can't be 
+        converted yields an empty string without affecting the other documents.
+
+        Args:
+            - html_docs (iterable): The HTML files OR the raw HTML strings to convert.
+            - is_raw (bool): Use True if @html_docs are HTML strings. Otherwise, use False if
+            they are HTML file paths.
+            - charset (str): The encoding with which to read HTML files.
+            - workers (int): Ignored. Conversion is in-process, so documents are converted 
+            one at a time. This exists for compatibility with @HTMLToText.get_texts().
+
+        Returns:
+            generator: The return value.
+            The yielded data is a string, the plain text version of each item in @html_docs, 
+            in order.
+        """
+
+        for html in html_docs:
+            try:
+                yield self.get_text(html, is_raw, charset)
+            except Exception as err:
+                self.logger.error(err)
+                self.logger.warning("Falling back to empty string.")
+                yield ""
+
+        return
+
+
 if __name__ == "__main__":    
     pass
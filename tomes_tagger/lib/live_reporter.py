@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for periodically reporting the progress of a tagging run to
+one or more callbacks and a callback class that atomically writes each progress snapshot to a
+JSON status file.
+
+Todo:
+    * Callbacks run in the tagging thread, so a slow callback slows tagging down. Callbacks
+    that notify remote services should hand their work off to a thread of their own.
+"""
+
+# import modules.
+import json
+import logging
+import os
+import tempfile
+import time
+
+
+class JSONStatusFile():
+    """ A callback class that atomically writes progress snapshots to a JSON status file. The
+    file is written to a temporary file in the same folder and then renamed, so readers never
+    see a partial file.
+
+    Example:
+        >>> status = JSONStatusFile("status.json")
+        >>> status({"processed_messages": 10}) # writes "status.json".
+    """
+
+
+    def __init__(self, status_file):
+        """ Sets instance attributes.
+
+        Args:
+            - status_file (str): The filepath to write to.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.status_file = status_file
+
+
+    def __call__(self, snapshot):
+        """ Writes @snapshot to @self.status_file.
+
+        Args:
+            - snapshot (dict): The progress snapshot to write.
+
+        Returns:
+            None
+        """
+
+        # write to a temporary file; replace @self.status_file with it.
+        container = os.path.dirname(os.path.abspath(self.status_file))
+        handle, temp_path = tempfile.mkstemp(dir=container, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as tf:
+                json.dump(snapshot, tf, indent=2)
+            os.replace(temp_path, self.status_file)
+        except Exception as err:
+            os.remove(temp_path)
+            raise err
+
+        return
+
+
+class LiveReporter():
+    """ A class for periodically reporting the progress of a tagging run to one or more
+    callbacks. Each callback receives a progress snapshot (dict) when the run starts, at most
+    once every @interval seconds while it runs, and when it's done.
+
+    Example:
+        >>> reporter = LiveReporter([print, JSONStatusFile("status.json")], interval=60)
+        >>> reporter.start("eaxs.xml", total_messages=100) # reports.
+        >>> reporter.add_latency(0.25) # seconds spent on one CoreNLP request.
+        >>> reporter.update(is_tagged=True, characters=2048) # reports if 60 seconds passed.
+        >>> reporter.stop() # reports; use reporter.stop("failed") if the run failed.
+    """
+
+
+    def __init__(self, callbacks, interval=60):
+        """ Sets instance attributes.
+
+        Args:
+            - callbacks (list): The functions to call with each progress snapshot (dict).
+            Exceptions raised by a callback are logged and ignored.
+            - interval (float): The minimum number of seconds between reports while a run
+            is going. Use 0 to only report when a run starts and when it's done.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.callbacks = callbacks
+        self.interval = interval
+
+        # start with an empty run.
+        self._reset("", 0)
+
+
+    def _reset(self, eaxs_file, total_messages):
+        """ Resets the counters for a new run.
+
+        Args:
+            - eaxs_file (str): The filepath for the EAXS file being tagged.
+            - total_messages (int): The total number of messages in @eaxs_file.
+
+        Returns:
+            None
+        """
+
+        self.eaxs_file = eaxs_file
+        self.total_messages = total_messages
+        self.counters = {"processed_messages": 0, "untagged_messages": 0, "characters": 0,
+                "corenlp_requests": 0, "corenlp_seconds": 0.0}
+        self.start_time = time.monotonic()
+        self.last_report = self.start_time
+        self.last_counters = dict(self.counters)
+
+        return
+
+
+    def start(self, eaxs_file, total_messages):
+        """ Starts a new run and reports it.
+
+        Args:
+            - eaxs_file (str): The filepath for the EAXS file being tagged.
+            - total_messages (int): The total number of messages in @eaxs_file.
+
+        Returns:
+            None
+        """
+
+        self._reset(eaxs_file, total_messages)
+        self.report("started")
+
+        return
+
+
+    def add_latency(self, seconds):
+        """ Adds the time spent on one CoreNLP request.
+
+        Args:
+            - seconds (float): The time spent.
+
+        Returns:
+            None
+        """
+
+        self.counters["corenlp_requests"] += 1
+        self.counters["corenlp_seconds"] += seconds
+
+        return
+
+
+    def update(self, is_tagged, characters=0):
+        """ Counts one processed message and reports if @self.interval has passed since
+        the last report.
+
+        Args:
+            - is_tagged (bool): Use True if the message was tagged. Otherwise, use False.
+            - characters (int): The length of the message's raw body.
+
+        Returns:
+            None
+        """
+
+        # update counters.
+        self.counters["processed_messages"] += 1
+        self.counters["characters"] += characters
+        if not is_tagged:
+            self.counters["untagged_messages"] += 1
+
+        # if needed, report.
+        if self.interval > 0 and time.monotonic() - self.last_report >= self.interval:
+            self.report("running")
+
+        return
+
+
+    def stop(self, status="done"):
+        """ Reports that the run is over.
+
+        Args:
+            - status (str): The final run status: "done" or, if the run raised an
+            exception, "failed".
+
+        Returns:
+            None
+        """
+
+        self.report(status)
+        return
+
+
+    def get_snapshot(self, status="running"):
+        """ Returns a progress snapshot with overall and recent rates and an estimate of the
+        time left. Recent values cover the time since the last report.
+
+        Args:
+            - status (str): The run status: "started", "running", "done", or "failed".
+
+        Returns:
+            dict: The return value.
+            Bytes are counted as the characters of raw message bodies, which are ASCII in
+            Base64 and quoted-printable bodies.
+        """
+
+        now = time.monotonic()
+        elapsed = now - self.start_time
+        recent = now - self.last_report
+        counters = self.counters
+
+        # create function to get the rate of a counter.
+        def get_rate(key, seconds, since=None):
+            value = counters[key] - (since[key] if since else 0)
+            return round(value/seconds, 3) if seconds > 0 else 0.0
+
+        # create function to get the mean CoreNLP latency.
+        def get_latency(since=None):
+            requests = counters["corenlp_requests"] - (since["corenlp_requests"] if since
+                    else 0)
+            seconds = counters["corenlp_seconds"] - (since["corenlp_seconds"] if since
+                    else 0)
+            return round(seconds * 1000/requests, 3) if requests > 0 else 0.0
+
+        # estimate the time left based on the overall message rate.
+        messages_per_second = get_rate("processed_messages", elapsed)
+        remaining_messages = max(0, self.total_messages - counters["processed_messages"])
+        eta = None
+        if status == "done":
+            eta = 0.0
+        elif messages_per_second > 0:
+            eta = round(remaining_messages/messages_per_second, 3)
+
+        snapshot = {"status": status, "eaxs_file": self.eaxs_file,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "total_messages": self.total_messages,
+                "processed_messages": counters["processed_messages"],
+                "untagged_messages": counters["untagged_messages"],
+                "bytes_read": counters["characters"],
+                "elapsed_seconds": round(elapsed, 3),
+                "messages_per_second": messages_per_second,
+                "bytes_per_second": get_rate("characters", elapsed),
+                "recent_messages_per_second": get_rate("processed_messages", recent,
+                    self.last_counters),
+                "recent_bytes_per_second": get_rate("characters", recent,
+                    self.last_counters),
+                "corenlp_requests": counters["corenlp_requests"],
+                "corenlp_mean_ms": get_latency(),
+                "recent_corenlp_mean_ms": get_latency(self.last_counters),
+                "eta_seconds": eta}
+
+        return snapshot
+
+
+    def report(self, status="running"):
+        """ Passes a progress snapshot to each callback in @self.callbacks.
+
+        Args:
+            - status (str): The run status: "started", "running", "done", or "failed".
+
+        Returns:
+            None
+        """
+
+        snapshot = self.get_snapshot(status)
+        self.logger.info("Progress: {} of {} messages; ETA: {} seconds.".format(
+            snapshot["processed_messages"], snapshot["total_messages"],
+            snapshot["eta_seconds"]))
+
+        # call each callback; don't let a failed callback stop the run.
+        for callback in self.callbacks:
+            try:
+                callback(snapshot)
+            except Exception as err:
+                self.logger.error(err)
+                self.logger.warning("Progress callback failed; continuing.")
+
+        # start the next reporting window.
+        self.last_report = time.monotonic()
+        self.last_counters = dict(self.counters)
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for recording the memory used while tagging each message and
+reporting the heaviest messages with their top allocators, plus the memory a run retained.
+
+Todo:
+    * Current RSS is read from "/proc/self/statm", so it's only available on Linux. Peak RSS
+    comes from the "resource" module, which isn't available on Windows. Missing values are
+    reported as None.
+    * Allocation tracing takes a tracemalloc snapshot before each message, which slows
+    tagging down considerably. Use it on a subset of messages or turn it off to only track
+    RSS.
+    * tracemalloc only sees memory allocated through Python. Memory that lxml allocates for
+    parsed elements, such as cleared <Message> elements still attached to their <Folder>,
+    only shows up as RSS growth.
+"""
+
+# import modules.
+import heapq
+import logging
+import os
+import sys
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class MemoryProbe():
+    """ A class for recording the memory used while tagging each message and reporting the
+    heaviest messages with their top allocators.
+
+    Messages are ranked by how much they raised the process's peak RSS, then by their peak
+    traced allocation, then by how much their RSS grew. A message that raised the peak RSS
+    is one that made the process larger than it had ever been.
+
+    Example:
+        >>> probe = MemoryProbe(top_messages=10)
+        >>> probe.start()
+        >>> probe.start_message()
+        >>> # tag a message.
+        >>> probe.stop_message({"index": 1, "message_id": "<1@nc.gov>"}, characters=2048)
+        >>> probe.stop() # dict.
+    """
+
+
+    def __init__(self, top_messages=10, top_allocators=10, trace=True, frames=5):
+        """ Sets instance attributes.
+
+        Args:
+            - top_messages (int): The number of heaviest messages to report.
+            - top_allocators (int): The number of allocators to report per message and for
+            the run.
+            - trace (bool): Use True to trace allocations with tracemalloc. Otherwise, use
+            False to only track RSS.
+            - frames (int): The number of stack frames tracemalloc keeps per allocation.
+            Allocators are reported by their innermost line.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.top_messages = top_messages
+        self.top_allocators = top_allocators
+        self.trace = trace
+        self.frames = frames
+
+        # set the multiplier for peak RSS; it's in bytes on macOS and in KB elsewhere.
+        self.maxrss_unit = 1 if sys.platform == "darwin" else 1024
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+        # start with an empty run.
+        self.heaviest = []
+        self.message = None
+        self.run_snapshot = None
+        self.is_tracing = False
+
+
+    def get_rss(self):
+        """ Returns the current resident set size in bytes.
+
+        Returns:
+            int: The return value.
+            If it can't be read, None is returned.
+        """
+
+        try:
+            with open("/proc/self/statm") as sf:
+                return int(sf.read().split()[1]) * self.page_size
+        except (OSError, IndexError, ValueError):
+            return None
+
+
+    def get_peak_rss(self):
+        """ Returns the peak resident set size of the process in bytes.
+
+        Returns:
+            int: The return value.
+            If it can't be read, None is returned.
+        """
+
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * self.maxrss_unit
+
+
+    def _get_allocators(self, snapshot, baseline):
+        """ Returns the lines that allocated the most memory between @baseline and
+        @snapshot.
+
+        Args:
+            - snapshot (tracemalloc.Snapshot): The later snapshot.
+            - baseline (tracemalloc.Snapshot): The earlier snapshot.
+
+        Returns:
+            list: The return value.
+            Each item is a dict with the "location", "size_diff" in bytes, and "count_diff".
+        """
+
+        # ignore allocations made by tracemalloc itself.
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = snapshot.filter_traces(ignore).compare_to(baseline.filter_traces(ignore),
+                "lineno")
+
+        allocators = []
+        for stat in stats[:self.top_allocators]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            allocators.append({"location": "{}:{}".format(frame.filename, frame.lineno),
+                "size_diff": stat.size_diff, "count_diff": stat.count_diff})
+
+        return allocators
+
+
+    def start(self):
+        """ Starts a run. If needed, starts tracing allocations.
+
+        Returns:
+            None
+        """
+
+        self.heaviest = []
+        self.message = None
+        self.start_rss = self.get_rss()
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self.is_tracing = True
+            self.run_snapshot = tracemalloc.take_snapshot()
+
+        return
+
+
+    def start_message(self):
+        """ Starts measuring a message.
+
+        Returns:
+            None
+        """
+
+        self.message = {"rss": self.get_rss(), "peak_rss": self.get_peak_rss()}
+        if self.trace and tracemalloc.is_tracing():
+            self.message["snapshot"] = tracemalloc.take_snapshot()
+            self.message["traced"] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        return
+
+
+    def stop_message(self, message_info, characters=0):
+        """ Stops measuring a message and keeps it if it's one of the heaviest.
+
+        Args:
+            - message_info (dict): The message's "index" and "message_id".
+            - characters (int): The length of the message's raw body.
+
+        Returns:
+            None
+        """
+
+        # verify a message is being measured.
+        if self.message is None:
+            return
+        start, self.message = self.message, None
+
+        # create function to get the difference between two values that may be None.
+        get_diff = lambda x, y: x - y if x is not None and y is not None else None
+
+        # get the RSS growth and how much the message raised the peak RSS.
+        record = {**message_info, "characters": characters,
+                "rss_delta": get_diff(self.get_rss(), start["rss"]),
+                "peak_rss_increase": get_diff(self.get_peak_rss(), start["peak_rss"]),
+                "traced_peak": None, "traced_delta": None, "allocators": []}
+        if "snapshot" in start:
+            current, peak = tracemalloc.get_traced_memory()
+            record["traced_peak"] = peak - start["traced"]
+            record["traced_delta"] = current - start["traced"]
+        rank = tuple([record[key] or 0 for key in ["peak_rss_increase", "traced_peak",
+            "rss_delta"]])
+
+        # skip messages lighter than all of the current heaviest messages.
+        if len(self.heaviest) >= self.top_messages and rank <= self.heaviest[0][0]:
+            return
+
+        # get the allocators of the memory the message kept.
+        if "snapshot" in start:
+            record["allocators"] = self._get_allocators(tracemalloc.take_snapshot(),
+                    start["snapshot"])
+
+        # keep @record; the index breaks ties so records aren't compared.
+        item = (rank, record["index"], record)
+        if len(self.heaviest) < self.top_messages:
+            heapq.heappush(self.heaviest, item)
+        else:
+            heapq.heapreplace(self.heaviest, item)
+
+        return
+
+
+    def stop(self):
+        """ Stops a run and reports on memory use. If tracing was started by self.start(),
+        it's stopped.
+
+        Returns:
+            dict: The return value.
+            The "heaviest_messages" key's value lists the heaviest messages, heaviest first.
+            The "run" key's value holds the RSS at the start and end of the run, the peak
+            RSS, and, if tracing, the allocators of the memory the run retained, such as
+            elements that weren't cleared.
+        """
+
+        run = {"start_rss": self.start_rss, "end_rss": self.get_rss(),
+                "peak_rss": self.get_peak_rss(), "retained_allocators": []}
+        if self.run_snapshot is not None and tracemalloc.is_tracing():
+            run["retained_allocators"] = self._get_allocators(tracemalloc.take_snapshot(),
+                    self.run_snapshot)
+        self.run_snapshot = None
+
+        # if started by this instance, stop tracing.
+        if self.is_tracing:
+            tracemalloc.stop()
+            self.is_tracing = False
+
+        heaviest = [record for rank, index, record in sorted(self.heaviest, reverse=True)]
+        results = {"heaviest_messages": heaviest, "run": run}
+        self.logger.info("Heaviest messages: {}".format([(record["message_id"],
+            record["characters"], record["peak_rss_increase"]) for record in heaviest]))
+
+        return results
+
+
+if __name__ == "__main__":
+    pass
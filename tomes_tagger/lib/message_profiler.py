@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for profiling the tagging of selected messages with cProfile
+and a sampling profiler. Both are labeled with the tagging stage that was running, so hot
+frames in lxml, html5lib, or json are attributed to the stage that called them.
+
+Todo:
+    * Only the tagging thread is profiled. Work done in other threads, such as concurrent
+    CoreNLP requests, shows up as time spent waiting in the stage that started it.
+    * cProfile slows tagging down several times over, so stage timings taken while profiling
+    are only useful relative to each other.
+"""
+
+# import modules.
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+from tomes_tagger.lib.stage_timer import StageTimer, _Timing
+
+
+class _ProfiledTiming(_Timing):
+    """ A context manager that labels its block with a stage while timing it. """
+
+
+    def __enter__(self):
+        self.timer.push(self.stage)
+        return super().__enter__()
+
+
+    def __exit__(self, *args):
+        super().__exit__(*args)
+        self.timer.pop()
+        return False
+
+
+class MessageProfiler(StageTimer):
+    """ A class for profiling the tagging of the first @max_messages messages or a random
+    @sample_rate share of them. It's a tomes_tagger.lib.stage_timer.StageTimer, so it can be
+    passed anywhere a StageTimer can; stage timings are kept for all messages as usual.
+
+    Each profiled message is run under cProfile, with one profile per stage, and under a
+    sampling profiler that records the stack of the tagging thread every @interval seconds.
+    Sampled stacks are rooted at their stage labels (ex: "[ner];[ner.corenlp];...").
+
+    Example:
+        >>> profiler = MessageProfiler(max_messages=100)
+        >>> profiler.start_message()
+        >>> with profiler.time("html"):
+        >>>     pass # convert HTML.
+        >>> profiler.stop_message()
+        >>> profiler.write_profile("profile")
+        # writes "profile.pstats", "profile.html.pstats", and "profile.collapsed".
+    """
+
+
+    def __init__(self, max_messages=None, sample_rate=None, interval=0.005, seed=0):
+        """ Sets instance attributes.
+
+        Args:
+            - max_messages (int): The number of messages to profile, starting with the
+            first. If None, there's no limit.
+            - sample_rate (float): The share of messages to profile, chosen at random. If
+            None, every message is eligible.
+            - interval (float): The seconds between stack samples.
+            - seed (int): The random seed for @sample_rate.
+        """
+
+        # set attributes.
+        self.max_messages = max_messages
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.random = random.Random(seed)
+        self.thread_id = None
+        self.sampler = None
+        self.stopping = threading.Event()
+
+        super().__init__()
+
+
+    def reset(self):
+        """ Resets all timings and profiles.
+
+        Returns:
+            None
+        """
+
+        super().reset()
+        self.profiles = {}
+        self.stacks = {}
+        self.labels = ()
+        self.profiled_messages = 0
+        self.is_profiling = False
+
+        return
+
+
+    def time(self, stage):
+        """ Returns a context manager that times its block as @stage and, if a message is
+        being profiled, labels its profile with @stage. See "help(StageTimer.time)". """
+
+        return _ProfiledTiming(self, stage)
+
+
+    def _switch(self, labels):
+        """ Stops profiling the current stage and starts profiling the last stage in
+        @labels.
+
+        Args:
+            - labels (tuple): The stages that are running, from outermost to innermost.
+
+        Returns:
+            None
+        """
+
+        if self.is_profiling and len(self.labels) != 0:
+            self.profiles[self.labels[-1]].disable()
+        self.labels = labels
+        if self.is_profiling:
+            if labels[-1] not in self.profiles:
+                self.profiles[labels[-1]] = cProfile.Profile()
+            self.profiles[labels[-1]].enable()
+
+        return
+
+
+    def push(self, stage):
+        """ Starts labeling the profile with @stage.
+
+        Args:
+            - stage (str): The name of the stage.
+
+        Returns:
+            None
+        """
+
+        self._switch(self.labels + (stage,))
+        return
+
+
+    def pop(self):
+        """ Stops labeling the profile with the innermost stage.
+
+        Returns:
+            None
+        """
+
+        self._switch(self.labels[:-1] or ("message",))
+        return
+
+
+    def _sample(self):
+        """ Records the stack of the tagging thread every @self.interval seconds until
+        @self.stopping is set.
+
+        Returns:
+            None
+        """
+
+        while not self.stopping.wait(self.interval):
+            if not self.is_profiling:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            labels = self.labels
+
+            # build the stack from the outermost frame; ";" separates frames.
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append("{}:{}".format(os.path.basename(code.co_filename),
+                    code.co_name).replace(";", ","))
+                frame = frame.f_back
+            stack = ";".join(["[{}]".format(label) for label in labels] + names[::-1])
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+        return
+
+
+    def start_message(self):
+        """ Starts timing a message and, if it's selected, profiling it. See
+        "help(StageTimer.start_message)". """
+
+        super().start_message()
+
+        # decide whether to profile the message.
+        if self.max_messages is not None and self.profiled_messages >= self.max_messages:
+            return
+        if self.sample_rate is not None and self.random.random() >= self.sample_rate:
+            return
+
+        # if needed, start the sampling profiler.
+        if self.sampler is None:
+            self.thread_id = threading.get_ident()
+            self.stopping.clear()
+            self.sampler = threading.Thread(target=self._sample, daemon=True)
+            self.sampler.start()
+
+        self.profiled_messages += 1
+        self.labels = ()
+        self.is_profiling = True
+        self._switch(("message",))
+
+        return
+
+
+    def stop_message(self):
+        """ Stops timing and profiling a message. See "help(StageTimer.stop_message)". """
+
+        if self.is_profiling:
+            self.profiles[self.labels[-1]].disable()
+            self.is_profiling = False
+        self.labels = ()
+        super().stop_message()
+
+        return
+
+
+    def stop(self):
+        """ Stops the sampling profiler.
+
+        Returns:
+            None
+        """
+
+        if self.sampler is not None:
+            self.stopping.set()
+            self.sampler.join()
+            self.sampler = None
+
+        return
+
+
+    def write_profile(self, profile_prefix):
+        """ Stops the sampling profiler and writes the profiles.
+
+        Args:
+            - profile_prefix (str): The filepath prefix to write to. "@profile_prefix.pstats"
+            holds all stages, "@profile_prefix.<stage>.pstats" holds one stage, and
+            "@profile_prefix.collapsed" holds the sampled stacks in the collapsed format read
+            by flamegraph tools (ex: "flamegraph.pl", "speedscope", "inferno").
+
+        Returns:
+            list: The return value.
+            The filepaths written.
+        """
+
+        self.stop()
+        self.logger.info("Writing profiles for {} messages: {}".format(
+            self.profiled_messages, profile_prefix))
+
+        # write one pstats file per stage and one for all stages.
+        written = []
+        profiles = [(stage, profile) for stage, profile in sorted(self.profiles.items())
+                if profile.getstats()]
+        for stage, profile in profiles:
+            profile.dump_stats("{}.{}.pstats".format(profile_prefix, stage))
+            written.append("{}.{}.pstats".format(profile_prefix, stage))
+        if len(profiles) != 0:
+            stats = pstats.Stats(*[profile for stage, profile in profiles])
+            stats.dump_stats(profile_prefix + ".pstats")
+            written.insert(0, profile_prefix + ".pstats")
+
+        # write the sampled stacks.
+        with open(profile_prefix + ".collapsed", "w", encoding="utf-8") as pf:
+            for stack, count in sorted(self.stacks.items()):
+                pf.write("{} {}\n".format(stack, count))
+        written.append(profile_prefix + ".collapsed")
+
+        return written
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for writing one trace record per tagged message to a JSONL
+file. Each record holds the message's identifiers, body size, content type, and outcome, the
+spans of each tagging stage, and the CoreNLP requests, chunks, and retries it took.
+
+Todo:
+    * Records are written by a background thread. If it falls behind by @max_queue records,
+    tagging waits for it.
+    * Span start times are relative to the start of their message, so records from different
+    runs can be compared directly. Use the "timestamp" and "run_id" keys to order or group
+    them.
+"""
+
+# import modules.
+import json
+import queue
+import threading
+import time
+import uuid
+from tomes_tagger.lib.stage_timer import StageTimer
+
+
+class MessageTracer(StageTimer):
+    """ A class for writing one trace record per tagged message to a JSONL file. It's a
+    tomes_tagger.lib.stage_timer.StageTimer, so it can be passed anywhere a StageTimer can;
+    stage timings are kept for all messages as usual.
+
+    Example:
+        >>> tracer = MessageTracer("trace.jsonl")
+        >>> tracer.start_message()
+        >>> tracer.annotate(index=1, message_id="<1@nc.gov>")
+        >>> with tracer.time("ner"):
+        >>>     tracer.add_request(0.25, is_error=False) # one CoreNLP request.
+        >>>     tracer.add_chunks(chunks=1, retries=0)
+        >>> tracer.annotate(outcome="tagged")
+        >>> tracer.stop_message() # queues the record.
+        >>> tracer.close() # dict; writes all queued records.
+    """
+
+
+    def __init__(self, trace_file, max_queue=10000):
+        """ Sets instance attributes.
+
+        Args:
+            - trace_file (str): The JSONL filepath to append records to.
+            - max_queue (int): The number of records that can wait to be written before
+            tagging waits for the writer.
+        """
+
+        # set attributes.
+        self.trace_file = trace_file
+        self.records = queue.Queue(maxsize=max_queue)
+        self.writer = None
+        self.written = 0
+        self.lock = threading.Lock()
+
+        super().__init__()
+
+
+    def reset(self):
+        """ Resets all timings and starts a new run.
+
+        Returns:
+            None
+        """
+
+        super().reset()
+        self.run_id = uuid.uuid4().hex
+
+        return
+
+
+    def add(self, stage, seconds):
+        """ Adds a timing of @seconds to @stage and, if a message is being timed, adds a span
+        to it. See "help(StageTimer.add)". """
+
+        super().add(stage, seconds)
+
+        # add a span that ended now; times are relative to the start of the message.
+        if self.message is not None and stage != "message":
+            start = time.perf_counter() - seconds - self.message["start_time"]
+            self.message["spans"].append({"stage": stage,
+                "start_ms": round(start * 1000, 3), "duration_ms": round(seconds * 1000, 3)})
+
+        return
+
+
+    def add_request(self, seconds, is_error):
+        """ Adds a CoreNLP request to the message being timed. This can be passed as the
+        @request_hook of a tomes_tagger.lib.text_to_nlp.TextToNLP.
+
+        Args:
+            - seconds (float): The seconds spent on the request.
+            - is_error (bool): Use True if the request failed. Otherwise, use False.
+
+        Returns:
+            None
+        """
+
+        # requests may come from several threads at once.
+        with self.lock:
+            if self.message is not None:
+                corenlp = self.message["corenlp"]
+                corenlp["requests"] += 1
+                corenlp["errors"] += int(is_error)
+                corenlp["seconds"] += seconds
+
+        return
+
+
+    def add_chunks(self, chunks, retries):
+        """ Adds the CoreNLP chunks and retries for one text to the message being timed. This
+        can be passed as the @chunk_hook of a tomes_tagger.lib.text_to_nlp.TextToNLP.
+
+        Args:
+            - chunks (int): The number of chunks the text was sent in.
+            - retries (int): The number of retries made for the chunks.
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            if self.message is not None:
+                self.message["corenlp"]["chunks"] += chunks
+                self.message["corenlp"]["retries"] += retries
+
+        return
+
+
+    def start_message(self):
+        """ Starts timing and tracing a message. See "help(StageTimer.start_message)". """
+
+        super().start_message()
+        self.message["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        self.message["spans"] = []
+        self.message["corenlp"] = {"requests": 0, "errors": 0, "chunks": 0, "retries": 0,
+                "seconds": 0.0}
+
+        return
+
+
+    def stop_message(self):
+        """ Stops timing a message and queues its trace record. See
+        "help(StageTimer.stop_message)". """
+
+        with self.lock:
+            message = self.message
+            stop_time = time.perf_counter()
+            super().stop_message()
+
+        # verify a message was being timed.
+        if message is None:
+            return
+
+        # build the record; the start time isn't meaningful outside of this process.
+        record = {"run_id": self.run_id, **message}
+        record["duration_ms"] = round((stop_time - record.pop("start_time")) * 1000, 3)
+        record["corenlp"]["seconds"] = round(record["corenlp"]["seconds"], 6)
+
+        # if needed, start the writer; queue the record.
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write, daemon=True)
+            self.writer.start()
+        self.records.put(record)
+
+        return
+
+
+    def _write(self):
+        """ Appends queued records to @self.trace_file until None is queued.
+
+        Returns:
+            None
+        """
+
+        with open(self.trace_file, "a", encoding="utf-8") as tf:
+            while True:
+                record = self.records.get()
+                if record is None:
+                    break
+                try:
+                    tf.write(json.dumps(record, default=str) + "\n")
+                    self.written += 1
+                except Exception as err:
+                    self.logger.error(err)
+                    self.logger.warning("Failed to write trace record; continuing.")
+
+                # flush once the queue is empty, so finished messages show up promptly.
+                if self.records.empty():
+                    tf.flush()
+
+        return
+
+
+    def close(self):
+        """ Waits for all queued records to be written and stops the writer.
+
+        Returns:
+            dict: The return value.
+            The "trace_file", the "run_id" of the current run, and the number of "records"
+            written since the last call to self.close().
+        """
+
+        if self.writer is not None:
+            self.records.put(None)
+            self.writer.join()
+            self.writer = None
+
+        results = {"trace_file": self.trace_file, "run_id": self.run_id,
+                "records": self.written}
+        self.logger.info("Wrote {} trace records to: {}".format(self.written,
+            self.trace_file))
+        self.written = 0
+
+        return results
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for probing a CoreNLP server with sample texts at increasing
+concurrency and chunk sizes, finding the point past which more concurrency stops paying off,
+and writing a recommended config that tomes_tagger.tagger.Tagger can load.
+
+Texts are tagged one after another, as Tagger does, and concurrency is the number of chunks
+of one text sent at once, i.e. the "workers" option of TextToNLP. So only texts longer than
+the chunk size gain from concurrency; if your messages are shorter, expect 1 worker to be
+recommended.
+
+Todo:
+    * Smaller chunks are split on whitespace, not sentence boundaries, so a sentence can be
+    cut in two. Keep the smallest chunk size under test large enough for your message mix.
+    * Results depend on the server's load at the time of the probe. Tune against a server
+    that isn't tagging anything else.
+"""
+
+# import modules.
+import json
+import logging
+import threading
+import time
+from tomes_tagger.lib.text_to_nlp import TextToNLP
+
+
+class NLPAutotuner():
+    """ A class for probing a CoreNLP server with sample texts at increasing concurrency and
+    chunk sizes and recommending the fastest setting that stays under an error rate.
+
+    Example:
+        >>> tuner = NLPAutotuner("http://localhost:9003")
+        >>> results = tuner.tune([open("long_message.txt").read()] * 10) # dict.
+        >>> results["recommended"] # {"chunk_size": 10000, "workers": 4, ...}.
+        >>> tuner.write_config("nlp_config.json", results)
+        >>> tagger = Tagger("http://localhost:9003", nlp_config="nlp_config.json")
+    """
+
+
+    def __init__(self, host, chunk_sizes=[5000, 10000, 25000, 50000],
+            concurrency=[1, 2, 4, 8, 16], min_gain=0.1, max_error_rate=0.01):
+        """ Sets instance attributes.
+
+        Args:
+            - host (str): The URL for the CoreNLP server (ex: "http://localhost:9003").
+            - chunk_sizes (list): The chunk sizes to try. See "help(TextToNLP)".
+            - concurrency (list): The numbers of chunks of one text to send at once to try,
+            in ascending order. See the @workers option of TextToNLP.
+            - min_gain (float): The minimum relative throughput gain required to keep
+            raising concurrency. For example, 0.1 stops once a step adds less than 10%.
+            - max_error_rate (float): The maximum share of failed requests for a setting to
+            be recommended. Probing stops at the first setting above it.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.host = host
+        self.chunk_sizes = chunk_sizes
+        self.concurrency = sorted(concurrency)
+        self.min_gain = min_gain
+        self.max_error_rate = max_error_rate
+
+
+    def probe(self, texts, chunk_size, concurrency):
+        """ Tags @texts one after another with up to @concurrency chunks of each text in 
+        flight and measures throughput. This is how Tagger runs with a config of 
+        @chunk_size and @concurrency workers.
+
+        Args:
+            - texts (list): The sample texts to tag.
+            - chunk_size (int): The maximum string length to send to CoreNLP at once.
+            - concurrency (int): The maximum number of chunks of one text to send at once.
+
+        Returns:
+            dict: The return value.
+            Throughput is in characters per second. Failed requests include retries and
+            requests that returned no tokens.
+        """
+
+        lock = threading.Lock()
+        latencies, counters = [], {"errors": 0, "empty": 0}
+
+        # create function to record each CoreNLP request.
+        def request_hook(seconds, is_error):
+            with lock:
+                latencies.append(seconds)
+                counters["errors"] += 1 if is_error else 0
+
+        # tag @texts in order; count empty results.
+        t2n = TextToNLP(self.host, chunk_size=chunk_size, retry=False,
+                request_hook=request_hook, workers=concurrency)
+        self.logger.info("Probing chunk size {} with concurrency {}.".format(chunk_size,
+            concurrency))
+        start_time = time.perf_counter()
+        try:
+            for text in texts:
+                if len(t2n.get_NER(text)) == 0:
+                    counters["empty"] += 1
+        finally:
+            t2n.close()
+        seconds = time.perf_counter() - start_time
+
+        # summarize results.
+        characters = sum([len(text) for text in texts])
+        requests = len(latencies)
+        failures = max(counters["errors"], counters["empty"])
+        latencies.sort()
+        results = {"chunk_size": chunk_size, "concurrency": concurrency,
+                "texts": len(texts), "characters": characters, "requests": requests,
+                "seconds": round(seconds, 3),
+                "characters_per_second": round(characters/seconds, 3) if seconds > 0 else
+                    0.0,
+                "error_rate": round(failures/max(requests, 1), 4),
+                "mean_ms": round(sum(latencies) * 1000/requests, 3) if requests > 0 else
+                    0.0,
+                "p90_ms": round(latencies[int(0.9 * (requests - 1))] * 1000, 3) if
+                    requests > 0 else 0.0}
+
+        return results
+
+
+    def find_knee(self, probes):
+        """ Finds the lowest concurrency after which throughput stops growing by at least
+        @self.min_gain, ignoring probes above @self.max_error_rate.
+
+        Args:
+            - probes (list): The results of self.probe() for one chunk size, in ascending
+            order of concurrency.
+
+        Returns:
+            dict: The return value.
+            The probe at the knee. If no probe is under @self.max_error_rate, None is
+            returned.
+        """
+
+        knee = None
+        for probe in probes:
+            if probe["error_rate"] > self.max_error_rate:
+                break
+            if knee is not None and probe["characters_per_second"] < (
+                    knee["characters_per_second"] * (1 + self.min_gain)):
+                break
+            knee = probe
+
+        return knee
+
+
+    def tune(self, texts):
+        """ Probes each chunk size at increasing concurrency and recommends the setting with
+        the highest throughput at its knee.
+
+        Args:
+            - texts (list): The sample texts to tag.
+
+        Returns:
+            dict: The return value.
+            The "recommended" key holds the "chunk_size", "workers", and throughput of the
+            best setting, or None if every setting failed. The "probes" key holds all
+            probe results.
+
+        Raises:
+            - ValueError: If @texts is empty.
+        """
+
+        # verify @texts isn't empty.
+        texts = [text for text in texts if len(text.strip()) > 0]
+        if len(texts) == 0:
+            msg = "Argument @texts must contain at least one non-empty text."
+            raise ValueError(msg)
+        if max([len(text) for text in texts]) <= min(self.chunk_sizes):
+            self.logger.warning("No text is longer than the smallest chunk size; "
+                    "concurrency won't make a difference.")
+
+        # probe each chunk size; stop raising concurrency once gains level off.
+        all_probes, knees = [], []
+        for chunk_size in self.chunk_sizes:
+            probes = []
+            for concurrency in self.concurrency:
+                probes.append(self.probe(texts, chunk_size, concurrency))
+                if self.find_knee(probes) is not probes[-1]:
+                    break
+            all_probes += probes
+            knee = self.find_knee(probes)
+            if knee is not None:
+                knees.append(knee)
+
+        # recommend the fastest knee; prefer fewer workers and larger chunks on ties.
+        recommended = None
+        if len(knees) != 0:
+            best = max(knees, key=lambda knee: (knee["characters_per_second"],
+                -knee["concurrency"], knee["chunk_size"]))
+            recommended = {"chunk_size": best["chunk_size"], "workers": best["concurrency"],
+                    "characters_per_second": best["characters_per_second"],
+                    "error_rate": best["error_rate"]}
+            self.logger.info("Recommended config: {}".format(recommended))
+        else:
+            self.logger.warning("No setting stayed under the maximum error rate.")
+
+        return {"host": self.host, "recommended": recommended, "probes": all_probes}
+
+
+    @staticmethod
+    def write_config(config_file, results):
+        """ Writes the recommended setting in @results to @config_file as JSON.
+
+        Args:
+            - config_file (str): The filepath to write to.
+            - results (dict): The return value of self.tune().
+
+        Returns:
+            None
+
+        Raises:
+            - ValueError: If @results has no recommended setting.
+        """
+
+        # verify there's a setting to write.
+        if results["recommended"] is None:
+            msg = "No recommended setting to write."
+            raise ValueError(msg)
+
+        config = {"chunk_size": results["recommended"]["chunk_size"],
+                "workers": results["recommended"]["workers"], "host": results["host"],
+                "tuned": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "probes": results["probes"]}
+        with open(config_file, "w", encoding="utf-8") as cf:
+            json.dump(config, cf, indent=2)
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -134,7 +134,7 @@ class NLPToXML():
             lxml.etree._Element: The return value.
         """
 
-        self.logger.info("Converting NER list to a tagged XML message.")
+        self.logger.debug("Converting NER list to a tagged XML message.")
 
         # create root element.
         tagged_el = etree.Element("{" + self.ns_uri + "}Tokens",
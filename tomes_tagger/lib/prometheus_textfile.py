@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for keeping tagging metrics and writing them to a
+Prometheus textfile collector ".prom" file. There's no network listener; the file is
+rewritten atomically each time it's written.
+
+Todo:
+    * Metrics are kept per process. If several processes tag into the same textfile
+    collector folder, give each one its own ".prom" file.
+"""
+
+# import modules.
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+
+
+class PrometheusTextfile():
+    """ A class for keeping tagging metrics and writing them to a Prometheus textfile
+    collector ".prom" file. An instance can be used as a callback for
+    tomes_tagger.lib.live_reporter.LiveReporter, in which case message and byte counters are
+    taken from each progress snapshot and the file is written each time a snapshot arrives.
+
+    Example:
+        >>> metrics = PrometheusTextfile("tagger.prom")
+        >>> metrics.add_counter("lynx_runs_total", "Lynx invocations.")
+        >>> metrics.inc("lynx_runs_total")
+        >>> metrics.add_histogram("corenlp_request_seconds", "CoreNLP request latency.")
+        >>> metrics.observe("corenlp_request_seconds", 0.25)
+        >>> metrics.write() # writes "tagger.prom".
+    """
+
+    # the default histogram bucket upper bounds in seconds.
+    buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+
+    def __init__(self, prom_file, namespace="tomes_tagger", collector=None):
+        """ Sets instance attributes.
+
+        Args:
+            - prom_file (str): The filepath to write to. It should end in ".prom".
+            - namespace (str): The prefix for each metric name.
+            - collector (function): An optional function that accepts this instance and
+            updates metrics from other sources. It's called before each write.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.prom_file = prom_file
+        self.namespace = namespace
+        self.collector = collector
+        self.metrics = OrderedDict()
+
+        # add metrics taken from progress snapshots.
+        self.add_counter("messages_tagged_total", "Messages tagged.")
+        self.add_counter("messages_untagged_total",
+                "Messages that failed to finish the tagging workflow.")
+        self.add_counter("bytes_read_total", "Characters of raw message bodies read.")
+        self.add_gauge("queue_depth", "Items waiting to be processed, per queue.")
+        self.last_snapshot = None
+
+
+    def _add(self, name, metric_type, help_text, buckets=None):
+        """ Adds a metric named @name if it doesn't exist yet.
+
+        Args:
+            - name (str): The metric name, without @self.namespace.
+            - metric_type (str): "counter", "gauge", or "histogram".
+            - help_text (str): The metric description.
+            - buckets (list): The histogram bucket upper bounds. Ignored for other types.
+
+        Returns:
+            None
+        """
+
+        if name not in self.metrics:
+            self.metrics[name] = {"type": metric_type, "help": help_text, "values": {},
+                    "buckets": buckets}
+        return
+
+
+    def add_counter(self, name, help_text):
+        """ Adds a counter named @name. See self._add(). """
+
+        self._add(name, "counter", help_text)
+        return
+
+
+    def add_gauge(self, name, help_text):
+        """ Adds a gauge named @name. See self._add(). """
+
+        self._add(name, "gauge", help_text)
+        return
+
+
+    def add_histogram(self, name, help_text, buckets=None):
+        """ Adds a histogram named @name. See self._add(). If @buckets is None,
+        @self.buckets is used. """
+
+        self._add(name, "histogram", help_text, buckets or self.buckets)
+        return
+
+
+    @staticmethod
+    def _get_labels(labels):
+        """ Returns @labels as a hashable, sorted tuple of (name, value) pairs.
+
+        Args:
+            - labels (dict): The label names and values.
+
+        Returns:
+            tuple: The return value.
+        """
+
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+    def inc(self, name, value=1, **labels):
+        """ Increments the counter or gauge @name by @value.
+
+        Args:
+            - name (str): The metric name.
+            - value (float): The amount to add.
+            - **labels: Any labels for the value.
+
+        Returns:
+            None
+        """
+
+        values = self.metrics[name]["values"]
+        key = self._get_labels(labels)
+        values[key] = values.get(key, 0) + value
+
+        return
+
+
+    def set(self, name, value, **labels):
+        """ Sets the gauge @name to @value. This can also set a counter to a value taken from
+        another, already monotonic, counter.
+
+        Args:
+            - name (str): The metric name.
+            - value (float): The value.
+            - **labels: Any labels for the value.
+
+        Returns:
+            None
+        """
+
+        self.metrics[name]["values"][self._get_labels(labels)] = value
+        return
+
+
+    def observe(self, name, value, **labels):
+        """ Adds @value to the histogram @name.
+
+        Args:
+            - name (str): The metric name.
+            - value (float): The observed value.
+            - **labels: Any labels for the value.
+
+        Returns:
+            None
+        """
+
+        # if needed, start the histogram's counters for @labels.
+        metric = self.metrics[name]
+        key = self._get_labels(labels)
+        if key not in metric["values"]:
+            metric["values"][key] = {"counts": [0] * len(metric["buckets"]), "sum": 0.0,
+                    "count": 0}
+
+        # update counters; buckets are cumulative when rendered.
+        histogram = metric["values"][key]
+        histogram["sum"] += value
+        histogram["count"] += 1
+        for i, bound in enumerate(metric["buckets"]):
+            if value <= bound:
+                histogram["counts"][i] += 1
+                break
+
+        return
+
+
+    def _format_labels(self, labels, extra=()):
+        """ Formats @labels and @extra labels for the exposition format.
+
+        Args:
+            - labels (tuple): The (name, value) pairs.
+            - extra (tuple): Additional (name, value) pairs.
+
+        Returns:
+            str: The return value.
+        """
+
+        pairs = list(labels) + list(extra)
+        if len(pairs) == 0:
+            return ""
+        escape = lambda x: x.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        return "{" + ",".join(['{}="{}"'.format(key, escape(value)) for key, value in
+            pairs]) + "}"
+
+
+    def render(self):
+        """ Returns all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The return value.
+        """
+
+        lines = []
+        for name, metric in self.metrics.items():
+            full_name = "{}_{}".format(self.namespace, name)
+            lines.append("# HELP {} {}".format(full_name, metric["help"]))
+            lines.append("# TYPE {} {}".format(full_name, metric["type"]))
+
+            # write simple values.
+            if metric["type"] != "histogram":
+                for labels, value in sorted(metric["values"].items()):
+                    lines.append("{}{} {}".format(full_name, self._format_labels(labels),
+                        value))
+                continue
+
+            # write cumulative histogram buckets, sum, and count.
+            for labels, histogram in sorted(metric["values"].items()):
+                total = 0
+                for bound, count in zip(metric["buckets"], histogram["counts"]):
+                    total += count
+                    lines.append("{}_bucket{} {}".format(full_name, self._format_labels(
+                        labels, (("le", "{:g}".format(bound)),)), total))
+                lines.append("{}_bucket{} {}".format(full_name, self._format_labels(
+                    labels, (("le", "+Inf"),)), histogram["count"]))
+                lines.append("{}_sum{} {}".format(full_name, self._format_labels(labels),
+                    round(histogram["sum"], 6)))
+                lines.append("{}_count{} {}".format(full_name, self._format_labels(labels),
+                    histogram["count"]))
+
+        return "\n".join(lines) + "\n"
+
+
+    def write(self):
+        """ Updates metrics via @self.collector and atomically writes them to
+        @self.prom_file.
+
+        Returns:
+            None
+        """
+
+        # if needed, collect metrics from other sources.
+        if self.collector is not None:
+            self.collector(self)
+
+        # write to a temporary file; replace @self.prom_file with it.
+        container = os.path.dirname(os.path.abspath(self.prom_file))
+        handle, temp_path = tempfile.mkstemp(dir=container, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as tf:
+                tf.write(self.render())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, self.prom_file)
+        except Exception as err:
+            os.remove(temp_path)
+            raise err
+
+        return
+
+
+    def __call__(self, snapshot):
+        """ Updates the message and byte counters from a progress @snapshot and writes
+        @self.prom_file. Counters keep growing across runs.
+
+        Args:
+            - snapshot (dict): A progress snapshot from
+            tomes_tagger.lib.live_reporter.LiveReporter.
+
+        Returns:
+            None
+        """
+
+        # get the values reported since the last snapshot of the same run.
+        last = self.last_snapshot
+        if snapshot["status"] == "started" or last is None:
+            last = {"processed_messages": 0, "untagged_messages": 0, "bytes_read": 0}
+        processed = snapshot["processed_messages"] - last["processed_messages"]
+        untagged = snapshot["untagged_messages"] - last["untagged_messages"]
+
+        # update counters and the number of messages left.
+        self.inc("messages_tagged_total", processed - untagged)
+        self.inc("messages_untagged_total", untagged)
+        self.inc("bytes_read_total", snapshot["bytes_read"] - last["bytes_read"])
+        self.set("queue_depth", max(0, snapshot["total_messages"] -
+            snapshot["processed_messages"]), queue="messages")
+        self.last_snapshot = snapshot
+
+        self.write()
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for moving the handlers of configured loggers onto a
+background thread, so formatting records and writing them to the console and to log files
+doesn't happen in the tagging thread.
+
+Todo:
+    * Records are put on an unbounded queue. If handlers can't keep up, the queue, and so
+    memory use, keeps growing until tagging is done.
+    * The message of each record is merged with its arguments before it's queued, so
+    arguments that change later are logged as they were. Everything else, including the
+    timestamp and the file and line, is formatted on the background thread.
+"""
+
+# import modules.
+import logging
+import logging.handlers
+import queue
+
+
+class QueueLogging():
+    """ A class for moving the handlers of configured loggers onto a background thread.
+
+    Example:
+        >>> logging.config.dictConfig(config) # set up handlers as usual.
+        >>> queue_logging = QueueLogging(["", "event_logger"])
+        >>> queue_logging.start() # records are now handled on a background thread.
+        >>> queue_logging.stop() # handles all queued records.
+    """
+
+
+    def __init__(self, logger_names=[""]):
+        """ Sets instance attributes.
+
+        Args:
+            - logger_names (list): The names of the loggers whose handlers to move. Use ""
+            for the root logger. Loggers that don't propagate, such as "event_logger" in
+            "logger.yaml", need to be listed to have their handlers moved too.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.logger_names = logger_names
+        self.listeners = []
+
+
+    def start(self):
+        """ Replaces the handlers of each logger in @self.logger_names with one queue
+        handler and starts a listener that passes queued records to the original handlers.
+        Loggers without handlers are left alone.
+
+        Returns:
+            None
+        """
+
+        for name in self.logger_names:
+            logger = logging.getLogger(name)
+            handlers = list(logger.handlers)
+            if len(handlers) == 0:
+                continue
+
+            # handle records from @logger's queue with its handlers; respect their levels.
+            records = queue.Queue()
+            listener = logging.handlers.QueueListener(records, *handlers,
+                    respect_handler_level=True)
+            for handler in handlers:
+                logger.removeHandler(handler)
+            logger.addHandler(logging.handlers.QueueHandler(records))
+            listener.start()
+            self.listeners.append((logger, listener))
+
+        self.logger.info("Moved log handlers to background threads for loggers: {}".format(
+            [logger.name for logger, listener in self.listeners]))
+
+        return
+
+
+    def stop(self):
+        """ Handles all queued records, stops the listeners, and gives each logger its
+        original handlers back.
+
+        Returns:
+            None
+        """
+
+        for logger, listener in self.listeners:
+            listener.stop()
+            for handler in list(logger.handlers):
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    logger.removeHandler(handler)
+            for handler in listener.handlers:
+                logger.addHandler(handler)
+        self.listeners = []
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for splitting a message body into its new reply text and
+its quoted reply history and for remembering the tagged results of replies per thread. This
+allows quoted history that was already tagged in an earlier message of the same thread,
+either as that message's new text or as quoted history, to be reused instead of being sent
+to the NLP tagger again.
+
+Todo:
+    * Replies are split per ./scripts/experiments/signatures/email_to_replies.py, i.e. on
+    "From: " and "Original Message" lines. Gmail-style "On ... wrote:" lines are also
+    supported, but ">" quoted text isn't since its prefixes change with each reply.
+    * Replies are matched after stripping outer whitespace. A quoted header with wrapped
+    field lines ends early, so its body won't match the original text and is tagged again.
+"""
+
+# import modules.
+import logging
+import re
+from collections import OrderedDict
+
+
+class QuotedReplies():
+    """ A class for splitting a message body into its new reply text and its quoted reply
+    history and for remembering the tagged results of replies per thread.
+
+    Example:
+        >>> qr = QuotedReplies()
+        >>> thread_id = qr.get_thread_id("<2@x>", ["<1@x>"], ["<1@x>"]) # "<1@x>".
+        >>> text = "Sure.\\n\\n-----Original Message-----\\nFrom: Jane\\n\\nLunch?\\n"
+        >>> qr.split(text) # ["Sure.\\n\\n", "-----Original Message-----\\nFrom: ..."].
+        >>> qr.split_header(qr.split(text)[1]) # ["-----Original ... Jane\\n", "\\nLunch?\\n"].
+        >>> qr.set(thread_id, "Lunch?", "<Tokens>...</Tokens>")
+        >>> qr.get(thread_id, "Lunch?") # "<Tokens>...</Tokens>".
+        >>> qr.get_stats() # dict.
+    """
+
+
+    def __init__(self, max_threads=1000, max_messages=100000):
+        """ Sets instance attributes.
+
+        Args:
+            - max_threads (int): The maximum number of threads for which to remember tagged
+            replies. Least recently used threads are forgotten first.
+            - max_messages (int): The maximum number of message identifiers for which to
+            remember a thread identifier.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+
+        # set patterns for lines that start a quoted reply.
+        self.marker_pattern = re.compile(r"^\s*-{2,}\s*Original Message\s*-{2,}\s*$", re.I)
+        self.header_pattern = re.compile(r"^\s*(From: |On .+ wrote:\s*$)")
+        self.field_pattern = re.compile(r"^\s*[A-Za-z][A-Za-z-]*:( |\s*$)")
+
+        # create thread containers and counters.
+        self.threads = OrderedDict()
+        self.message_threads = OrderedDict()
+        self.stats = {"segments": 0, "reused_segments": 0, "characters_saved": 0}
+
+
+    def get_stats(self):
+        """ Returns the quoted reply counters.
+
+        Returns:
+            dict: The return value.
+        """
+
+        return dict(self.stats)
+
+
+    def get_thread_id(self, message_id, in_reply_to=[], references=[]):
+        """ Gets the thread identifier for a message and remembers it for later replies.
+
+        Args:
+            - message_id (str): The message's <MessageId> value.
+            - in_reply_to (list): The message's <InReplyTo> values.
+            - references (list): The message's <References> values, oldest first.
+
+        Returns:
+            str: The return value.
+            The <MessageId> value of the thread's first known message.
+        """
+
+        # prefer the thread of a known parent; then the oldest reference; then the parent.
+        thread_id = None
+        for parent_id in in_reply_to + references[::-1]:
+            if parent_id in self.message_threads:
+                thread_id = self.message_threads[parent_id]
+                break
+        if thread_id is None:
+            thread_id = (references + in_reply_to + [message_id])[0]
+
+        # remember the thread for @message_id.
+        self.message_threads[message_id] = thread_id
+        self.message_threads.move_to_end(message_id)
+        while len(self.message_threads) > self.max_messages:
+            self.message_threads.popitem(last=False)
+
+        return thread_id
+
+
+    def split(self, text):
+        """ Splits @text into the new reply text followed by each quoted reply. Each quoted
+        reply starts with its "Original Message" or "From: " line. Joining the returned
+        items yields @text.
+
+        Args:
+            - text (str): The message body to split.
+
+        Returns:
+            list: The return value.
+            Each item is a string.
+        """
+
+        # split @text into lines; find the line at which each reply starts.
+        lines = text.splitlines(keepends=True)
+        breakpoints = [0]
+        follows_marker = False
+        for i, line in enumerate(lines):
+            if self.marker_pattern.match(line):
+                breakpoints.append(i)
+                follows_marker = True
+            elif self.header_pattern.match(line):
+                if not follows_marker:
+                    breakpoints.append(i)
+                follows_marker = False
+            elif line.strip() != "":
+                follows_marker = False
+
+        # join the lines for each reply.
+        breakpoints = sorted(set(breakpoints)) + [len(lines)]
+        segments = ["".join(lines[breakpoints[j]:breakpoints[j+1]]) for j in
+                range(len(breakpoints) - 1)]
+        if len(segments) == 0:
+            segments = [text]
+
+        return segments
+
+
+    def split_header(self, segment):
+        """ Splits a quoted reply into its header block, i.e. its "Original Message" line and 
+        the header field lines that follow, and its body. Joining the returned items yields
+        @segment.
+
+        Args:
+            - segment (str): The quoted reply to split. See self.split().
+
+        Returns:
+            list: The return value.
+            The header block and the body. Each item is a string.
+        """
+
+        # find the last header line before the first line of text; allow blank lines.
+        lines = segment.splitlines(keepends=True)
+        end = 0
+        for i, line in enumerate(lines):
+            if (self.marker_pattern.match(line) or self.header_pattern.match(line) or
+                    self.field_pattern.match(line)):
+                end = i + 1
+            elif line.strip() != "":
+                break
+
+        return ["".join(lines[:end]), "".join(lines[end:])]
+
+
+    def get(self, thread_id, segment):
+        """ Gets the tagged results for a reply in a given thread.
+
+        Args:
+            - thread_id (str): The thread identifier.
+            - segment (str): The reply text, stripped of outer whitespace.
+
+        Returns:
+            str: The return value.
+            If @segment has not been tagged for @thread_id, None is returned.
+        """
+
+        self.stats["segments"] += 1
+
+        # look up @segment.
+        if thread_id not in self.threads or segment not in self.threads[thread_id]:
+            return None
+        self.threads.move_to_end(thread_id)
+
+        # update counters.
+        self.logger.debug("Reusing tagged results for reply.")
+        self.stats["reused_segments"] += 1
+        self.stats["characters_saved"] += len(segment)
+
+        return self.threads[thread_id][segment]
+
+
+    def set(self, thread_id, segment, tagged):
+        """ Remembers the tagged results for a reply in a given thread.
+
+        Args:
+            - thread_id (str): The thread identifier.
+            - segment (str): The reply text, stripped of outer whitespace.
+            - tagged (str): The tagged results for @segment.
+
+        Returns:
+            None
+        """
+
+        # add @tagged to its thread; if needed, forget the least recently used thread.
+        if thread_id not in self.threads:
+            self.threads[thread_id] = {}
+        self.threads[thread_id][segment] = tagged
+        self.threads.move_to_end(thread_id)
+        while len(self.threads) > self.max_threads:
+            self.threads.popitem(last=False)
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for estimating the cost of tagging a whole EAXS file from a
+sample of its messages. Messages are grouped into strata by content type and body size, a
+proportional random sample is drawn from each stratum, and the per-message timings of the
+sample are weighted up to the whole file.
+
+Todo:
+    * Caches, quoted reply reuse, and duplicate bodies pay off more over a whole file than
+    over a sample, so estimates for files with a lot of repeated content run high.
+    * CoreNLP calls are counted per tagged text. Text longer than the chunk size is sent in
+    several requests, so the number of requests can be higher.
+"""
+
+# import modules.
+import random
+from tomes_tagger.lib.stage_timer import StageTimer
+
+
+class RunEstimator(StageTimer):
+    """ A class for estimating the cost of tagging a whole EAXS file from a stratified
+    sample of its messages. It's a tomes_tagger.lib.stage_timer.StageTimer that also keeps
+    the timings of each message, so it can be passed anywhere a StageTimer can.
+
+    Example:
+        >>> estimator = RunEstimator(sample_size=200)
+        >>> estimator.add_message(1, "text/html", 2048) # once per message in the file.
+        >>> estimator.get_sample() # [1]; the message positions to tag.
+        >>> # tag the sample with @estimator as the stage timer.
+        >>> estimator.get_estimate(scan_seconds=1.5, output_bytes=4096) # dict.
+    """
+
+
+    def __init__(self, sample_size=200, seed=0, corenlp_stages=["ner.corenlp",
+            "regex.corenlp"]):
+        """ Sets instance attributes.
+
+        Args:
+            - sample_size (int): The number of messages to sample. Each non-empty stratum
+            gets at least one message, so the sample can be slightly larger.
+            - seed (int): The random seed.
+            - corenlp_stages (list): The stages that time CoreNLP calls.
+        """
+
+        # set attributes.
+        self.sample_size = sample_size
+        self.seed = seed
+        self.corenlp_stages = corenlp_stages
+        self.strata = {}
+        self.weights = {}
+
+        super().__init__()
+
+
+    def reset(self):
+        """ Resets all timings, including those of each message.
+
+        Returns:
+            None
+        """
+
+        super().reset()
+        self.samples = []
+
+        return
+
+
+    def add(self, stage, seconds):
+        """ Adds a timing of @seconds to @stage and to the message being timed. See
+        "help(StageTimer.add)". """
+
+        super().add(stage, seconds)
+
+        # if a message is being timed, add @seconds to it.
+        if self.message is not None:
+            if stage == "message":
+                self.message["seconds"] = seconds
+            else:
+                stages = self.message["stages"]
+                if stage not in stages:
+                    stages[stage] = {"count": 0, "seconds": 0.0}
+                stages[stage]["count"] += 1
+                stages[stage]["seconds"] += seconds
+
+        return
+
+
+    def start_message(self):
+        """ Starts timing a message. See "help(StageTimer.start_message)". """
+
+        super().start_message()
+        self.message["stages"] = {}
+        self.message["seconds"] = 0.0
+
+        return
+
+
+    def stop_message(self):
+        """ Stops timing a message and keeps its timings. See
+        "help(StageTimer.stop_message)". """
+
+        message = self.message
+        super().stop_message()
+        if message is not None:
+            self.samples.append({"stratum": self.get_stratum(message["content_type"],
+                message["characters"]), "characters": message["characters"],
+                "seconds": message["seconds"], "stages": message["stages"]})
+
+        return
+
+
+    @classmethod
+    def get_stratum(cls, content_type, characters):
+        """ Returns the stratum for a message.
+
+        Args:
+            - content_type (str): The message's content type.
+            - characters (int): The length of the message's raw body.
+
+        Returns:
+            str: The return value.
+            The content type and body size label (ex: "text/html 1K-10K").
+        """
+
+        return "{} {}".format(content_type or "unknown", cls.get_size_label(characters))
+
+
+    def add_message(self, index, content_type, characters):
+        """ Adds a message from the file being estimated to its stratum.
+
+        Args:
+            - index (int): The position of the message. Note: the first message's value is
+            1.
+            - content_type (str): The message's content type.
+            - characters (int): The length of the message's raw body.
+
+        Returns:
+            None
+        """
+
+        stratum = self.get_stratum(content_type, characters)
+        if stratum not in self.strata:
+            self.strata[stratum] = {"indexes": [], "characters": 0}
+        self.strata[stratum]["indexes"].append(index)
+        self.strata[stratum]["characters"] += characters
+
+        return
+
+
+    def get_sample(self):
+        """ Draws a proportional random sample of message positions from each stratum.
+
+        Returns:
+            list: The return value.
+            The sorted message positions to tag.
+        """
+
+        rng = random.Random(self.seed)
+        total = sum([len(stratum["indexes"]) for stratum in self.strata.values()])
+
+        # sample each stratum; keep the weight of each sampled message.
+        sample = []
+        for name, stratum in sorted(self.strata.items()):
+            indexes = stratum["indexes"]
+            size = min(len(indexes), max(1, round(self.sample_size * len(indexes)/total)))
+            sample += rng.sample(indexes, size)
+            self.weights[name] = len(indexes)/size
+
+        return sorted(sample)
+
+
+    def get_estimate(self, scan_seconds=0.0, output_bytes=0):
+        """ Extrapolates the timings of the tagged sample to the whole file.
+
+        Args:
+            - scan_seconds (float): The time spent reading every message once. This is added
+            to the estimate since a full run reads every message too.
+            - output_bytes (int): The size of the tagged sample.
+
+        Returns:
+            dict: The return value.
+            Times are in seconds. The output size is estimated from the ratio of output
+            bytes to raw body characters in the sample.
+        """
+
+        total_messages = sum([len(stratum["indexes"]) for stratum in
+            self.strata.values()])
+        total_characters = sum([stratum["characters"] for stratum in
+            self.strata.values()])
+
+        # weight each sampled message by the number of messages it stands for.
+        fallback = total_messages/max(len(self.samples), 1)
+        seconds, stage_seconds, corenlp = 0.0, {}, {"calls": 0.0, "seconds": 0.0}
+        strata = {name: {"messages": len(stratum["indexes"]), "sampled": 0, "seconds": 0.0}
+                for name, stratum in self.strata.items()}
+        for sample in self.samples:
+            weight = self.weights.get(sample["stratum"], fallback)
+            seconds += weight * sample["seconds"]
+            for stage, counters in sample["stages"].items():
+                stage_seconds[stage] = stage_seconds.get(stage, 0.0) + (weight *
+                        counters["seconds"])
+                if stage in self.corenlp_stages:
+                    corenlp["calls"] += weight * counters["count"]
+                    corenlp["seconds"] += weight * counters["seconds"]
+            if sample["stratum"] in strata:
+                strata[sample["stratum"]]["sampled"] += 1
+                strata[sample["stratum"]]["seconds"] += weight * sample["seconds"]
+
+        # estimate the output size.
+        sampled_characters = sum([sample["characters"] for sample in self.samples])
+        output_ratio = output_bytes/sampled_characters if sampled_characters > 0 else 0.0
+
+        estimated_seconds = scan_seconds + seconds
+        estimate = {"total_messages": total_messages, "total_characters": total_characters,
+                "sampled_messages": len(self.samples),
+                "sampled_characters": sampled_characters,
+                "scan_seconds": round(scan_seconds, 3),
+                "estimated_seconds": round(estimated_seconds, 3),
+                "estimated_stage_seconds": {stage: round(value, 3) for stage, value in
+                    sorted(stage_seconds.items())},
+                "estimated_corenlp": {"calls": round(corenlp["calls"]),
+                    "busy_seconds": round(corenlp["seconds"], 3),
+                    "calls_per_second": round(corenlp["calls"]/estimated_seconds, 3) if
+                        estimated_seconds > 0 else 0.0},
+                "estimated_output_bytes": round(output_ratio * total_characters),
+                "strata": {name: {"messages": stratum["messages"],
+                    "sampled": stratum["sampled"],
+                    "estimated_seconds": round(stratum["seconds"], 3)} for name, stratum in
+                    sorted(strata.items())}}
+
+        return estimate
+
+
+if __name__ == "__main__":
+    pass
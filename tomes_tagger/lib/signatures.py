@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for finding the signature block at the end of a plain text
+email reply. It is based on the feature experiments in ./scripts/experiments/signatures.
+
+Todo:
+    * The detector is rule-based. If we ever train a classifier on the features in
+    @SignatureFinder.get_features(), it should replace @SignatureFinder._score().
+    * Titles are a subset of ./scripts/experiments/signatures/_titles.py.
+"""
+
+# import modules.
+import logging
+import re
+
+
+class SignatureFinder():
+    """ A class for finding the signature block at the end of a plain text email reply.
+
+    Example:
+        >>> sf = SignatureFinder()
+        >>> text = "See you at noon.\\n\\nJohn Doe\\nDirector\\n(919) 555-5555\\n"
+        >>> sf.get_signature(text, '"John Doe" <john_doe@fake.nc.gov>')
+        ('See you at noon.\\n\\n', 'John Doe\\nDirector\\n(919) 555-5555\\n')
+    """
+
+
+    def __init__(self, max_lines=10, max_words=12):
+        """ Sets instance attributes.
+
+        Args:
+            - max_lines (int): The maximum number of non-blank lines a signature block can
+            have.
+            - max_words (int): The maximum number of words in a signature line. Longer lines
+            are considered prose and end the search for a signature.
+        """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # set attributes.
+        self.max_lines = max_lines
+        self.max_words = max_words
+
+        # set feature patterns per ./scripts/experiments/signatures/reply_features.py.
+        self.patterns = {
+                "phones": re.compile(r"[\(]{0,1}[2-9][0-9]{2}[)-.][ ]{0,1}[0-9]{3}[-.]"
+                        r"[0-9]{4}"),
+                "zips": re.compile(r"\b[0-9]{5}(-[0-9]{4})?\s*$", re.M),
+                "urls": re.compile(r"((http|https)://|www\.)[a-zA-Z0-9\-\.]+\.[a-zA-Z]{2,3}"),
+                "emails": re.compile(r"[a-zA-Z0-9_\-\.]+@[a-zA-Z0-9\-\.]+\.[a-zA-Z]{2,}")}
+        self.delimiter_pattern = re.compile(r"^(--|__)\s*$")
+        self.header_pattern = re.compile(r"^\s*From: (.+)$", re.M)
+        self.contact_pattern = re.compile(r"(.*)[<\[](.*)[>\]]")
+
+        # set personal titles to ignore in names.
+        self.titles = {"Adm", "Amb", "Capt", "Chancellor", "Col", "Commissioner", "Dean",
+                "Deputy", "Director", "Dr", "Gen", "Gov", "Governor", "Hon", "Judge", "Jr",
+                "Lt", "Maj", "Miss", "Mr", "Mrs", "Ms", "Mx", "Pres", "President", "Prof",
+                "Professor", "Rep", "Rev", "Secretary", "Sen", "Senator", "Sgt", "Sir", "Sr"}
+
+
+    def _get_name_tokens(self, name):
+        """ Gets the lowercase name parts from @name, omitting non-alphabetic characters,
+        initials, acronyms, and titles per
+        ./scripts/experiments/signatures/email_to_replies.sanitize_name().
+
+        Args:
+            - name (str): The name to tokenize.
+
+        Returns:
+            list: The return value.
+        """
+
+        # keep alphabetic, mixed case, non-title tokens.
+        tokens = []
+        for token in name.split():
+            token = "".join([char for char in token if char.isalpha()])
+            if token == "" or token.upper() == token or token in self.titles:
+                continue
+            tokens.append(token.lower())
+
+        return tokens
+
+
+    def _get_sender(self, text, sender):
+        """ Gets the name tokens and email address of the sender. If @text is a quoted reply
+        with a "From: " header, the header's sender is used instead of @sender.
+
+        Args:
+            - text (str): The reply text.
+            - sender (str): The <From> value of the message, e.g. '"Jane" <jane@fake.gov>'.
+
+        Returns:
+            tuple: The return value.
+            The first item is a list of lowercase name tokens.
+            The second item is the email address (str) or an empty string.
+        """
+
+        # prefer a quoted reply's header.
+        header = self.header_pattern.search(text[:2000])
+        if header is not None:
+            sender = header.group(1)
+        if sender is None:
+            return ([], "")
+
+        # split name from address.
+        match = self.contact_pattern.match(sender)
+        if match is not None:
+            name, address = match.group(1), match.group(2).replace("mailto:", "")
+        else:
+            name, address = sender, ""
+
+        return (self._get_name_tokens(name.strip(' "')), address.strip().lower())
+
+
+    def get_features(self, block, address=""):
+        """ Counts the contact features in a candidate signature @block.
+
+        Args:
+            - block (str): The candidate signature block.
+            - address (str): The sender's email address.
+
+        Returns:
+            dict: The return value.
+        """
+
+        # count each pattern; check for the sender's address.
+        features = {name: len(pattern.findall(block)) for name, pattern in
+                self.patterns.items()}
+        features["has_email"] = int(address != "" and address in block.lower())
+
+        return features
+
+
+    def _score(self, lines, start, name_tokens, address):
+        """ Scores the candidate signature block that starts at @lines[@start].
+
+        Args:
+            - lines (list): The reply's lines.
+            - start (int): The index of the block's first line.
+            - name_tokens (list): The sender's lowercase name tokens.
+            - address (str): The sender's email address.
+
+        Returns:
+            int: The return value.
+            Values of 2 or more indicate a likely signature.
+        """
+
+        score = 0
+        first_line = lines[start].strip()
+
+        # a delimiter line or a line of only sender name tokens starts a signature.
+        # Note: a name followed by a comma or colon is likely a salutation.
+        if self.delimiter_pattern.match(first_line):
+            score += 2
+        elif first_line[-1] not in ",:":
+            tokens = self._get_name_tokens(first_line)
+            if len(tokens) > 0 and len(tokens) <= 4 and all([t in name_tokens for t in
+                    tokens]):
+                score += 2
+
+        # otherwise, only a final paragraph with several kinds of contact details can be one.
+        if score == 0:
+            block = "".join(lines[start:]).strip()
+            if (start > 0 and lines[start - 1].strip() != "") or "\n\n" in block:
+                return score
+
+        # contact details add to the score.
+        features = self.get_features("".join(lines[start:]), address)
+        score += min(2, sum([1 for value in features.values() if value > 0]))
+
+        return score
+
+
+    def get_signature(self, text, sender=None):
+        """ Splits @text into its body and its trailing signature block.
+
+        Args:
+            - text (str): The plain text reply.
+            - sender (str): The <From> value of the message.
+
+        Returns:
+            tuple: The return value.
+            The first item is the body (str) and the second item is the signature block
+            (str). Joining them yields @text. If no signature is found, the second item is an
+            empty string.
+        """
+
+        # get sender details and lines.
+        name_tokens, address = self._get_sender(text, sender)
+        lines = text.splitlines(keepends=True)
+
+        # walk backwards over the last non-blank lines until a prose line is found.
+        candidates = []
+        non_blank = 0
+        for i in range(len(lines) - 1, -1, -1):
+            line = lines[i].strip()
+            if line == "":
+                continue
+            if len(line.split()) > self.max_words and line[0] not in "\"'":
+                break
+            non_blank += 1
+            if non_blank > self.max_lines:
+                break
+            candidates.insert(0, i)
+
+        # use the earliest candidate line that starts a likely signature.
+        for start in candidates:
+            if self._score(lines, start, name_tokens, address) >= 2:
+                body, signature = "".join(lines[:start]), "".join(lines[start:])
+                return (body, signature)
+
+        return (text, "")
+
+
+if __name__ == "__main__":
+    pass
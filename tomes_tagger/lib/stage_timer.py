@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+
+""" This module contains a class for timing the stages of the tagging workflow and for
+reporting per-stage histograms and percentiles, plus a per-message breakdown by content type
+and body size.
+
+Todo:
+    * Timings are kept in fixed histogram buckets rather than as raw values, so memory use
+    doesn't grow with the number of messages. Percentiles are therefore estimates: the upper
+    bound of the bucket the percentile falls in, capped at the slowest timing.
+"""
+
+# import modules.
+import bisect
+import json
+import logging
+import time
+
+
+class _Timing():
+    """ A context manager that adds its elapsed time to a StageTimer stage. """
+
+
+    def __init__(self, timer, stage):
+        """ Sets instance attributes.
+
+        Args:
+            - timer (StageTimer): The timer to add the elapsed time to.
+            - stage (str): The name of the stage being timed.
+        """
+
+        self.timer = timer
+        self.stage = stage
+        self.start_time = None
+
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *args):
+        self.timer.add(self.stage, time.perf_counter() - self.start_time)
+        return False
+
+
+class _NoTiming():
+    """ A context manager that does nothing; used when timing is disabled. """
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        return False
+
+
+class StageTimer():
+    """ A class for timing the stages of the tagging workflow and for reporting per-stage
+    histograms and percentiles, plus a per-message breakdown by content type and body size.
+
+    Example:
+        >>> timer = StageTimer()
+        >>> with timer.time("decode"):
+        >>>     pass # decode something.
+        >>> timer.start_message()
+        >>> timer.set_message("text/html", 2048)
+        >>> timer.stop_message()
+        >>> timer.get_report() # dict.
+        >>> timer.write_report("timing.json")
+    """
+
+    # the histogram bucket upper bounds in milliseconds: ten per power of ten, from 0.01 ms
+    # to about 17 minutes.
+    bounds = [float("{:.3g}".format(10 ** (exp/10))) for exp in range(-20, 61)]
+
+    # the body size bucket lower bounds in characters and their labels.
+    size_bounds = [(1000000, ">=1M"), (100000, "100K-1M"), (10000, "10K-100K"),
+            (1000, "1K-10K"), (0, "<1K")]
+
+    # a shared context manager for disabled timing.
+    no_timing = _NoTiming()
+
+
+    def __init__(self):
+        """ Sets instance attributes. """
+
+        # set logger; suppress logging by default.
+        self.logger = logging.getLogger(__name__)
+        self.logger.addHandler(logging.NullHandler())
+
+        # start counters.
+        self.reset()
+
+
+    def reset(self):
+        """ Resets all timings.
+
+        Returns:
+            None
+        """
+
+        self.stages = {}
+        self.content_types = {}
+        self.body_sizes = {}
+        self.message = None
+
+        return
+
+
+    def time(self, stage):
+        """ Returns a context manager that times its block as @stage.
+
+        Args:
+            - stage (str): The name of the stage to time.
+
+        Returns:
+            object: The return value.
+        """
+
+        return _Timing(self, stage)
+
+
+    def add(self, stage, seconds):
+        """ Adds a timing of @seconds to @stage.
+
+        Args:
+            - stage (str): The name of the stage.
+            - seconds (float): The elapsed time.
+
+        Returns:
+            None
+        """
+
+        # if needed, start counters for @stage.
+        if stage not in self.stages:
+            self.stages[stage] = {"count": 0, "seconds": 0.0, "min": seconds,
+                    "max": seconds, "buckets": [0] * (len(self.bounds) + 1)}
+
+        # update counters.
+        counters = self.stages[stage]
+        counters["count"] += 1
+        counters["seconds"] += seconds
+        counters["min"] = min(counters["min"], seconds)
+        counters["max"] = max(counters["max"], seconds)
+
+        # add @seconds to the first bucket that can hold it.
+        counters["buckets"][bisect.bisect_left(self.bounds, seconds * 1000)] += 1
+
+        return
+
+
+    @classmethod
+    def get_size_label(cls, characters):
+        """ Returns the body size label for @characters per @cls.size_bounds.
+
+        Args:
+            - characters (int): The length of a message's raw body.
+
+        Returns:
+            str: The return value.
+        """
+
+        return [label for bound, label in cls.size_bounds if characters >= bound][0]
+
+
+    def start_message(self):
+        """ Starts timing a message.
+
+        Returns:
+            None
+        """
+
+        self.message = {"start_time": time.perf_counter(), "content_type": "unknown",
+                "characters": 0}
+        return
+
+
+    def set_message(self, content_type, characters):
+        """ Sets the content type and body size of the message being timed.
+
+        Args:
+            - content_type (str): The message's content type.
+            - characters (int): The length of the message's raw body.
+
+        Returns:
+            None
+        """
+
+        if self.message is not None:
+            self.message["content_type"] = content_type or "unknown"
+            self.message["characters"] = characters
+
+        return
+
+
+    def annotate(self, **details):
+        """ Adds @details to the message being timed. They aren't part of the report, but
+        subclasses such as tomes_tagger.lib.message_tracer.MessageTracer record them.
+
+        Args:
+            - **details: The details to add (ex: message_id="<1@nc.gov>").
+
+        Returns:
+            None
+        """
+
+        if self.message is not None:
+            self.message.update(details)
+
+        return
+
+
+    def stop_message(self):
+        """ Stops timing a message and adds its timing to the "message" stage and to the
+        breakdowns by content type and body size.
+
+        Returns:
+            None
+        """
+
+        # verify a message is being timed.
+        if self.message is None:
+            return
+
+        seconds = time.perf_counter() - self.message["start_time"]
+        self.add("message", seconds)
+
+        # update breakdowns.
+        size_label = self.get_size_label(self.message["characters"])
+        for breakdown, key in [(self.content_types, self.message["content_type"]),
+                (self.body_sizes, size_label)]:
+            if key not in breakdown:
+                breakdown[key] = {"messages": 0, "characters": 0, "seconds": 0.0}
+            breakdown[key]["messages"] += 1
+            breakdown[key]["characters"] += self.message["characters"]
+            breakdown[key]["seconds"] += seconds
+
+        self.message = None
+        return
+
+
+    def _get_percentile(self, counters, percentile):
+        """ Estimates the @percentile for a stage's @counters.
+
+        Args:
+            - counters (dict): The stage's counters.
+            - percentile (float): The percentile to estimate, e.g. 0.9.
+
+        Returns:
+            float: The return value.
+            The estimate in milliseconds.
+        """
+
+        # find the bucket that holds the @percentile; use its upper bound.
+        rank = percentile * counters["count"]
+        total = 0
+        max_ms = counters["max"] * 1000
+        for i, count in enumerate(counters["buckets"][:-1]):
+            total += count
+            if total >= rank:
+                return min(self.bounds[i], max_ms)
+
+        return max_ms
+
+
+    def get_report(self):
+        """ Returns per-stage counts, totals, percentiles, and histograms and the per-message
+        breakdowns by content type and body size.
+
+        Returns:
+            dict: The return value.
+            Histogram keys are bucket upper bounds in milliseconds, e.g. "<=20". Empty
+            buckets are omitted.
+        """
+
+        # summarize each stage.
+        stages = {}
+        for stage, counters in sorted(self.stages.items()):
+            histogram = {}
+            for i, count in enumerate(counters["buckets"]):
+                if count == 0:
+                    continue
+                if i < len(self.bounds):
+                    histogram["<={:g}".format(self.bounds[i])] = count
+                else:
+                    histogram[">{:g}".format(self.bounds[-1])] = count
+            stages[stage] = {"count": counters["count"],
+                    "total_s": round(counters["seconds"], 6),
+                    "mean_ms": round(counters["seconds"] * 1000/counters["count"], 3),
+                    "min_ms": round(counters["min"] * 1000, 3),
+                    "max_ms": round(counters["max"] * 1000, 3),
+                    "p50_ms": round(self._get_percentile(counters, 0.5), 3),
+                    "p90_ms": round(self._get_percentile(counters, 0.9), 3),
+                    "p99_ms": round(self._get_percentile(counters, 0.99), 3),
+                    "histogram_ms": histogram}
+
+        # summarize each breakdown.
+        def summarize(breakdown):
+            summary = {}
+            for key, counters in sorted(breakdown.items()):
+                summary[key] = dict(counters)
+                summary[key]["seconds"] = round(counters["seconds"], 6)
+                summary[key]["mean_ms"] = round(counters["seconds"] * 1000/
+                        counters["messages"], 3)
+            return summary
+
+        report = {"stages": stages, "content_types": summarize(self.content_types),
+                "body_sizes": summarize(self.body_sizes)}
+        return report
+
+
+    def write_report(self, report_file):
+        """ Writes the results of self.get_report() to @report_file as JSON.
+
+        Args:
+            - report_file (str): The filepath to write to.
+
+        Returns:
+            None
+        """
+
+        self.logger.info("Writing stage timing report: {}".format(report_file))
+        with open(report_file, "w", encoding="utf-8") as rf:
+            json.dump(self.get_report(), rf, indent=2)
+
+        return
+
+
+if __name__ == "__main__":
+    pass
@@ -5,17 +5,21 @@ given text using Stanford's CoreNLP. It also contains a class to wrap pycorenlp
 (https://github.com/smilli/py-corenlp) and capture its exceptions more explicitly. 
 
 Todo:
-    * I think we want some way of explicitly handling timeouts. I've experience CoreNLP
-    just hanging for several minutes. What can we do to address that situation? Obviously, we
-    can set a timeout when starting CoreNLP, so the question is about what this module needs
-    to do when a timeout happens.
+    * Timeouts are handled per message via an optional tomes_tagger.lib.deadline.Deadline;
+    when it runs out, the request is abandoned and the caller leaves the message untagged.
+    Note that CoreNLP itself may keep working on an abandoned request, so a server-side
+    timeout is still worth setting when starting CoreNLP.
 """
 
 # import modules.
 import json
 import logging
 import pycorenlp
+import re
+import requests
+import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
 from textwrap import TextWrapper
 
 
@@ -29,7 +33,8 @@ class _CoreNLP():
     """
 
 	
-    def __init__(self, host, mapping_file="", tags_to_override=[], *args, **kwargs):
+    def __init__(self, host, mapping_file="", tags_to_override=[], regex_only=False, 
+            deadline=None, request_hook=None, semaphore=None, *args, **kwargs):
         """ Sets instance attributes.
 
         Args:
@@ -38,6 +43,15 @@ class _CoreNLP():
             be located within the CoreNLP server's file directory.
             - tags_to_override (list): The CoreNLP NER tag values to override if they 
             conflict with a custom tag in @mapping_file. 
+            - regex_only (bool): Use True to skip the part-of-speech and statistical NER
+            annotators and only apply the patterns in @mapping_file. Otherwise, use False.
+            - deadline (tomes_tagger.lib.deadline.Deadline): An optional per-message time
+            budget. While it's running, requests to CoreNLP time out when it runs out.
+            - request_hook (function): An optional function that accepts the seconds spent on
+            each CoreNLP request (float) and whether the request failed (bool).
+            - semaphore (object): An optional semaphore to acquire before each request and 
+            to release after it, such as a multiprocessing.BoundedSemaphore shared by several
+            taggers. Use it to cap the requests in flight to one CoreNLP server.
             -*args/**kwargs: Any additional, optional arguments to pass to pycorenlp.
         """
 
@@ -54,10 +68,18 @@ class _CoreNLP():
         self.host = host
         self.mapping_file = mapping_file
         self.tags_to_override = tags_to_override
+        self.regex_only = regex_only
+        self.deadline = deadline
+        self.request_hook = request_hook
+        self.semaphore = semaphore
         self.options = {"annotators": "tokenize, ssplit, pos, ner, regexner",
                 "ner.useSUTime": "false", "ner.applyNumericClassifiers": "false", 
                 "outputFormat": "json"}
 
+        # if specified, only use pattern-based tagging.
+        if self.regex_only:
+            self.options["annotators"] = "tokenize, ssplit, regexner"
+
         # if specified, add option to use mapping file.
         if self.mapping_file != "":
             self.options["regexner.mapping"] = self.mapping_file
@@ -82,7 +104,8 @@ class _CoreNLP():
 
         Raises:
             - TypeError: If @text is not a string.
-            - ConnectionError: If pycorenlp can't connect to the CoreNLP server.
+            - ConnectionError: If pycorenlp can't connect to the CoreNLP server or if the
+            time budget runs out while waiting for @self.semaphore.
         """
 
         # verify that @text is a string.
@@ -91,13 +114,69 @@ class _CoreNLP():
                     type(text).__name__)
             raise TypeError(msg)
 
+        # if a time budget is running, limit the request to the time left.
+        timeout = None
+        if self.deadline is not None:
+            timeout = self.deadline.get_remaining()
+
+        # if needed, wait for a free request slot; the wait isn't part of the request.
+        if self.semaphore is not None:
+            if not self.semaphore.acquire(timeout=timeout):
+                msg = "Time budget ran out waiting to send request to: {}".format(self.host)
+                raise ConnectionError(msg)
+            if timeout is not None:
+                timeout = self.deadline.get_remaining()
+
         # get NER tag results.
+        start_time = time.perf_counter()
+        is_error = True
         try:
-            results = self.nlp.annotate(text, properties=self.options)
+            if timeout is None:
+                results = self.nlp.annotate(text, properties=self.options)
+            else:
+                results = self._post(text, timeout)
+            is_error = False
             return results
         except Exception as err:
             msg = "Can't connect to CoreNLP at: {}".format(self.host)
             raise ConnectionError(msg)
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
+            if self.request_hook is not None:
+                self.request_hook(time.perf_counter() - start_time, is_error)
+
+
+    def _post(self, text, timeout):
+        """ Sends @text to CoreNLP as pycorenlp does but with a @timeout. pycorenlp has no
+        timeout, so a hung server would otherwise block forever.
+
+        Args:
+            - text (str): The text to send to CoreNLP's NER tagger.
+            - timeout (float): The seconds to wait for CoreNLP.
+
+        Returns:
+            dict: The return value.
+            The CoreNLP NER tagger results. As with pycorenlp, if the response isn't valid
+            JSON, the response text is returned instead.
+
+        Raises:
+            - requests.exceptions.RequestException: If the request fails or times out.
+        """
+
+        # requests rejects a timeout of 0, so use a tiny one instead.
+        timeout = max(timeout, 0.001)
+        response = requests.post(self.host, params={"properties": str(self.options)}, 
+                data=text.encode(), headers={"Connection": "close"}, timeout=timeout)
+        response.raise_for_status()
+
+        # parse the response as pycorenlp does; allow control characters within strings.
+        try:
+            results = json.loads(response.text, strict=False)
+        except json.decoder.JSONDecodeError:
+            results = response.text
+
+        return results
 
 
 class TextToNLP():
@@ -107,12 +186,19 @@ class TextToNLP():
     Example:
         >>> t2n = TextToNLP()
         >>> t2n.get_NER("North Carolina") # list.
+        >>> t2n = TextToNLP(cache=ContentCache("ner_cache.sqlite"))
+        >>> t2n.get_NER("Hi.\n\nConfidential!") # list; caches each paragraph.
+        >>> t2n.get_NER("Bye.\n\nConfidential!") # list; only "Bye." is sent to CoreNLP.
+        >>> t2n.get_cache_stats() # dict.
+        >>> t2n = TextToNLP(regex_only=True) # only tag patterns in @mapping_file.
     """
 
 
     def __init__(self, host="http://localhost:9003", chunk_size=50000, retry=True,
             mapping_file="regexner_TOMES/mappings.txt", tags_to_remove=["DATE", "DURATION",
-                    "MISC", "MONEY", "NUMBER", "O", "ORDINAL", "PERCENT", "SET", "TIME"]):
+                    "MISC", "MONEY", "NUMBER", "O", "ORDINAL", "PERCENT", "SET", "TIME"],
+            cache=None, regex_only=False, deadline=None, request_hook=None, workers=1,
+            chunk_hook=None, semaphore=None):
         """ Sets instance attributes.
 
         Args:
@@ -125,6 +211,23 @@ class TextToNLP():
             - mapping_file (str): See "help(_CoreNLP)" for more info.
             - tags_to_remove (list): If CoreNLP returns one on these NER tags, the tag will be
             replaced with an empty string.
+            - cache (tomes_tagger.lib.content_cache.ContentCache): An optional cache for NER
+            results. If not None, text will be split into paragraphs and only paragraphs not
+            found in the cache will be sent to CoreNLP. Note that CoreNLP will then never see
+            more than one paragraph at a time.
+            - regex_only (bool): Use True to only apply the patterns in @mapping_file. This
+            is much cheaper than full NER tagging. Otherwise, use False.
+            - deadline (tomes_tagger.lib.deadline.Deadline): See "help(_CoreNLP)" for more
+            info.
+            - request_hook (function): See "help(_CoreNLP)" for more info. If @workers is
+            greater than 1, it may be called from several threads at once.
+            - workers (int): The maximum number of chunks of one text to send to CoreNLP at
+            once. This only matters for text longer than @chunk_size. The worker threads
+            are started on first use and kept for the lifetime of the instance.
+            - chunk_hook (function): An optional function that accepts the number of chunks
+            a text was sent to CoreNLP in (int) and the number of retries made for them 
+            (int). It's called once per text that reaches CoreNLP.
+            - semaphore (object): See "help(_CoreNLP)" for more info.
         """
         
         # set logger; suppress logging by default. 
@@ -137,12 +240,25 @@ class TextToNLP():
         self.retry = retry
         self.mapping_file = mapping_file
         self.tags_to_remove = tags_to_remove
+        self.cache = cache
+        self.regex_only = regex_only
+        self.deadline = deadline
+        self.workers = max(1, workers)
+        self.chunk_hook = chunk_hook
+        self.executor = None
         self.stanford_tags = ["DATE", "DURATION", "LOCATION", "MISC", "MONEY", "NUMBER", "O",
                 "ORDINAL", "ORGANIZATION", "PERCENT", "PERSON", "SET", "TIME"]
         
         # compose instance of CoreNLP wrapper class.
         self.corenlp = _CoreNLP(self.host, mapping_file=self.mapping_file, 
-                tags_to_override=self.stanford_tags)
+                tags_to_override=self.stanford_tags, regex_only=self.regex_only, 
+                deadline=self.deadline, request_hook=request_hook, semaphore=semaphore)
+
+        # set paragraph delimiter and cache key suffix; start cache counters.
+        self.paragraph_pattern = re.compile(r"(\n\s*\n)")
+        self.cache_signature = json.dumps([self.corenlp.options, self.tags_to_remove], 
+                sort_keys=True)
+        self.reset_cache_stats()
 
 
     @staticmethod
@@ -226,13 +342,114 @@ class TextToNLP():
         return response
 
 
+    def reset_cache_stats(self):
+        """ Resets the paragraph cache counters.
+
+        Returns:
+            None
+        """
+
+        self.cache_stats = {"paragraphs": 0, "cached_paragraphs": 0, "characters_sent": 0,
+                "characters_saved": 0}
+        if self.cache is not None:
+            self.cache.reset_stats()
+
+        return
+
+
+    def get_cache_stats(self):
+        """ Returns the paragraph cache counters and the paragraph hit rate.
+
+        Returns:
+            dict: The return value.
+        """
+
+        stats = dict(self.cache_stats)
+        hits, total = stats["cached_paragraphs"], stats["paragraphs"]
+        stats["hit_rate"] = round(hits/total, 4) if total > 0 else 0.0
+
+        return stats
+
+
+    def close(self):
+        """ Shuts down @self.executor, if any, after its pending chunk requests finish.
+
+        Returns:
+            None
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+        return
+
+
+    def _get_cached_NER(self, text, ner_tagger):
+        """ Splits @text into paragraphs and gets NER tags for each paragraph from 
+        @self.cache if possible. Otherwise, NER tags are obtained via @ner_tagger and cached.
+        Paragraph delimiters and outer whitespace are added back as whitespace-only tuples, 
+        so the returned tokens reassemble to @text exactly.
+
+        Args:
+            - text (str): The text to tokenize and tag.
+            - ner_tagger (function): The function with which to tag novel paragraphs.
+
+        Returns:
+            list: The return value.
+            The NER tagger results as a list of tuples. If any paragraph can't be tagged, an
+            empty list is returned.
+        """
+
+        # prepare output container.
+        ner_output = []
+
+        # split @text into alternating paragraphs and delimiters.
+        parts = self.paragraph_pattern.split(text)
+        for i, part in enumerate(parts):
+
+            # add delimiters and whitespace-only paragraphs as whitespace.
+            stripped = part.strip()
+            if i % 2 == 1 or stripped == "":
+                if part != "":
+                    ner_output.append(("", "", part))
+                continue
+
+            # look up the paragraph; if needed, tag it and cache the results.
+            self.cache_stats["paragraphs"] += 1
+            key = self.cache.get_key(stripped, self.cache_signature)
+            tokenized_tagged = self.cache.get(key)
+            if tokenized_tagged is not None:
+                self.cache_stats["cached_paragraphs"] += 1
+                self.cache_stats["characters_saved"] += len(stripped)
+                tokenized_tagged = [tuple(token) for token in tokenized_tagged]
+            else:
+                self.cache_stats["characters_sent"] += len(stripped)
+                tokenized_tagged = ner_tagger(stripped)
+                if len(tokenized_tagged) == 0:
+                    return []
+                self.cache.set(key, tokenized_tagged)
+
+            # add tokens and any outer whitespace to @ner_output.
+            leading_space, trailing_space = self._get_outer_space(part)
+            if leading_space != "":
+                ner_output.append(("", "", leading_space))
+            ner_output += tokenized_tagged
+            if trailing_space != "":
+                ner_output.append(("", "", trailing_space))
+
+        return ner_output
+
+
     def __process_NER_requests(def__get_NER):
         """ A decorator for @def__get_NER that splits text into chunks if the string passed
         to @def__get_NER exceeds @self.chunk_size in length. This is due to size limitations
         in terms of how much data should be sent to @def__get_NER. This decorator also makes
         one more call to @def__get_NER if @self.retry is True and @def__get_NER returns an
         empty list for a given chunk, such as in cases where the NLP server doesn't respond
-        due to a temporary glitch.
+        due to a temporary glitch. If @self.cache is not None, only paragraphs that aren't
+        cached are passed to @def__get_NER. If @self.workers is greater than 1, up to that
+        many chunks are passed to @def__get_NER at once.
 
         Args:
             - def__get_NER (function): An alias intended for self.get_NER().
@@ -245,9 +462,6 @@ class TextToNLP():
         """
 
         def processor(self, text):
-
-            # prepare output container.
-            ner_output = []
             
             # verify that @text is a string.
             if not isinstance(text, str):
@@ -262,62 +476,117 @@ class TextToNLP():
                 self.logger.warning("Falling back to empty output.")
                 return []
 
-            # if needed, break @text into smaller chunks.
-            if len(text) <= self.chunk_size:
-                text_list = [text]
-            else:
-                self.logger.info("Text exceeds chunk size of: {}".format(self.chunk_size))
-                try:
-                    wrapper = TextWrapper(width=self.chunk_size, break_long_words=False, 
-                        break_on_hyphens=False, drop_whitespace=False, 
-                        replace_whitespace=False)
-                    text_list = wrapper.wrap(text)
-                except Exception as err:
-                    self.logger.error(err)
-                    self.logger.warning("Failed to chunk text; falling back to empty output.")
-                    return []
+            # create function to get NER tags for @text in chunks.
+            def get_chunked_NER(text):
 
-            # get NER tags for each item in @text_list.
-            i = 1
-            total_chunks = len(text_list)
-            
-            for text_chunk in text_list:
+                # if needed, break @text into smaller chunks.
+                if len(text) <= self.chunk_size:
+                    text_list = [text]
+                else:
+                    self.logger.debug("Text exceeds chunk size of: %d", self.chunk_size)
+                    try:
+                        wrapper = TextWrapper(width=self.chunk_size, break_long_words=False, 
+                            break_on_hyphens=False, drop_whitespace=False, 
+                            replace_whitespace=False)
+                        text_list = wrapper.wrap(text)
+                    except Exception as err:
+                        self.logger.error(err)
+                        self.logger.warning("Failed to chunk text; falling back to empty "
+                                "output.")
+                        return []
+
+                # create function to get NER tags for one chunk; count retries.
+                retries = []
+                def get_chunk_NER(text_chunk):
+                    try:
+                        tokenized_tagged = def__get_NER(self, text_chunk)
+                        if self.deadline is not None and self.deadline.is_expired():
+                            self.logger.error("Time budget ran out while getting NER tags.")
+                            return []
+                        if len(tokenized_tagged) == 0 and self.retry:
+                            self.logger.error("Failed to get NER tags for chunk.")
+                            self.logger.info("Making another attempt to get NER tags for "
+                                    "chunk.")
+                            retries.append(text_chunk)
+                            tokenized_tagged = def__get_NER(self, text_chunk)
+                    except Exception as err:
+                        self.logger.error(err)
+                        tokenized_tagged = []
+                    return tokenized_tagged
+
+                # get NER tags for each item in @text_list; if needed, do so concurrently
+                # with one pool of workers per instance.
+                total_chunks = len(text_list)
+                futures = []
+                if min(self.workers, total_chunks) > 1:
+                    if self.executor is None:
+                        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+                    self.logger.debug("Getting NER tags for %d chunks with %d workers.",
+                            total_chunks, min(self.workers, total_chunks))
+                    futures = [self.executor.submit(get_chunk_NER, text_chunk) for
+                            text_chunk in text_list]
+                    chunk_results = (future.result() for future in futures)
+                else:
+                    chunk_results = map(get_chunk_NER, text_list)
 
-                self.logger.info("Getting NER tags for chunk {} of {}.".format(i, 
-                    total_chunks))
                 try:
-                    tokenized_tagged = def__get_NER(self, text_chunk)
-                    if len(tokenized_tagged) == 0 and self.retry:
-                        self.logger.error("Failed to get NER tags for chunk.")
-                        self.logger.info("Making another attempt to get NER tags for chunk.")
-                        tokenized_tagged = def__get_NER(self, text_chunk)
-                except Exception as err:
-                    self.logger.error(err)
-                    tokenized_tagged = []
-                
-                # if no tokens were returned, report on giving up.
-                if len(tokenized_tagged) == 0:
-                    self.logger.warning("Falling back to empty output.")
-                    return []
+                    return get_joined_NER(text_list, chunk_results, retries)
+                finally:
+
+                    # if giving up early, don't send chunks nobody will read; wait for
+                    # chunks already sent so they don't hold request slots afterwards.
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+
+            # create function to join the NER tags for each chunk.
+            def get_joined_NER(text_list, chunk_results, retries):
+
+                # prepare output container.
+                ner_output = []
+                i = 1
+                total_chunks = len(text_list)
+
+                # if needed, report the number of chunks and retries once all are done.
+                if self.chunk_hook is not None:
+                    chunk_results = list(chunk_results)
+                    self.chunk_hook(total_chunks, len(retries))
                 
-                # otherwise, if tokens were returned, add them to @ner_output.
-                else:
+                for text_chunk, tokenized_tagged in zip(text_list, chunk_results):
 
-                    # check for orphaned whitespace.
-                    leading_space, trailing_space = self._get_outer_space(text_chunk)
+                    self.logger.debug("Got NER tags for chunk %d of %d.", i, total_chunks)
                     
-                    # if missing, add leading whitespace to @ner_output.
-                    if leading_space != "":
-                        ner_output += [("", "", leading_space)]
+                    # if no tokens were returned, report on giving up.
+                    if len(tokenized_tagged) == 0:
+                        self.logger.warning("Falling back to empty output.")
+                        return []
                     
-                    # add tokens to @ner_output.
-                    ner_output += tokenized_tagged
+                    # otherwise, if tokens were returned, add them to @ner_output.
+                    else:
+
+                        # check for orphaned whitespace.
+                        leading_space, trailing_space = self._get_outer_space(text_chunk)
+                        
+                        # if missing, add leading whitespace to @ner_output.
+                        if leading_space != "":
+                            ner_output += [("", "", leading_space)]
+                        
+                        # add tokens to @ner_output.
+                        ner_output += tokenized_tagged
+                        
+                        # if missing, add trailing whitespace to @ner_output.
+                        if trailing_space != "":
+                            ner_output += [("", "", trailing_space)]
                     
-                    # if missing, add trailing whitespace to @ner_output.
-                    if trailing_space != "":
-                        ner_output += [("", "", trailing_space)]
-                
-                i += 1
+                    i += 1
+
+                return ner_output
+
+            # if a cache exists, only send novel paragraphs to CoreNLP.
+            if self.cache is not None:
+                ner_output = self._get_cached_NER(text, get_chunked_NER)
+            else:
+                ner_output = get_chunked_NER(text)
 
             return ner_output
 
@@ -399,9 +668,9 @@ class TextToNLP():
                 if text_key not in token:
                     text_key = "word"
 
-                # get tuple values.
+                # get tuple values; tokens without NER tags are untagged.
                 try:
-                    text, tag, tspace = token[text_key], token["ner"], token["after"]
+                    text, tag, tspace = token[text_key], token.get("ner", "O"), token["after"]
                 except KeyError as err:
                     self.logger.error(err)
                     self.logger.warning("Token data not found; nothing to append to output.")
@@ -12,15 +12,32 @@ __AUTHOR_EMAIL__ = "nitin.a.arora@ncdcr.gov"
 
 # import modules.
 import sys; sys.path.append("..")
+import json
 import logging
 import logging.config
+import atexit
 import os
 import plac
 import requests
+import tempfile
+import time
 import yaml
+from tomes_tagger.lib.capacity_governor import CapacityGovernor
+from tomes_tagger.lib.content_cache import ContentCache
+from tomes_tagger.lib.content_triage import ContentTriage
+from tomes_tagger.lib.deadline import Deadline
 from tomes_tagger.lib.eaxs_to_tagged import EAXSToTagged
-from tomes_tagger.lib.html_to_text import HTMLToText, ModifyHTML
+from tomes_tagger.lib.html_to_text import HTMLToText, LXMLToText, ModifyHTML, StripHTML
+from tomes_tagger.lib.live_reporter import JSONStatusFile, LiveReporter
+from tomes_tagger.lib.memory_probe import MemoryProbe
+from tomes_tagger.lib.message_profiler import MessageProfiler
+from tomes_tagger.lib.message_tracer import MessageTracer
 from tomes_tagger.lib.nlp_to_xml import NLPToXML
+from tomes_tagger.lib.prometheus_textfile import PrometheusTextfile
+from tomes_tagger.lib.queue_logging import QueueLogging
+from tomes_tagger.lib.run_estimator import RunEstimator
+from tomes_tagger.lib.signatures import SignatureFinder
+from tomes_tagger.lib.stage_timer import StageTimer
 from tomes_tagger.lib.text_to_nlp import TextToNLP
 
 
@@ -34,14 +51,90 @@ class Tagger():
     """
     
 
-    def __init__(self, host, lynx_command="lynx", check_host=False, charset="utf-8"): 
+    def __init__(self, host, lynx_command="lynx", check_host=False, charset="utf-8",
+            ner_cache=False, cache_dir=None, reuse_quoted=False, find_signatures=False,
+            triage=False, max_body_size=None, size_policy="head_tail", html_backend="lynx",
+            html_parser="html5lib", html_cache=False, strip_html=False, 
+            message_timeout=None, stage_timing=False, timing_file=None, status_file=None,
+            prom_file=None, nlp_config=None, profile_prefix=None, profile_messages=None,
+            profile_rate=None, memory_probe=False, trace_file=None, corenlp_semaphore=None,
+            corenlp_capacity=None): 
         """ Sets instance attributes.
         
         Args:
             - host (str): The URL for the CoreNLP server (ex: "http://localhost:9003").
             - check_host (bool): Use True to test if @host is active. Otherwise, use False.
-            - lynx_command (str): The path to the "lynx" executable. 
+            - lynx_command (str): The path to the "lynx" executable. This is ignored if 
+            @html_backend is "lxml".
             - charset (str): Optional encoding for the tagged EAXS.
+            - ner_cache (bool): Use True to cache NER results per paragraph so that recurring
+            text (disclaimers, signatures, etc.) is only sent to CoreNLP once. Otherwise, use
+            False.
+            - cache_dir (str): An optional, existing folder in which to persist caches across
+            runs. If None, caches are only kept in memory.
+            - reuse_quoted (bool): Use True to reuse the tagged results of quoted replies 
+            already tagged in an earlier message of the same thread. Otherwise, use False.
+            - find_signatures (bool): Use True to tag signature blocks as <BlockText> instead 
+            of sending them to CoreNLP. Otherwise, use False.
+            - triage (bool): Use True to route machine-generated message bodies to 
+            pattern-only tagging and to skip tagging Base64 or binary bodies. Otherwise, use
+            False.
+            - max_body_size (int): The number of characters in a message body above which
+            @size_policy applies. If None, all message bodies are fully tagged.
+            - size_policy (str): How to tag message bodies over @max_body_size: "head_tail" 
+            only tags their beginning and end, "regex" only applies pattern-based tags, and
+            "defer" tags them after all other messages.
+            - html_backend (str): Use "lynx" to convert HTML to plain text via Lynx. Use 
+            "lxml" to convert it in-process, without Lynx.
+            - html_parser (str): The parser with which to modify HTML before converting it.
+            Use "lxml.html" to parse HTML with lxml and to skip parsing HTML without links or
+            images. If @html_backend is also "lxml", the modified tree is converted without
+            serializing it. Otherwise, see "help(html_to_text.ModifyHTML)".
+            - html_cache (bool): Use True to cache plain text versions of HTML message bodies
+            so that identical HTML, such as newsletters sent to many recipients, is only 
+            converted once. If @cache_dir is not None, the cache is shared across runs. 
+            Otherwise, use False.
+            - strip_html (bool): Use True to remove styles, scripts, comments, and Base64 
+            "data:" URIs from HTML before it's parsed. Otherwise, use False.
+            - message_timeout (float): The maximum number of seconds to spend tagging one 
+            message, shared across decoding, HTML conversion, NER tagging, and XML building.
+            Messages that run out of time are left untagged. If None, there's no time limit.
+            - stage_timing (bool): Use True to time each tagging stage and to report 
+            per-stage percentiles and histograms and per-message timings by content type and
+            body size. Otherwise, use False.
+            - timing_file (str): An optional filepath to which to write the stage timing 
+            report as JSON after each run. If not None, @stage_timing is implied.
+            - status_file (str): An optional filepath to which to atomically write progress 
+            snapshots as JSON while tagging. See "help(live_reporter.LiveReporter)".
+            - prom_file (str): An optional ".prom" filepath to which to write metrics for the
+            Prometheus textfile collector while tagging. Counters keep growing across runs.
+            - nlp_config (str): An optional JSON file with the "chunk_size" and "workers" to
+            use for CoreNLP requests, such as one written by 
+            tomes_tagger.lib.nlp_autotuner.NLPAutotuner.
+            - profile_prefix (str): An optional filepath prefix to which to write cProfile 
+            and sampled stack profiles of tagging, labeled by stage, after each run. If not
+            None, @stage_timing is implied. See "help(message_profiler.MessageProfiler)".
+            - profile_messages (int): The number of messages to profile, starting with the 
+            first. If None, there's no limit. This is ignored if @profile_prefix is None.
+            - profile_rate (float): The share of messages to profile, chosen at random. If 
+            None, every message is eligible. This is ignored if @profile_prefix is None.
+            - memory_probe (bool): Use True to record the RSS growth and top allocators of 
+            the heaviest messages. This slows tagging down. Otherwise, use False. See 
+            "help(memory_probe.MemoryProbe)".
+            - trace_file (str): An optional JSONL filepath to which to append one trace 
+            record per message with its stage spans, CoreNLP chunks and retries, and 
+            outcome. If not None, @stage_timing is implied. See 
+            "help(message_tracer.MessageTracer)".
+            - corenlp_semaphore (object): An optional semaphore shared by several taggers 
+            that caps their CoreNLP requests in flight. See "help(text_to_nlp._CoreNLP)".
+            - corenlp_capacity (int): The maximum number of CoreNLP requests in flight to 
+            @host across all tagger processes on this host that set it. If None, requests 
+            aren't limited across processes. This is ignored if @corenlp_semaphore is not 
+            None. See "help(capacity_governor.CapacityGovernor)".
+
+        Raises:
+            - ValueError: If @html_backend is not "lynx" or "lxml" or if both 
+            @profile_prefix and @trace_file are set.
         """
     
         # set logging.
@@ -60,16 +153,73 @@ class Tagger():
         self.check_host = check_host
         self.lynx_command = lynx_command
         self.charset = charset
+        self.ner_cache = ner_cache
+        self.cache_dir = cache_dir
+        self.reuse_quoted = reuse_quoted
+        self.find_signatures = find_signatures
+        self.triage = triage
+        self.max_body_size = max_body_size
+        self.size_policy = size_policy
+        self.html_backend = html_backend
+        self.html_parser = html_parser
+        self.html_cache = html_cache
+        self.strip_html = strip_html
+        self.message_timeout = message_timeout
+        self.stage_timing = (stage_timing or timing_file is not None or profile_prefix is not
+                None or trace_file is not None)
+        self.timing_file = timing_file
+        self.status_file = status_file
+        self.prom_file = prom_file
+        self.nlp_config = nlp_config
+        self.profile_prefix = profile_prefix
+        self.profile_messages = profile_messages
+        self.profile_rate = profile_rate
+        self.memory_probe = memory_probe
+        self.trace_file = trace_file
+        self.corenlp_semaphore = corenlp_semaphore
+        self.corenlp_capacity = corenlp_capacity
+
+        # start with no progress reporter; one is created per run.
+        self.reporter = None
 
         # if specified, verify host is active before creating instances of modules.
         if self.check_host:
             self._ping_host()
 
         # compose module instances.
-        self.h2t = HTMLToText(self.lynx_command)
-        self.t2n = TextToNLP(self.host)
+        self.deadline = Deadline(self.message_timeout) if self.message_timeout else None
+        self.stage_timer = self._get_stage_timer()
+        self.governor = None
+        if self.corenlp_semaphore is None and self.corenlp_capacity is not None:
+            self.governor = CapacityGovernor(self.host, self.corenlp_capacity)
+        semaphore = self.governor if self.governor is not None else self.corenlp_semaphore
+        self.metrics = self._get_metrics()
+        self.sh = StripHTML() if self.strip_html else None
+        self.h2t = self._get_html_backend()
+        self.h2t_cache = self._get_cache("html_cache", self.html_cache)
+        self.h2t_cache_signature = json.dumps([self.html_backend, self.html_parser,
+            getattr(self.h2t, "lynx_options", None), getattr(self.h2t, "width", None),
+            self.strip_html], sort_keys=True)
+        nlp_options = self._get_nlp_options()
+        chunk_hook = self.stage_timer.add_chunks if self.trace_file else None
+        self.t2n = TextToNLP(self.host, cache=self._get_cache("ner_cache", self.ner_cache),
+                deadline=self.deadline, request_hook=self._get_request_hook("ner"), 
+                chunk_hook=chunk_hook, semaphore=semaphore, **nlp_options)
         self.n2x = NLPToXML()
-        self.e2t = EAXSToTagged(self._html_convertor, self._text_tagger, self.charset)
+        self.sf = SignatureFinder() if self.find_signatures else None
+        self.ct = ContentTriage() if self.triage else None
+        use_regex = self.triage or self.size_policy == "regex"
+        self.t2n_regex = TextToNLP(self.host, regex_only=True, deadline=self.deadline,
+                request_hook=self._get_request_hook("regex"), chunk_hook=chunk_hook, 
+                semaphore=semaphore, **nlp_options) if use_regex else None
+        self.e2t = EAXSToTagged(self._html_convertor, self._text_tagger, self.charset,
+                reuse_quoted=self.reuse_quoted, 
+                signature_finder=self.sf.get_signature if self.sf else None,
+                content_triage=self.ct.get_route if self.ct else None,
+                regex_tagger=self._regex_tagger if use_regex else None,
+                max_body_size=self.max_body_size, size_policy=self.size_policy,
+                deadline=self.deadline, stage_timer=self.stage_timer,
+                memory_probe=MemoryProbe() if self.memory_probe else None)
 
 
     def _ping_host(self):
@@ -95,7 +245,243 @@ class Tagger():
         return
 
 
+    def _get_html_backend(self):
+        """ Creates the HTML to plain text converter per @self.html_backend.
+
+        Returns:
+            object: The return value.
+            Either a tomes_tagger.lib.html_to_text.HTMLToText or LXMLToText instance.
+
+        Raises:
+            - ValueError: If @self.html_backend is not "lynx" or "lxml".
+        """
+
+        if self.html_backend == "lynx":
+            return HTMLToText(self.lynx_command, deadline=self.deadline)
+        elif self.html_backend == "lxml":
+            return LXMLToText()
+        
+        msg = "HTML backend '{}' must be 'lynx' or 'lxml'.".format(self.html_backend)
+        self.logger.error(msg)
+        raise ValueError(msg)
+
+
+    def _get_stage_timer(self):
+        """ Creates the stage timer if @self.stage_timing is True. If @self.profile_prefix 
+        is not None, the stage timer also profiles messages. If @self.trace_file is not 
+        None, it also traces messages.
+
+        Returns:
+            tomes_tagger.lib.stage_timer.StageTimer: The return value.
+            If @self.stage_timing is False, None is returned.
+
+        Raises:
+            - ValueError: If both @self.profile_prefix and @self.trace_file are set.
+        """
+
+        # verify that only one subclass of StageTimer is needed.
+        if self.profile_prefix is not None and self.trace_file is not None:
+            msg = "Profiling and tracing can't be used together."
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        if not self.stage_timing:
+            return None
+        elif self.profile_prefix is not None:
+            return MessageProfiler(self.profile_messages, self.profile_rate)
+        elif self.trace_file is not None:
+            return MessageTracer(self.trace_file)
+
+        return StageTimer()
+
+
+    def _get_nlp_options(self):
+        """ Loads the CoreNLP request options from @self.nlp_config.
+
+        Returns:
+            dict: The return value.
+            The "chunk_size" and "workers" keyword arguments for TextToNLP. If 
+            @self.nlp_config is None, an empty dictionary is returned.
+        """
+
+        # if not specified, use TextToNLP's defaults.
+        if self.nlp_config is None:
+            return {}
+
+        with open(self.nlp_config, encoding="utf-8") as nf:
+            config = json.load(nf)
+        options = {key: int(config[key]) for key in ["chunk_size", "workers"] if key in
+                config}
+        self.logger.info("Loaded CoreNLP options: {}".format(options))
+
+        return options
+
+
+    def _get_cache(self, name, is_enabled):
+        """ Creates a cache named @name if @is_enabled is True. If @self.cache_dir is not
+        None, the cache is also persisted to disk within @self.cache_dir.
+
+        Args:
+            - name (str): The name of the cache.
+            - is_enabled (bool): Use True to create the cache. Otherwise, use False.
+
+        Returns:
+            tomes_tagger.lib.content_cache.ContentCache: The return value.
+            If @is_enabled is False, None is returned.
+        """
+
+        # if not enabled, don't create a cache.
+        if not is_enabled:
+            return None
+
+        # if requested, set the on-disk cache filepath.
+        cache_file = None
+        if self.cache_dir is not None:
+            cache_file = os.path.join(self.cache_dir, name + ".sqlite")
+
+        self.logger.info("Creating cache: {}".format(name))
+        cache = ContentCache(cache_file)
+        return cache
+
+
+    def _get_metrics(self):
+        """ Creates the Prometheus textfile metrics if @self.prom_file is not None.
+
+        Returns:
+            tomes_tagger.lib.prometheus_textfile.PrometheusTextfile: The return value.
+            If @self.prom_file is None, None is returned.
+        """
+
+        # if not enabled, don't create metrics.
+        if self.prom_file is None:
+            return None
+
+        # create metrics that aren't taken from progress snapshots.
+        metrics = PrometheusTextfile(self.prom_file, collector=self._collect_metrics)
+        metrics.add_histogram("corenlp_request_seconds", "CoreNLP request latency.")
+        metrics.add_counter("corenlp_errors_total", "CoreNLP requests that failed.")
+        metrics.add_counter("lynx_runs_total", "Lynx invocations.")
+        metrics.add_counter("lynx_timeouts_total", "Lynx invocations that timed out.")
+        metrics.add_counter("lynx_errors_total", "Lynx invocations that failed.")
+        metrics.add_gauge("cache_hits", "Cache hits in the current run.")
+        metrics.add_gauge("cache_misses", "Cache misses in the current run.")
+        metrics.add_counter("bytes_written_total", "Bytes written to tagged EAXS files.")
+        if self.governor is not None:
+            metrics.add_counter("corenlp_wait_seconds_total", "Seconds spent waiting for "
+                    "a CoreNLP request slot.")
+
+        return metrics
+
+
+    def _get_request_hook(self, mode):
+        """ Returns a function that adds each CoreNLP request to @self.metrics and, if 
+        @self.trace_file is not None, to the message being traced.
+
+        Args:
+            - mode (str): The label for the requests: "ner" or "regex".
+
+        Returns:
+            function: The return value.
+            If @self.metrics and @self.trace_file are None, None is returned.
+        """
+
+        # if not enabled, don't observe requests.
+        if self.metrics is None and self.trace_file is None:
+            return None
+        tracer = self.stage_timer if self.trace_file is not None else None
+
+        # create function to add one request.
+        def request_hook(seconds, is_error):
+            if self.metrics is not None:
+                self.metrics.observe("corenlp_request_seconds", seconds, mode=mode)
+                if is_error:
+                    self.metrics.inc("corenlp_errors_total", mode=mode)
+            if tracer is not None:
+                tracer.add_request(seconds, is_error)
+
+        return request_hook
+
+
+    def _collect_metrics(self, metrics):
+        """ Updates @metrics with Lynx, cache, and writer counters before they're written.
+
+        Args:
+            - metrics (tomes_tagger.lib.prometheus_textfile.PrometheusTextfile): The metrics
+            to update.
+
+        Returns:
+            None
+        """
+
+        # update Lynx counters.
+        if hasattr(self.h2t, "lynx_stats"):
+            for key, value in self.h2t.lynx_stats.items():
+                metrics.set("lynx_{}_total".format(key), value)
+
+        # update cache counters.
+        for name, cache in [("ner", self.t2n.cache), ("html", self.h2t_cache)]:
+            if cache is None:
+                continue
+            stats = cache.get_stats()
+            metrics.set("cache_hits", stats["memory_hits"] + stats["disk_hits"], cache=name)
+            metrics.set("cache_misses", stats["misses"], cache=name)
+
+        # update writer counter.
+        metrics.set("bytes_written_total", self.e2t.bytes_written)
+
+        # update governor counter.
+        if self.governor is not None:
+            metrics.set("corenlp_wait_seconds_total", self.governor.wait_seconds_total)
+
+        return
+
+
+    def _time(self, stage):
+        """ Returns a context manager that times its block as @stage via @self.stage_timer.
+
+        Args:
+            - stage (str): The name of the stage to time.
+
+        Returns:
+            object: The return value.
+            If @self.stage_timer is None, the context manager does nothing.
+        """
+
+        if self.stage_timer is None:
+            return StageTimer.no_timing
+
+        return self.stage_timer.time(stage)
+
+
     def _html_convertor(self, html):
+        """ Converts @html string to a plain text. If @self.h2t_cache is not None, cached 
+        text is used if possible. Otherwise, the text is obtained via @self._convert_html() 
+        and cached.
+        
+        Args:
+            - html (str): The HTML to convert.
+
+        Returns:
+            str: The return value.
+        """
+
+        # if not caching, convert @html.
+        if self.h2t_cache is None:
+            return self._convert_html(html)
+
+        # look up @html; if needed, convert and cache it.
+        key = self.h2t_cache.get_key(html, self.h2t_cache_signature)
+        text = self.h2t_cache.get(key)
+        if text is None:
+            text = self._convert_html(html)
+            self.h2t_cache.set(key, text)
+        else:
+            self.logger.debug("Using cached plain text version of HTML.")
+
+        return text
+
+
+    def _convert_html(self, html):
         """ Converts @html string to a plain text.
         
         Args:
@@ -105,14 +491,27 @@ class Tagger():
             str: The return value.
         """
 
+        # if requested, remove non-content payloads before parsing @html.
+        if self.sh is not None:
+            with self._time("html.strip"):
+                html = self.sh.strip(html)
+
         # alter DOM.
-        html = ModifyHTML(html)
-        html.shift_links()
-        html.remove_images()
-        html = html.raw()
+        with self._time("html.modify"):
+            html = ModifyHTML(html, self.html_parser)
+            html.modify()
+
+        # if possible, convert the altered tree without serializing it.
+        if self.html_backend == "lxml" and html.is_lxml and html.root is not None:
+            with self._time("html.convert"):
+                text = self.h2t.get_tree_text(html.root)
+            return text
+        with self._time("html.serialize"):
+            html = html.raw()
         
         # convert HTML to text.
-        text = self.h2t.get_text(html, is_raw=True)
+        with self._time("html.convert"):
+            text = self.h2t.get_text(html, is_raw=True)
         return text
 
 
@@ -127,12 +526,40 @@ class Tagger():
         """
 
         # get NLP; convert to XML.
-        nlp = self.t2n.get_NER(text)
-        nlp = self.n2x.get_xml(nlp)
+        start_time = time.perf_counter()
+        with self._time("ner.corenlp"):
+            nlp = self.t2n.get_NER(text)
+        if self.reporter is not None:
+            self.reporter.add_latency(time.perf_counter() - start_time)
+        with self._time("ner.nlp_to_xml"):
+            nlp = self.n2x.get_xml(nlp)
+        return nlp
+
+
+    def _regex_tagger(self, text):
+        """ Converts plain @text to pattern-tagged, TOMES-specific XML. Unlike 
+        self._text_tagger(), only the regexNER patterns are applied.
+        
+        Args:
+            - text (str): The text to convert to pattern-tagged XML.
+
+        Returns:
+            str: The return value.
+        """
+
+        # get pattern-based NLP; convert to XML.
+        start_time = time.perf_counter()
+        with self._time("regex.corenlp"):
+            nlp = self.t2n_regex.get_NER(text)
+        if self.reporter is not None:
+            self.reporter.add_latency(time.perf_counter() - start_time)
+        with self._time("regex.nlp_to_xml"):
+            nlp = self.n2x.get_xml(nlp)
         return nlp
 
     
-    def write_tagged(self, eaxs_file, tagged_eaxs_file, *args, **kwargs):
+    def write_tagged(self, eaxs_file, tagged_eaxs_file, *args, reporter=None, 
+            report_interval=60, **kwargs):
         """ Writes tagged version of @eaxs_file to @tagged_eaxs_file.
         This is a wrapper around tomes_tagger.lib.eaxs_to_tagged.EAXSToTagged.write_tagged(). 
         For more information do "help(tagger.EAXSToTagged.write_tagged)".
@@ -141,9 +568,29 @@ class Tagger():
             - eaxs_file (str): The filepath for the EAXS file.
             - tagged_eaxs_file (str): The filepath to which the tagged EAXS document will be
             written to.
+            - reporter (function): An optional function that accepts a progress snapshot 
+            (dict) with message and byte rates, the mean CoreNLP latency, and an ETA. It's
+            called when tagging starts, every @report_interval seconds, and when tagging is
+            done.
+            - report_interval (float): The minimum number of seconds between progress 
+            snapshots. Use 0 to only report when tagging starts and when it's done. This is
+            ignored if @reporter, @self.status_file, and @self.prom_file are None.
 
         Returns:
             dict: The return value.
+            If the NER cache is enabled, the "ner_cache" key's value is a dict with the 
+            paragraph cache hit rate and the number of characters sent to and saved from 
+            CoreNLP. If the HTML cache is enabled, the "html_cache" key's value is a dict 
+            with the HTML cache's hits, misses, and hit rate. If HTML stripping is enabled,
+            the "stripped_html" key's value is a dict with the number of HTML characters 
+            converted and the number of characters removed per payload type. If stage 
+            timing is enabled, the "stage_timing" key's value is a dict with the stage timing
+            report and, if @self.timing_file is not None, the report is also written to it.
+            If profiling is enabled, the "profiles" key's value is a list of the profile 
+            files written. If tracing is enabled, the "trace" key's value is a dict with the
+            trace file, the run's identifier, and the number of records written. If 
+            @self.corenlp_capacity is set, the "corenlp_governor" key's value is a dict with
+            the time spent waiting for CoreNLP request slots.
 
         Raises:
             Exception: If an exception was raised.
@@ -151,10 +598,50 @@ class Tagger():
 
         self.logger.info("Attempting to tag EAXS file: {}".format(eaxs_file))
 
+        # reset cache counters for this run.
+        self.t2n.reset_cache_stats()
+        if self.h2t_cache is not None:
+            self.h2t_cache.reset_stats()
+        if self.sh is not None:
+            self.sh.reset_stats()
+        if self.governor is not None:
+            self.governor.reset_stats()
+
+        # if requested, report on progress via @reporter and/or @self.status_file.
+        callbacks = [reporter] if reporter is not None else []
+        if self.status_file is not None:
+            callbacks.append(JSONStatusFile(self.status_file))
+        if self.metrics is not None:
+            callbacks.append(self.metrics)
+        self.reporter = None
+        if len(callbacks) != 0:
+            self.reporter = LiveReporter(callbacks, report_interval)
+
         # create tagged EAXS.
         results = {}
         try:
-            results = self.e2t.write_tagged(eaxs_file, tagged_eaxs_file, *args, **kwargs)
+            results = self.e2t.write_tagged(eaxs_file, tagged_eaxs_file, *args, 
+                    reporter=self.reporter, **kwargs)
+            if self.t2n.cache is not None:
+                results["ner_cache"] = self.t2n.get_cache_stats()
+                self.logger.info("NER cache results: {}".format(results["ner_cache"]))
+            if self.h2t_cache is not None:
+                results["html_cache"] = self.h2t_cache.get_stats()
+                self.logger.info("HTML cache results: {}".format(results["html_cache"]))
+            if self.sh is not None:
+                results["stripped_html"] = self.sh.get_stats()
+                self.logger.info("HTML stripping results: {}".format(
+                    results["stripped_html"]))
+            if self.governor is not None:
+                results["corenlp_governor"] = self.governor.get_stats()
+                self.logger.info("CoreNLP governor results: {}".format(
+                    results["corenlp_governor"]))
+            if self.timing_file is not None:
+                self.stage_timer.write_report(self.timing_file)
+            if self.profile_prefix is not None:
+                results["profiles"] = self.stage_timer.write_profile(self.profile_prefix)
+            if self.trace_file is not None:
+                results["trace"] = self.stage_timer.close()
             self.logger.info("Created file: {}".format(tagged_eaxs_file))
             self.event_logger.info({"entity": "agent", "name": __NAME__, 
                     "fullname": __FULLNAME__, "uri": __URL__, "version": __VERSION__})
@@ -171,14 +658,70 @@ class Tagger():
         return results
 
 
-# CLI.
-def main(eaxs_file: ("source EAXS file"), 
-        tagged_eaxs_file: ("tagged EAXS destination"),
-        silent: ("disable console logs", "flag", "s"),
-        host: ("NLP server URL", "option")="http://localhost:9003"):
+    def estimate(self, eaxs_file, sample_size=200, seed=0):
+        """ Estimates the time, CoreNLP load, and output size of tagging @eaxs_file by fully
+        tagging a sample of its messages, stratified by content type and body size. Nothing
+        is written except a temporary tagged file for the sample.
 
-    "Converts EAXS document to tagged EAXS.\
-    \nexample: `python3 tagger.py ../tests/sample_files/sampleEAXS.xml tagged.xml`"
+        Args:
+            - eaxs_file (str): The filepath for the EAXS file.
+            - sample_size (int): The number of messages to tag. See 
+            "help(run_estimator.RunEstimator)".
+            - seed (int): The random seed for sampling.
+
+        Returns:
+            dict: The return value.
+            See "help(run_estimator.RunEstimator.get_estimate)". The "sample_seconds" key's
+            value is the time the estimate took.
+        """
+
+        self.logger.info("Estimating the cost of tagging EAXS file: {}".format(eaxs_file))
+        start_time = time.perf_counter()
+        estimator = RunEstimator(sample_size, seed)
+
+        # read each message once; group messages by content type and body size.
+        for index, (event, element) in enumerate(self.e2t._get_messages(eaxs_file), 1):
+            content_text, transfer_encoding_text, content_type_text = (
+                    self.e2t._get_message_data(element))
+            estimator.add_message(index, content_type_text, len(content_text))
+            element.clear()
+        scan_seconds = time.perf_counter() - start_time
+
+        # tag the sample with @estimator as the stage timer.
+        sample = estimator.get_sample()
+        self.logger.info("Tagging a sample of {} messages.".format(len(sample)))
+        stage_timer = self.stage_timer
+        self.stage_timer, self.e2t.stage_timer = estimator, estimator
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                sample_file = os.path.join(temp_dir, "sample.xml")
+                self.e2t.write_tagged(eaxs_file, sample_file, restrictions=sample)
+                output_bytes = os.path.getsize(sample_file)
+        finally:
+            self.stage_timer, self.e2t.stage_timer = stage_timer, stage_timer
+
+        # extrapolate to the whole file.
+        estimate = estimator.get_estimate(scan_seconds, output_bytes)
+        estimate["eaxs_file"] = eaxs_file
+        estimate["sample_seconds"] = round(time.perf_counter() - start_time, 3)
+        self.logger.info("Estimated seconds to tag all messages: {}".format(
+            estimate["estimated_seconds"]))
+
+        return estimate
+
+
+def set_logging(silent=False, log_profile="default"):
+    """ Configures logging for the CLI per "logger.yaml" or, if @log_profile is 
+    "production", per "logger_production.yaml". Log files are written to "log".
+
+    Args:
+        - silent (bool): Use True to disable console logs. Otherwise, use False.
+        - log_profile (str): Use "production" to only log per-message summaries and to 
+        handle log records on background threads. Otherwise, use "default".
+
+    Returns:
+        None
+    """
 
     # make sure logging directory exists.
     logdir = "log"
@@ -188,6 +731,8 @@ def main(eaxs_file: ("source EAXS file"),
     # get absolute path to logging config file.
     config_dir = os.path.dirname(os.path.abspath(__file__))
     config_file = os.path.join(config_dir, "logger.yaml")
+    if log_profile == "production":
+        config_file = os.path.join(config_dir, "logger_production.yaml")
     
     # load logging config file.
     with open(config_file) as cf:
@@ -195,12 +740,85 @@ def main(eaxs_file: ("source EAXS file"),
     if silent:
         config["handlers"]["console"]["level"] = 100
     logging.config.dictConfig(config)
+
+    # if requested, handle log records on background threads; handle queued records on exit.
+    if log_profile == "production":
+        queue_logging = QueueLogging(["", "event_logger"])
+        queue_logging.start()
+        atexit.register(queue_logging.stop)
+
+    return
+
+
+# CLI.
+def main(eaxs_file: ("source EAXS file"), 
+        tagged_eaxs_file: ("tagged EAXS destination"),
+        silent: ("disable console logs", "flag", "s"),
+        ner_cache: ("cache NER results per paragraph", "flag", "n"),
+        html_cache: ("cache plain text versions of HTML", "flag", "c"),
+        strip_html: ("remove styles, scripts, comments, and data URIs from HTML", "flag", 
+            "p"),
+        reuse_quoted: ("reuse tagged quoted replies within threads", "flag", "q"),
+        find_signatures: ("tag signature blocks without NER", "flag", "f"),
+        triage: ("route machine-generated or junk bodies away from NER", "flag", "t"),
+        memory_probe: ("record memory use of the heaviest messages", "flag", "m"),
+        host: ("NLP server URL", "option")="http://localhost:9003",
+        cache_dir: ("folder in which to persist caches", "option")=None,
+        max_body_size: ("message body size above which to apply the size policy", "option", 
+            None, int)=None,
+        size_policy: ("how to tag oversized message bodies", "option", None, str,
+            ["head_tail", "regex", "defer"])="head_tail",
+        html_backend: ("HTML to text converter", "option", None, str, ["lynx", "lxml"])="lynx",
+        html_parser: ("HTML parser for modifying HTML", "option", None, str, 
+            ["html5lib", "lxml.html"])="html5lib",
+        message_timeout: ("maximum seconds to spend tagging one message", "option", None, 
+            float)=None,
+        timing_file: ("JSON file to which to write per-stage timings", "option")=None,
+        status_file: ("JSON file to which to write live progress", "option")=None,
+        prom_file: ("Prometheus textfile collector file to write metrics to", "option")=None,
+        nlp_config: ("JSON file with the CoreNLP chunk size and workers", "option")=None,
+        corenlp_capacity: ("maximum CoreNLP requests in flight across tagger processes", 
+            "option", None, int)=None,
+        estimate_file: ("JSON file to which to write a run time estimate from a sample of \
+messages instead of tagging", "option")=None,
+        sample_size: ("number of messages to sample for the estimate", "option", None, 
+            int)=200,
+        profile_prefix: ("filepath prefix to which to write profiles by stage", "option")=None,
+        profile_messages: ("number of messages to profile", "option", None, int)=None,
+        profile_rate: ("share of messages to profile", "option", None, float)=None,
+        trace_file: ("JSONL file to which to append one trace record per message", 
+            "option")=None,
+        log_profile: ("logging profile; 'production' logs per-message summaries from a \
+background thread", "option", None, str, ["default", "production"])="default",
+        report_interval: ("seconds between live progress updates", "option", None, 
+            float)=60):
+
+    "Converts EAXS document to tagged EAXS.\
+    \nexample: `python3 tagger.py ../tests/sample_files/sampleEAXS.xml tagged.xml`"
+
+    # set logging.
+    set_logging(silent, log_profile)
     
     # make tagged version of EAXS.
     logging.info("Running CLI: " + " ".join(sys.argv))
     try:
-        tagger = Tagger(host, check_host=True)
-        results = tagger.write_tagged(eaxs_file, tagged_eaxs_file)
+        tagger = Tagger(host, check_host=True, ner_cache=ner_cache, cache_dir=cache_dir,
+                reuse_quoted=reuse_quoted, find_signatures=find_signatures, triage=triage,
+                max_body_size=max_body_size, size_policy=size_policy, 
+                html_backend=html_backend, html_parser=html_parser, html_cache=html_cache,
+                strip_html=strip_html, message_timeout=message_timeout, 
+                timing_file=timing_file, status_file=status_file, prom_file=prom_file,
+                nlp_config=nlp_config, profile_prefix=profile_prefix, 
+                profile_messages=profile_messages, profile_rate=profile_rate,
+                memory_probe=memory_probe, trace_file=trace_file, 
+                corenlp_capacity=corenlp_capacity)
+        if estimate_file is not None:
+            results = tagger.estimate(eaxs_file, sample_size)
+            with open(estimate_file, "w", encoding="utf-8") as ef:
+                json.dump(results, ef, indent=2)
+        else:
+            results = tagger.write_tagged(eaxs_file, tagged_eaxs_file, 
+                    report_interval=report_interval)
         logging.info("Results: {}".format(results))
         logging.info("Done.")
         sys.exit()